@@ -1,9 +1,24 @@
-import requests
 import json
 import sys
 from datetime import datetime, timedelta
 import time
 
+import wire
+from provider_http import getSession
+from tracing import span, traced
+
+# Map timeframe to Finnhub resolution and days
+PERIODS = {
+    '1d': ('D', 365),
+    '5d': ('5', 5),
+    '1mo': ('60', 30),
+    '3mo': ('D', 90),
+    '1y': ('D', 365),
+    '5y': ('W', 1825),
+    'max': ('M', 3650)
+}
+
+@traced("fetch_chart_data_finnhub")
 def fetch_chart_data_finnhub(ticker, api_key, interval='D', days=365):
     """
     Fetch OHLCV data from Finnhub
@@ -32,11 +47,9 @@ def fetch_chart_data_finnhub(ticker, api_key, interval='D', days=365):
             'token': api_key
         }
 
-        response = requests.get(url, params=params)
-        data = response.json()
-
-        # Debug: print the response
-        print(f"Finnhub API Response: {data}", file=sys.stderr)
+        response = getSession().get(url, params=params)
+        with span("finnhub.parseJson"):
+            data = response.json()
 
         if data.get('s') != 'ok' or not data.get('t'):
             error_msg = data.get('error', 'No data available for this ticker')
@@ -90,6 +103,7 @@ def fetch_chart_data_finnhub(ticker, api_key, interval='D', days=365):
             'error': str(e)
         }
 
+@traced("calculate_indicators")
 def calculate_indicators(data):
     """Calculate technical indicators from Finnhub data"""
     indicators = {}
@@ -213,17 +227,17 @@ def calculate_indicators(data):
                     histogram = macd_vals[i] - signal
 
                     indicators['macd'].append({
-                        'time': data['t'][i+26],
+                        'time': data['t'][i+25],
                         'value': round(macd_vals[i], 4)
                     })
 
                     indicators['macdSignal'].append({
-                        'time': data['t'][i+26],
+                        'time': data['t'][i+25],
                         'value': round(signal, 4)
                     })
 
                     indicators['macdHistogram'].append({
-                        'time': data['t'][i+26],
+                        'time': data['t'][i+25],
                         'value': round(histogram, 4),
                         'color': '#26a69a' if histogram >= 0 else '#ef5350'
                     })
@@ -268,19 +282,9 @@ if __name__ == '__main__':
     ticker = sys.argv[1].strip().upper()
     api_key = sys.argv[2].strip()
 
-    # Map timeframe to Finnhub resolution and days
-    interval_map = {
-        '1d': ('D', 365),
-        '5d': ('5', 5),
-        '1mo': ('60', 30),
-        '3mo': ('D', 90),
-        '1y': ('D', 365),
-        '5y': ('W', 1825),
-        'max': ('M', 3650)
-    }
-
     period = sys.argv[3] if len(sys.argv) > 3 else '1y'
-    resolution, days = interval_map.get(period, ('D', 365))
+    resolution, days = PERIODS.get(period, ('D', 365))
 
     result = fetch_chart_data_finnhub(ticker, api_key, resolution, days)
-    print(json.dumps(result))
+    with span("serialize"):
+        wire.write(result)
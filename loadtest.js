@@ -0,0 +1,378 @@
+// Load generator for the API: replays ticker page views at a target rate and
+// reports throughput, latency percentiles, peak RSS and Python process count.
+//
+//   node loadtest.js --rate 2 --duration 60                 # starts server.js with replayed providers
+//   node loadtest.js --url http://localhost:3000 --rate 5   # against a server that is already running
+//   node loadtest.js --compare .cache/bench/load-<previous>.json
+//   node loadtest.js --page legacy                          # the three per-section POSTs instead of /api/report
+
+const http = require('http');
+const fs = require('fs');
+const path = require('path');
+const { spawn, execFile } = require('child_process');
+
+const RESULTS_DIR = path.join(__dirname, '.cache', 'bench');
+
+// Popular names get most of the traffic (Zipf weights by rank)
+const DEFAULT_TICKERS = ['AAPL', 'NVDA', 'MSFT', 'TSLA', 'AMZN', 'META', 'GOOGL', 'PLTR'];
+
+// Sections public/index.html asks /api/report for on each page view
+const PAGE_SECTIONS = ['stock', 'sec', 'news'];
+
+// Requests fired in parallel per page view. 'report' is what the frontend does now;
+// 'legacy' is the three per-section POSTs it used to send
+const PAGE_VIEWS = {
+    report: [
+        { endpoint: '/api/report', send: (baseUrl, ticker) => streamReport(baseUrl, ticker, PAGE_SECTIONS) },
+    ],
+    legacy: ['/api/stock-data', '/api/sec-data', '/api/news'].map((endpoint) => ({
+        endpoint,
+        send: (baseUrl, ticker) => post(baseUrl, endpoint, { ticker }),
+    })),
+};
+
+function parseArgs(argv) {
+    const options = {
+        url: null,
+        port: 3100,
+        rate: 1,            // page views per second
+        duration: 30,       // seconds of load
+        tickers: DEFAULT_TICKERS,
+        zipf: 1.1,
+        seed: 1,
+        sampleMs: 250,
+        output: null,
+        compare: null,
+        page: 'report',
+    };
+    for (let i = 2; i < argv.length; i++) {
+        const name = argv[i].replace(/^--/, '');
+        const value = argv[i + 1];
+        if (name === 'tickers') {
+            options.tickers = value.split(',');
+        } else if (['url', 'output', 'compare', 'page'].includes(name)) {
+            options[name] = value;
+        } else if (name in options) {
+            options[name] = Number(value);
+        } else {
+            throw new Error(`Unknown option --${name}`);
+        }
+        i++;
+    }
+    if (!(options.page in PAGE_VIEWS)) {
+        throw new Error(`Unknown page view '${options.page}' (${Object.keys(PAGE_VIEWS).join(', ')})`);
+    }
+    return options;
+}
+
+// Small deterministic PRNG so runs with the same seed send the same mix
+function mulberry32(seed) {
+    return () => {
+        seed |= 0;
+        seed = (seed + 0x6d2b79f5) | 0;
+        let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function zipfPicker(items, exponent, random) {
+    const weights = items.map((_, rank) => 1 / Math.pow(rank + 1, exponent));
+    const total = weights.reduce((a, b) => a + b, 0);
+    return () => {
+        let r = random() * total;
+        for (let i = 0; i < items.length; i++) {
+            r -= weights[i];
+            if (r <= 0) return items[i];
+        }
+        return items[items.length - 1];
+    };
+}
+
+// A 200 can still be a failure: /api/news reports provider errors as { success: false }
+function succeeded(status, body) {
+    if (status !== 200) return false;
+    try {
+        return JSON.parse(body).success !== false;
+    } catch (error) {
+        return false;
+    }
+}
+
+function post(baseUrl, endpoint, body) {
+    return new Promise((resolve) => {
+        const payload = JSON.stringify(body);
+        const started = process.hrtime.bigint();
+        const request = http.request(new URL(endpoint, baseUrl), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(payload) },
+        }, (response) => {
+            const chunks = [];
+            let bytes = 0;
+            response.on('data', (chunk) => {
+                chunks.push(chunk);
+                bytes += chunk.length;
+            });
+            response.on('end', () => resolve({
+                endpoint,
+                status: response.statusCode,
+                ok: succeeded(response.statusCode, Buffer.concat(chunks).toString()),
+                ms: Number(process.hrtime.bigint() - started) / 1e6,
+                bytes,
+            }));
+        });
+        request.on('error', (error) => resolve({
+            endpoint,
+            status: 0,
+            ok: false,
+            error: error.message,
+            ms: Number(process.hrtime.bigint() - started) / 1e6,
+            bytes: 0,
+        }));
+        request.end(payload);
+    });
+}
+
+// One NDJSON report request, timed to its first and last section record
+function streamReport(baseUrl, ticker, sections) {
+    return new Promise((resolve) => {
+        const endpoint = '/api/report';
+        const payload = JSON.stringify({ ticker, sections: sections.join(',') });
+        const started = process.hrtime.bigint();
+        const elapsedMs = () => Number(process.hrtime.bigint() - started) / 1e6;
+        const request = http.request(new URL(endpoint, baseUrl), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(payload) },
+        }, (response) => {
+            let buffered = '';
+            let bytes = 0;
+            let firstSectionMs = null;
+            let lastSectionMs = null;
+            let done = false;
+            const failedSections = [];
+            response.setEncoding('utf8');
+            response.on('data', (chunk) => {
+                bytes += Buffer.byteLength(chunk);
+                const lines = (buffered + chunk).split('\n');
+                buffered = lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    let record;
+                    try {
+                        record = JSON.parse(line);
+                    } catch (error) {
+                        failedSections.push('malformed');
+                        continue;
+                    }
+                    if (record.section === 'done') {
+                        done = true;
+                        continue;
+                    }
+                    if (firstSectionMs === null) firstSectionMs = elapsedMs();
+                    lastSectionMs = elapsedMs();
+                    if (!record.ok) failedSections.push(record.section);
+                }
+            });
+            response.on('end', () => resolve({
+                endpoint,
+                status: response.statusCode,
+                ok: response.statusCode === 200 && done && failedSections.length === 0,
+                failedSections,
+                ms: elapsedMs(),
+                firstSectionMs,
+                lastSectionMs,
+                bytes,
+            }));
+        });
+        request.on('error', (error) => resolve({
+            endpoint,
+            status: 0,
+            ok: false,
+            error: error.message,
+            ms: elapsedMs(),
+            firstSectionMs: null,
+            lastSectionMs: null,
+            bytes: 0,
+        }));
+        request.end(payload);
+    });
+}
+
+// RSS (KB) of the server and all its descendants, and how many of them are Python
+function sampleProcesses(rootPid) {
+    return new Promise((resolve) => {
+        execFile('ps', ['-A', '-o', 'pid=,ppid=,rss=,comm='], (error, stdout) => {
+            if (error) return resolve(null);
+            const rows = stdout.trim().split('\n').map((line) => {
+                const [pid, ppid, rss, ...comm] = line.trim().split(/\s+/);
+                return { pid: Number(pid), ppid: Number(ppid), rss: Number(rss), comm: comm.join(' ') };
+            });
+            const tree = new Set([rootPid]);
+            let grew = true;
+            while (grew) {
+                grew = false;
+                for (const row of rows) {
+                    if (!tree.has(row.pid) && tree.has(row.ppid)) {
+                        tree.add(row.pid);
+                        grew = true;
+                    }
+                }
+            }
+            const members = rows.filter((row) => tree.has(row.pid));
+            resolve({
+                rssKb: members.reduce((sum, row) => sum + row.rss, 0),
+                pythonProcesses: members.filter((row) => row.comm.startsWith('python')).length,
+            });
+        });
+    });
+}
+
+function percentile(sorted, q) {
+    if (sorted.length === 0) return null;
+    return sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))];
+}
+
+function summarize(results, seconds) {
+    const latencies = results.map((r) => r.ms).sort((a, b) => a - b);
+    const round = (value) => (value === null ? null : Math.round(value * 10) / 10);
+    return {
+        requests: results.length,
+        errors: results.filter((r) => !r.ok).length,
+        throughputPerSecond: round(results.length / seconds),
+        p50Ms: round(percentile(latencies, 0.5)),
+        p95Ms: round(percentile(latencies, 0.95)),
+        p99Ms: round(percentile(latencies, 0.99)),
+        maxMs: round(latencies[latencies.length - 1] ?? null),
+    };
+}
+
+async function waitForServer(baseUrl, timeoutMs = 15000) {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+        const ok = await new Promise((resolve) => {
+            http.get(new URL('/api/health', baseUrl), (response) => {
+                response.resume();
+                resolve(response.statusCode === 200);
+            }).on('error', () => resolve(false));
+        });
+        if (ok) return;
+        await new Promise((resolve) => setTimeout(resolve, 200));
+    }
+    throw new Error(`Server at ${baseUrl} did not become healthy`);
+}
+
+function startServer(port) {
+    // Offline by default: Python scripts replay recorded provider responses
+    const env = {
+        PROVIDER_REPLAY: 'replay',
+        NEWS_API_KEY: 'replay',
+        ...process.env,
+        PORT: String(port),
+    };
+    return spawn(process.execPath, [path.join(__dirname, 'server.js')], {
+        cwd: __dirname,
+        env,
+        stdio: ['ignore', 'ignore', 'inherit'],
+    });
+}
+
+function printComparison(current, previousPath) {
+    const previous = JSON.parse(fs.readFileSync(previousPath, 'utf8'));
+    console.log(`\nCompared with ${previousPath}:`);
+    for (const [name, summary] of Object.entries(current.summary)) {
+        const before = previous.summary[name];
+        if (!before) continue;
+        const delta = (key) => (before[key] && summary[key] !== null
+            ? `${((summary[key] / before[key] - 1) * 100).toFixed(1)}%` : 'n/a');
+        console.log(`  ${name.padEnd(16)} p50 ${delta('p50Ms').padStart(7)}  p95 ${delta('p95Ms').padStart(7)}  ` +
+                    `p99 ${delta('p99Ms').padStart(7)}  throughput ${delta('throughputPerSecond').padStart(7)}`);
+    }
+    for (const key of ['peakRssMb', 'peakPythonProcesses']) {
+        console.log(`  ${key.padEnd(16)} ${previous.resources[key]} -> ${current.resources[key]}`);
+    }
+}
+
+async function main() {
+    const options = parseArgs(process.argv);
+    const server = options.url ? null : startServer(options.port);
+    const baseUrl = options.url || `http://localhost:${options.port}`;
+
+    try {
+        await waitForServer(baseUrl);
+        const random = mulberry32(options.seed);
+        const pickTicker = zipfPicker(options.tickers, options.zipf, random);
+        const rootPid = server ? server.pid : null;
+
+        // Open loop: page views arrive on a Poisson schedule regardless of how slow responses are
+        const pending = [];
+        const samples = [];
+        const started = Date.now();
+        const endAt = started + options.duration * 1000;
+        const sampler = rootPid && setInterval(async () => {
+            const sample = await sampleProcesses(rootPid);
+            if (sample) samples.push({ t: Date.now() - started, ...sample });
+        }, options.sampleMs);
+
+        let nextAt = started;
+        while (nextAt < endAt) {
+            const wait = nextAt - Date.now();
+            if (wait > 0) await new Promise((resolve) => setTimeout(resolve, wait));
+            const ticker = pickTicker();
+            for (const call of PAGE_VIEWS[options.page]) {
+                pending.push(call.send(baseUrl, ticker).then((r) => ({ ...r, ticker })));
+            }
+            nextAt += (-Math.log(1 - random()) / options.rate) * 1000;
+        }
+
+        const results = await Promise.all(pending);
+        const elapsed = (Date.now() - started) / 1000;
+        if (sampler) clearInterval(sampler);
+
+        const summary = { overall: summarize(results, elapsed) };
+        for (const call of PAGE_VIEWS[options.page]) {
+            summary[call.endpoint] = summarize(results.filter((r) => r.endpoint === call.endpoint), elapsed);
+        }
+        // Streamed reports: latency until the page shows its first and its last section
+        for (const [name, key] of [['first section', 'firstSectionMs'], ['last section', 'lastSectionMs']]) {
+            const timed = results.filter((r) => r[key] !== undefined && r[key] !== null);
+            if (timed.length) summary[name] = summarize(timed.map((r) => ({ ...r, ms: r[key] })), elapsed);
+        }
+        const resources = {
+            peakRssMb: samples.length ? Math.round(Math.max(...samples.map((s) => s.rssKb)) / 102.4) / 10 : null,
+            peakPythonProcesses: samples.length ? Math.max(...samples.map((s) => s.pythonProcesses)) : null,
+        };
+
+        const report = {
+            settings: { ...options, baseUrl, replay: server ? 'replay' : 'external server' },
+            startedAt: new Date(started).toISOString(),
+            elapsedSeconds: elapsed,
+            summary,
+            resources,
+            samples,
+        };
+
+        console.log(`Page views (${options.page}): ${options.rate}/s for ${options.duration}s against ${baseUrl}`);
+        for (const [name, s] of Object.entries(summary)) {
+            console.log(`  ${name.padEnd(16)} n=${String(s.requests).padEnd(5)} err=${String(s.errors).padEnd(4)} ` +
+                        `${String(s.throughputPerSecond).padStart(6)}/s  p50=${s.p50Ms}ms p95=${s.p95Ms}ms p99=${s.p99Ms}ms`);
+        }
+        if (server) {
+            console.log(`  peak RSS ${resources.peakRssMb} MB, peak Python processes ${resources.peakPythonProcesses}`);
+        }
+
+        fs.mkdirSync(RESULTS_DIR, { recursive: true });
+        const output = options.output ||
+            path.join(RESULTS_DIR, `load-${new Date(started).toISOString().replace(/[:.]/g, '-')}.json`);
+        fs.writeFileSync(output, JSON.stringify(report, null, 2));
+        console.log(`\nResults saved to ${output}`);
+
+        if (options.compare) printComparison(report, options.compare);
+    } finally {
+        if (server) server.kill('SIGTERM');
+    }
+}
+
+main().catch((error) => {
+    console.error(error.message);
+    process.exit(1);
+});
@@ -0,0 +1,108 @@
+// Fixed-bucket latency histograms exposed in Prometheus text or JSON form
+
+const DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60];
+
+class Histogram {
+    constructor(name, help, labelNames, buckets = DEFAULT_BUCKETS) {
+        this.name = name;
+        this.help = help;
+        this.labelNames = labelNames;
+        this.buckets = buckets;
+        this.series = new Map();
+    }
+
+    observe(labels, seconds) {
+        const key = this.labelNames.map((name) => String(labels[name] ?? '')).join('\u0000');
+        let series = this.series.get(key);
+        if (!series) {
+            series = { labels, counts: new Array(this.buckets.length + 1).fill(0), sum: 0, count: 0 };
+            this.series.set(key, series);
+        }
+        // Non-cumulative per bucket; the last slot is +Inf
+        let index = this.buckets.findIndex((bound) => seconds <= bound);
+        if (index === -1) index = this.buckets.length;
+        series.counts[index] += 1;
+        series.sum += seconds;
+        series.count += 1;
+    }
+
+    // Linear interpolation inside the bucket holding the q-th observation
+    quantile(series, q) {
+        if (series.count === 0) return null;
+        const rank = q * series.count;
+        let seen = 0;
+        for (let i = 0; i < series.counts.length; i++) {
+            if (seen + series.counts[i] >= rank) {
+                const lower = i === 0 ? 0 : this.buckets[i - 1];
+                const upper = i < this.buckets.length ? this.buckets[i] : lower;
+                const within = series.counts[i] ? (rank - seen) / series.counts[i] : 0;
+                return lower + (upper - lower) * within;
+            }
+            seen += series.counts[i];
+        }
+        return this.buckets[this.buckets.length - 1];
+    }
+
+    renderPrometheus() {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+        for (const series of this.series.values()) {
+            const labelText = this.labelNames
+                .map((name) => `${name}="${String(series.labels[name] ?? '').replace(/\\/g, '\\\\').replace(/"/g, '\\"')}"`)
+                .join(',');
+            let cumulative = 0;
+            this.buckets.forEach((bound, i) => {
+                cumulative += series.counts[i];
+                lines.push(`${this.name}_bucket{${labelText},le="${bound}"} ${cumulative}`);
+            });
+            lines.push(`${this.name}_bucket{${labelText},le="+Inf"} ${series.count}`);
+            lines.push(`${this.name}_sum{${labelText}} ${series.sum}`);
+            lines.push(`${this.name}_count{${labelText}} ${series.count}`);
+        }
+        return lines.join('\n');
+    }
+
+    toJSON() {
+        return Array.from(this.series.values()).map((series) => ({
+            labels: series.labels,
+            count: series.count,
+            sumSeconds: series.sum,
+            p50Seconds: this.quantile(series, 0.5),
+            p95Seconds: this.quantile(series, 0.95),
+            p99Seconds: this.quantile(series, 0.99),
+        }));
+    }
+}
+
+const requestDuration = new Histogram(
+    'api_request_duration_seconds',
+    'Wall time of API requests, including the Python process',
+    ['route', 'status']
+);
+
+const spanDuration = new Histogram(
+    'report_span_duration_seconds',
+    'Duration of traced spans inside the Python report scripts',
+    ['script', 'span']
+);
+
+const histograms = [requestDuration, spanDuration];
+
+function recordTrace(trace) {
+    for (const span of trace.spans || []) {
+        spanDuration.observe({ script: trace.script, span: span.name }, span.durationMs / 1000);
+    }
+}
+
+function renderPrometheus() {
+    return histograms.map((histogram) => histogram.renderPrometheus()).join('\n') + '\n';
+}
+
+function renderJSON() {
+    const result = {};
+    for (const histogram of histograms) {
+        result[histogram.name] = histogram.toJSON();
+    }
+    return result;
+}
+
+module.exports = { Histogram, requestDuration, spanDuration, recordTrace, renderPrometheus, renderJSON };
@@ -0,0 +1,300 @@
+"""
+News Cache
+Quota-aware, on-disk cache for NewsAPI responses with request coalescing
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'news_cache.sqlite3')
+
+# NewsAPI free tier allows 100 requests per day (reset at UTC midnight)
+DEFAULT_DAILY_QUOTA = 100
+
+
+class QuotaExhaustedError(Exception):
+    """Raised when the daily budget is spent and nothing is cached"""
+
+
+class _Flight:
+    """One in-process upstream call; threads asking for the same key wait for its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class NewsCache:
+    """
+    TTL + LRU cache of NewsAPI responses, shared by every process on the box.
+
+    The server spawns a fresh Python process per request, so entries live in
+    SQLite rather than in memory. Concurrent identical requests share one
+    upstream call: threads wait on the leader's in-process flight and get its
+    payload or exception, other processes wait on a short lease row and pick
+    up the leader's result from the cache.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttlSeconds: int = 900,
+                 maxEntries: int = 500, dailyQuota: int = DEFAULT_DAILY_QUOTA,
+                 reserve: int = 10, leaseSeconds: int = 30):
+        """
+        Initialize the cache
+
+        Args:
+            path: SQLite file backing the cache
+            ttlSeconds: Age after which an entry is stale (default: 15 minutes)
+            maxEntries: Entries kept before least recently used are evicted
+            dailyQuota: Upstream calls allowed per UTC day
+            reserve: Calls held back; below this, stale entries are served
+            leaseSeconds: How long a follower waits on another process's call
+        """
+        self.path = path
+        self.ttlSeconds = ttlSeconds
+        self.maxEntries = maxEntries
+        self.dailyQuota = dailyQuota
+        self.reserve = reserve
+        self.leaseSeconds = leaseSeconds
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS news_cache (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS news_cache_lru ON news_cache (last_access);
+                CREATE TABLE IF NOT EXISTS news_quota (
+                    day TEXT PRIMARY KEY,
+                    used INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS news_inflight (
+                    key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    owner TEXT
+                );
+            """)
+            # Caches created before leases had owners
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(news_inflight)")]
+            if 'owner' not in columns:
+                conn.execute("ALTER TABLE news_inflight ADD COLUMN owner TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def makeKey(endpoint: str, query: str = '', **params) -> str:
+        """
+        Build a cache key from a normalized query and its request parameters
+
+        OR-terms are lower-cased, whitespace-collapsed and sorted so that
+        '"AAPL" OR "Apple Inc"' and '"apple inc" OR "aapl"' share an entry.
+        """
+        terms = [re.sub(r'\s+', ' ', t).strip().lower() for t in re.split(r'\s+OR\s+', query or '')]
+        normalizedQuery = ' OR '.join(sorted(t for t in terms if t))
+        normalizedParams = {k: v for k, v in sorted(params.items()) if v is not None}
+        return json.dumps([endpoint, normalizedQuery, normalizedParams], separators=(',', ':'))
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        """Get a cached payload and its age in seconds, fresh or stale"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM news_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            conn.execute("UPDATE news_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        return json.loads(row[0]), time.time() - row[1]
+
+    def put(self, key: str, payload: Dict):
+        """Store a payload and evict least recently used entries over the limit"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO news_cache (key, payload, fetched_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload), now, now)
+            )
+            conn.execute("""
+                DELETE FROM news_cache WHERE key IN (
+                    SELECT key FROM news_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.maxEntries,))
+
+    # ------------------------------------------------------------------
+    # Quota
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    def quotaUsed(self) -> int:
+        """Upstream calls made today (UTC)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT used FROM news_quota WHERE day = ?", (self._today(),)).fetchone()
+        return row[0] if row else 0
+
+    def quotaRemaining(self) -> int:
+        """Upstream calls left in today's budget"""
+        return max(self.dailyQuota - self.quotaUsed(), 0)
+
+    def _consumeQuota(self) -> bool:
+        """Reserve one upstream call; False if the budget is spent"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            today = self._today()
+            row = conn.execute("SELECT used FROM news_quota WHERE day = ?", (today,)).fetchone()
+            used = row[0] if row else 0
+            if used >= self.dailyQuota:
+                return False
+            conn.execute("INSERT OR REPLACE INTO news_quota (day, used) VALUES (?, ?)", (today, used + 1))
+            conn.execute("DELETE FROM news_quota WHERE day < ?", (today,))
+        return True
+
+    # ------------------------------------------------------------------
+    # Single-flight
+    # ------------------------------------------------------------------
+
+    def _acquireLease(self, key: str) -> Optional[str]:
+        """Take the cross-process lease for a key; its owner token, or None if another process holds it"""
+        now = time.time()
+        owner = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM news_inflight WHERE expires_at < ?", (now,))
+            try:
+                conn.execute("INSERT INTO news_inflight (key, expires_at, owner) VALUES (?, ?, ?)",
+                             (key, now + self.leaseSeconds, owner))
+                return owner
+            except sqlite3.IntegrityError:
+                return None
+
+    def _releaseLease(self, key: str, owner: str):
+        """Drop a lease, unless it has expired and been taken over by another process"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM news_inflight WHERE key = ? AND owner = ?", (key, owner))
+
+    def _waitForOtherProcess(self, key: str, since: float) -> Optional[Dict]:
+        """Poll until another process stores a result for key or its lease ends"""
+        deadline = time.time() + self.leaseSeconds
+        while time.time() < deadline:
+            time.sleep(0.2)
+            cached = self.get(key)
+            if cached and time.time() - cached[1] >= since:
+                return cached[0]
+            with self._connect() as conn:
+                held = conn.execute("SELECT 1 FROM news_inflight WHERE key = ?", (key,)).fetchone()
+            if not held:
+                break
+        return None
+
+    def fetch(self, key: str, loader: Callable[[], Dict]) -> Dict:
+        """
+        Get a response from the cache, calling loader at most once per key
+
+        Args:
+            key: Cache key from makeKey
+            loader: Performs the upstream API call and returns its payload
+
+        Returns:
+            Cached or freshly loaded payload
+
+        Raises:
+            QuotaExhaustedError: If the budget is spent and nothing is cached
+            TimeoutError: If another thread's or process's call for key did not finish in time
+            Exception: Whatever loader raised, also in threads that waited on it
+        """
+        cached = self.get(key)
+        if cached and cached[1] < self.ttlSeconds:
+            return cached[0]
+
+        # Running low on quota: a stale answer beats no answer
+        if cached and self.quotaRemaining() <= self.reserve:
+            return cached[0]
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+
+        if not leader:
+            # Error payloads are not cached, so followers take the leader's outcome as is
+            if flight.done.wait(self.leaseSeconds):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+            if cached:
+                return cached[0]
+            raise TimeoutError("Coalesced news request did not finish in time")
+
+        try:
+            flight.result = self._lead(key, loader, cached)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _lead(self, key: str, loader: Callable[[], Dict], cached: Optional[Tuple[Dict, float]]) -> Dict:
+        """Perform (or wait on another process's) upstream call for key"""
+        started = time.time()
+        owner = self._acquireLease(key)
+        attempts = 1
+        while owner is None:
+            result = self._waitForOtherProcess(key, started)
+            if result is not None:
+                return result
+            # The other call failed or timed out; its lease has ended or expired, so take over
+            owner = self._acquireLease(key)
+            attempts += 1
+            if owner is None and attempts >= 3:
+                if cached:
+                    return cached[0]
+                raise TimeoutError("News request still in flight in another process")
+
+        try:
+            if not self._consumeQuota():
+                if cached:
+                    return cached[0]
+                raise QuotaExhaustedError("Daily NewsAPI quota exhausted")
+
+            payload = loader()
+            if payload.get('status') == 'ok':
+                self.put(key, payload)
+            return payload
+        finally:
+            self._releaseLease(key, owner)
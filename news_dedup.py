@@ -0,0 +1,109 @@
+"""
+News Deduplication
+Collapses near-duplicate (syndicated) articles using MinHash + LSH banding
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 32 hash functions split into 8 bands of 4 rows: pairs with Jaccard
+# similarity around 0.6 or more almost always share a band bucket
+NUM_HASHES = 32
+NUM_BANDS = 8
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.6
+
+# Prime just above 2**32 so hashed shingles are permuted without collisions
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(1729)
+_A = _rng.integers(1, 2 ** 31, size=NUM_HASHES, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 31, size=NUM_HASHES, dtype=np.uint64)
+
+
+def _shingles(text: str) -> np.ndarray:
+    """Hash word n-grams of normalized text into a uint64 array"""
+    words = re.findall(r'[a-z0-9]+', text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        grams = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    else:
+        grams = set(words)
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhashSignature(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of a text, or None if it has no words"""
+    shingles = _shingles(text)
+    if not len(shingles):
+        return None
+    return ((_A[:, None] * shingles[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def _articleText(article: Dict) -> str:
+    title = article.get('title') or ''
+    description = article.get('description') or ''
+    if description == 'N/A':
+        description = ''
+    return f"{title} {description}"
+
+
+def collapseDuplicates(articles: List[Dict], threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Group near-duplicate articles and keep one representative per group
+
+    Each article is signed once and dropped into one bucket per LSH band,
+    so the pass is linear in the number of articles. Candidate pairs that
+    share a bucket are confirmed against the estimated Jaccard similarity.
+
+    Args:
+        articles: Formatted articles, in the order they should be ranked
+        threshold: Minimum estimated Jaccard similarity to merge two articles
+
+    Returns:
+        First article of each group, in input order, with an
+        'alternateSources' list of the articles it absorbed
+    """
+    rowsPerBand = NUM_HASHES // NUM_BANDS
+    signatures = [minhashSignature(_articleText(a)) for a in articles]
+
+    parent = list(range(len(articles)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: Dict[tuple, int] = {}
+    for i, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for band in range(NUM_BANDS):
+            key = (band, signature[band * rowsPerBand:(band + 1) * rowsPerBand].tobytes())
+            j = buckets.setdefault(key, i)
+            if j == i:
+                continue
+
+            rootI, rootJ = find(i), find(j)
+            if rootI != rootJ and np.mean(signatures[j] == signature) >= threshold:
+                # Keep the earliest article as the root so it stays the representative
+                parent[max(rootI, rootJ)] = min(rootI, rootJ)
+
+    collapsed: List[Dict] = []
+    representatives: Dict[int, Dict] = {}
+    for i, article in enumerate(articles):
+        root = find(i)
+        if root == i:
+            representative = dict(article, alternateSources=[])
+            representatives[i] = representative
+            collapsed.append(representative)
+        else:
+            representatives[root]['alternateSources'].append({
+                'source': article.get('source'),
+                'url': article.get('url'),
+                'publishedAt': article.get('publishedAt')
+            })
+
+    return collapsed
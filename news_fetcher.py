@@ -3,25 +3,96 @@ News Fetcher
 Uses NewsAPI to fetch financial news for stocks
 """
 
+import re
+import time
 from newsapi import NewsApiClient
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
+
+from news_cache import NewsCache
+from news_dedup import collapseDuplicates
+from news_index import NewsIndex
+from provider_http import getSession
+from tracing import traced
+
+# NewsAPI limits: 100 articles per page, 500 characters per query
+NEWSAPI_MAX_PAGE_SIZE = 100
+NEWSAPI_MAX_QUERY_LENGTH = 500
+
+# Syndicated copies are collapsed, so ask for extra articles to fill the slots
+DEDUPE_OVERFETCH = 3
+
+# Corporate suffixes dropped when matching company names in article text
+COMPANY_SUFFIXES = re.compile(
+    r'[,.]?\s+(inc|incorporated|corp|corporation|co|company|ltd|limited|plc|holdings|group|sa|nv|ag)\.?$',
+    re.IGNORECASE
+)
 
 
 class NewsFetcher:
     """Fetch financial news using NewsAPI"""
 
-    def __init__(self, apiKey: str):
+    def __init__(self, apiKey: str, cache: Optional[NewsCache] = None, useCache: bool = True,
+                 index: Optional[NewsIndex] = None, useIndex: bool = True):
         """
         Initialize NewsAPI client
 
         Args:
             apiKey: Your NewsAPI key (get free key at https://newsapi.org/)
+            cache: Response cache shared across requests (default: on-disk NewsCache)
+            useCache: Set to False to always call NewsAPI directly
+            index: Full-text index fetched articles are kept in (default: on-disk NewsIndex)
+            useIndex: Set to False to discard articles after formatting
         """
-        self.newsapi = NewsApiClient(api_key=apiKey)
+        # Shared session: pooling, rate limits and retries live in provider_http
+        self.newsapi = NewsApiClient(api_key=apiKey, session=getSession())
         self.apiKey = apiKey
+        self.cache = (cache or NewsCache()) if useCache else None
+        self.index = (index or NewsIndex()) if useIndex else None
 
-    def getStockNews(self, ticker: str, companyName: str = None, numArticles: int = 10) -> List[Dict]:
+    def _indexArticles(self, articles: List[Dict], tickers: List[str] = ()):
+        """Keep fetched articles in the local index; indexing never fails a fetch"""
+        if self.index is None:
+            return
+        try:
+            self.index.addArticles(articles, tickers)
+            for ticker in tickers:
+                self.index.markFetched(ticker)
+        except Exception as e:
+            print(f"Error indexing news: {e}")
+
+    def _cachedCall(self, endpoint: str, query: str, call, **params) -> Dict:
+        """Run a NewsAPI call through the cache, if one is configured"""
+        if self.cache is None:
+            return call(**params)
+
+        # The query is normalized by makeKey, so keep the raw 'q' out of the key
+        keyParams = {k: v for k, v in params.items() if k != 'q'}
+        key = NewsCache.makeKey(endpoint, query, **keyParams)
+        return self.cache.fetch(key, lambda: call(**params))
+
+    @staticmethod
+    def _formatArticle(article: Dict) -> Dict:
+        """Reduce a raw NewsAPI article to the fields we display"""
+        return {
+            'title': article.get('title', 'N/A'),
+            'description': article.get('description', 'N/A'),
+            'source': article.get('source', {}).get('name', 'Unknown'),
+            'author': article.get('author', 'Unknown'),
+            'publishedAt': article.get('publishedAt', 'N/A'),
+            'url': article.get('url', '#')
+        }
+
+    @staticmethod
+    def _pageSize(numArticles: int, dedupe: bool) -> int:
+        """Articles to request so that numArticles remain after deduplication"""
+        if not dedupe:
+            return numArticles
+        return min(numArticles * DEDUPE_OVERFETCH, NEWSAPI_MAX_PAGE_SIZE)
+
+    @traced("news.getStockNews")
+    def getStockNews(self, ticker: str, companyName: str = None, numArticles: int = 10,
+                     dedupe: bool = True) -> List[Dict]:
         """
         Get news articles for a specific stock
 
@@ -29,6 +100,7 @@ class NewsFetcher:
             ticker: Stock ticker symbol
             companyName: Optional company name for better search results
             numArticles: Number of articles to fetch (default: 10)
+            dedupe: Collapse syndicated copies of the same story (default: True)
 
         Returns:
             List of news articles
@@ -44,30 +116,24 @@ class NewsFetcher:
 
         try:
             # Search for everything mentioning the stock
-            allArticles = self.newsapi.get_everything(
+            allArticles = self._cachedCall(
+                'everything', query, self.newsapi.get_everything,
                 q=query,
                 from_param=sevenDaysAgo,
                 language='en',
                 sort_by='publishedAt',
-                page_size=numArticles
+                page_size=self._pageSize(numArticles, dedupe)
             )
 
             if allArticles['status'] == 'ok':
                 articles = allArticles['articles']
 
                 # Format articles
-                formattedArticles = []
-                for article in articles:
-                    formattedArticles.append({
-                        'title': article.get('title', 'N/A'),
-                        'description': article.get('description', 'N/A'),
-                        'source': article.get('source', {}).get('name', 'Unknown'),
-                        'author': article.get('author', 'Unknown'),
-                        'publishedAt': article.get('publishedAt', 'N/A'),
-                        'url': article.get('url', '#')
-                    })
-
-                return formattedArticles
+                formattedArticles = [self._formatArticle(article) for article in articles]
+                self._indexArticles(formattedArticles, [ticker.upper()])
+                if dedupe:
+                    formattedArticles = collapseDuplicates(formattedArticles)
+                return formattedArticles[:numArticles]
             else:
                 return []
 
@@ -75,40 +141,147 @@ class NewsFetcher:
             print(f"Error fetching news: {e}")
             return []
 
-    def getTopFinancialNews(self, numArticles: int = 10) -> List[Dict]:
+    @traced("news.getWatchlistNews")
+    def getWatchlistNews(self, watchlist: Dict[str, Optional[str]], articlesPerTicker: int = 5,
+                         maxPages: int = 3) -> Dict[str, List[Dict]]:
+        """
+        Get news for many stocks with as few NewsAPI calls as possible
+
+        Tickers and company names are packed into OR queries that fit the
+        NewsAPI query length limit, each query is paged through, and every
+        article is assigned to the tickers whose symbol or name it mentions.
+
+        Args:
+            watchlist: Mapping of ticker -> company name (or None)
+            articlesPerTicker: Articles to keep per ticker (default: 5)
+            maxPages: Maximum pages of 100 articles per packed query
+
+        Returns:
+            Mapping of ticker -> list of news articles, newest first
+        """
+        watchlist = {t.strip().upper(): (n or None) for t, n in watchlist.items() if t.strip()}
+        results = {ticker: [] for ticker in watchlist}
+        matchers = {ticker: _buildMatcher(ticker, name) for ticker, name in watchlist.items()}
+        sevenDaysAgo = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+
+        for batch, query in _packQueries(watchlist):
+            seenUrls = set()
+            fetched = False
+            for page in range(1, maxPages + 1):
+                try:
+                    response = self._cachedCall(
+                        'everything', query, self.newsapi.get_everything,
+                        q=query,
+                        from_param=sevenDaysAgo,
+                        language='en',
+                        sort_by='publishedAt',
+                        page_size=NEWSAPI_MAX_PAGE_SIZE,
+                        page=page
+                    )
+                except Exception as e:
+                    print(f"Error fetching watchlist news: {e}")
+                    break
+
+                if response.get('status') != 'ok' or not response.get('articles'):
+                    break
+                fetched = True
+
+                # Only this page's matches are indexed, so indexing stays linear in pages fetched
+                newArticles = {ticker: [] for ticker in batch}
+                for article in response['articles']:
+                    url = article.get('url')
+                    if url in seenUrls:
+                        continue
+                    seenUrls.add(url)
+
+                    text = f"{article.get('title') or ''} {article.get('description') or ''}"
+                    formatted = None
+                    for ticker in batch:
+                        if len(results[ticker]) < articlesPerTicker and matchers[ticker](text):
+                            formatted = formatted or self._formatArticle(article)
+                            results[ticker].append(formatted)
+                            newArticles[ticker].append(formatted)
+
+                for ticker, articles in newArticles.items():
+                    if articles:
+                        self._indexArticles(articles, [ticker])
+
+                # Stop paging once every ticker in the batch is full
+                if all(len(results[t]) >= articlesPerTicker for t in batch):
+                    break
+                if page * NEWSAPI_MAX_PAGE_SIZE >= response.get('totalResults', 0):
+                    break
+
+            if fetched:
+                self._indexArticles([], batch)
+
+        return results
+
+    @traced("news.searchNews")
+    def searchNews(self, keywords: Optional[str] = None, ticker: Optional[str] = None,
+                   companyName: Optional[str] = None, days: int = 7, numArticles: int = 10,
+                   maxAgeMinutes: int = 60, dedupe: bool = True) -> List[Dict]:
+        """
+        Search news from the local index, calling NewsAPI only to fill gaps
+
+        A ticker whose articles were last fetched more than maxAgeMinutes
+        ago is refreshed first; keyword-only searches never call the API.
+
+        Args:
+            keywords: Words that must all appear in the title or description
+            ticker: Optional ticker to restrict (and refresh) results for
+            companyName: Optional company name used when refreshing the ticker
+            days: Only articles published in the last N days
+            numArticles: Maximum articles to return
+            maxAgeMinutes: How stale a ticker's index entries may be
+            dedupe: Collapse syndicated copies of the same story (default: True)
+
+        Returns:
+            List of news articles, newest first
+        """
+        if self.index is None:
+            return self.getStockNews(ticker, companyName, numArticles, dedupe) if ticker else []
+
+        if ticker:
+            lastFetched = self.index.lastFetched(ticker)
+            if lastFetched is None or time.time() - lastFetched > maxAgeMinutes * 60:
+                self.getStockNews(ticker, companyName, NEWSAPI_MAX_PAGE_SIZE, dedupe=False)
+
+        articles = self.index.search(keywords, ticker, days, self._pageSize(numArticles, dedupe))
+        if dedupe:
+            articles = collapseDuplicates(articles)
+        return articles[:numArticles]
+
+    @traced("news.getTopFinancialNews")
+    def getTopFinancialNews(self, numArticles: int = 10, dedupe: bool = True) -> List[Dict]:
         """
         Get top financial news headlines
 
         Args:
             numArticles: Number of articles to fetch
+            dedupe: Collapse syndicated copies of the same story (default: True)
 
         Returns:
             List of top financial news articles
         """
         try:
             # Get top business headlines
-            topHeadlines = self.newsapi.get_top_headlines(
+            topHeadlines = self._cachedCall(
+                'top-headlines', '', self.newsapi.get_top_headlines,
                 category='business',
                 language='en',
                 country='us',
-                page_size=numArticles
+                page_size=self._pageSize(numArticles, dedupe)
             )
 
             if topHeadlines['status'] == 'ok':
                 articles = topHeadlines['articles']
 
-                formattedArticles = []
-                for article in articles:
-                    formattedArticles.append({
-                        'title': article.get('title', 'N/A'),
-                        'description': article.get('description', 'N/A'),
-                        'source': article.get('source', {}).get('name', 'Unknown'),
-                        'author': article.get('author', 'Unknown'),
-                        'publishedAt': article.get('publishedAt', 'N/A'),
-                        'url': article.get('url', '#')
-                    })
-
-                return formattedArticles
+                formattedArticles = [self._formatArticle(article) for article in articles]
+                self._indexArticles(formattedArticles)
+                if dedupe:
+                    formattedArticles = collapseDuplicates(formattedArticles)
+                return formattedArticles[:numArticles]
             else:
                 return []
 
@@ -141,6 +314,52 @@ class NewsFetcher:
         print(f"{'='*80}\n")
 
 
+def _queryTerms(ticker: str, companyName: Optional[str]) -> List[str]:
+    """Quoted search terms for one ticker, as used by getStockNews"""
+    terms = [f'"{ticker}"']
+    if companyName:
+        terms.append(f'"{companyName}"')
+    return terms
+
+
+def _packQueries(watchlist: Dict[str, Optional[str]]) -> List[Tuple[List[str], str]]:
+    """Greedily pack watchlist terms into OR queries under the length limit"""
+    batches = []
+    batch, terms = [], []
+
+    for ticker, companyName in watchlist.items():
+        tickerTerms = _queryTerms(ticker, companyName)
+        candidate = " OR ".join(terms + tickerTerms)
+        if terms and len(candidate) > NEWSAPI_MAX_QUERY_LENGTH:
+            batches.append((batch, " OR ".join(terms)))
+            batch, terms = [], []
+        batch.append(ticker)
+        terms.extend(tickerTerms)
+
+    if batch:
+        batches.append((batch, " OR ".join(terms)))
+
+    return batches
+
+
+def _buildMatcher(ticker: str, companyName: Optional[str]) -> Callable[[str], bool]:
+    """
+    Build a predicate telling whether article text mentions a stock
+
+    Tickers match case-sensitively as whole words (or as $TICKER) so short
+    symbols like ON or ALL do not match ordinary words; company names match
+    case-insensitively with corporate suffixes dropped.
+    """
+    patterns = [rf'(?<![A-Za-z0-9])\$?{re.escape(ticker)}(?![A-Za-z0-9])']
+    if companyName:
+        name = COMPANY_SUFFIXES.sub('', companyName.strip())
+        if name:
+            patterns.append(rf'(?i:\b{re.escape(name)}\b)')
+
+    regex = re.compile('|'.join(patterns))
+    return lambda text: regex.search(text) is not None
+
+
 def main():
     """Test the news fetcher"""
     # NOTE: You need to get your own API key from https://newsapi.org/
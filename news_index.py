@@ -0,0 +1,189 @@
+"""
+News Index
+Local SQLite FTS5 full-text index of every article NewsFetcher retrieves
+"""
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'news_index.sqlite3')
+
+
+class NewsIndex:
+    """
+    Full-text index of fetched articles, deduplicated by URL.
+
+    Articles are stored once in `articles`; `article_tickers` links them to
+    every ticker they were fetched for, and `articles_fts` indexes title and
+    description for keyword search. `ticker_fetches` remembers when each
+    ticker was last pulled from the API so callers only refetch gaps.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """
+        Open (and create if needed) the index
+
+        Args:
+            path: SQLite file backing the index
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS articles (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    description TEXT,
+                    source TEXT,
+                    author TEXT,
+                    published_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+                CREATE TABLE IF NOT EXISTS article_tickers (
+                    article_id INTEGER NOT NULL REFERENCES articles (id),
+                    ticker TEXT NOT NULL,
+                    PRIMARY KEY (ticker, article_id)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+                    title, description, content='articles', content_rowid='id',
+                    tokenize='porter unicode61'
+                );
+                CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                    INSERT INTO articles_fts (rowid, title, description)
+                    VALUES (new.id, new.title, new.description);
+                END;
+                CREATE TABLE IF NOT EXISTS ticker_fetches (
+                    ticker TEXT PRIMARY KEY,
+                    fetched_at REAL NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def addArticles(self, articles: Iterable[Dict], tickers: Iterable[str] = ()) -> int:
+        """
+        Add formatted articles to the index, skipping URLs already stored
+
+        Args:
+            articles: Articles as returned by NewsFetcher
+            tickers: Tickers these articles were fetched for
+
+        Returns:
+            Number of new articles indexed
+        """
+        tickers = [t.upper() for t in tickers]
+        added = 0
+
+        with self._connect() as conn:
+            for article in articles:
+                url = article.get('url')
+                if not url or url == '#':
+                    continue
+
+                cursor = conn.execute("""
+                    INSERT OR IGNORE INTO articles (url, title, description, source, author, published_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (url, article.get('title'), article.get('description'), article.get('source'),
+                      article.get('author'), article.get('publishedAt')))
+                added += cursor.rowcount
+
+                if tickers:
+                    articleId = conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()[0]
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO article_tickers (article_id, ticker) VALUES (?, ?)",
+                        [(articleId, t) for t in tickers]
+                    )
+
+        return added
+
+    def markFetched(self, ticker: str):
+        """Record that a ticker was just refreshed from the API"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO ticker_fetches (ticker, fetched_at) VALUES (?, ?)",
+                         (ticker.upper(), time.time()))
+
+    def lastFetched(self, ticker: str) -> Optional[float]:
+        """Epoch seconds of the last API refresh for a ticker, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT fetched_at FROM ticker_fetches WHERE ticker = ?",
+                               (ticker.upper(),)).fetchone()
+        return row[0] if row else None
+
+    def search(self, keywords: Optional[str] = None, ticker: Optional[str] = None,
+               days: int = 7, limit: int = 20) -> List[Dict]:
+        """
+        Search indexed articles by keyword and/or ticker
+
+        Args:
+            keywords: Words that must all appear in the title or description
+            ticker: Only articles fetched for this ticker
+            days: Only articles published in the last N days
+            limit: Maximum articles to return
+
+        Returns:
+            List of articles, newest first
+        """
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        clauses = ["a.published_at >= ?"]
+        params: List = [since]
+        joins = ""
+
+        ftsQuery = _ftsQuery(keywords)
+        if ftsQuery:
+            joins += " JOIN articles_fts f ON f.rowid = a.id"
+            clauses.append("articles_fts MATCH ?")
+            params.append(ftsQuery)
+
+        if ticker:
+            joins += " JOIN article_tickers t ON t.article_id = a.id"
+            clauses.append("t.ticker = ?")
+            params.append(ticker.upper())
+
+        params.append(limit)
+        sql = f"""
+            SELECT a.title, a.description, a.source, a.author, a.published_at, a.url
+            FROM articles a{joins}
+            WHERE {' AND '.join(clauses)}
+            ORDER BY a.published_at DESC
+            LIMIT ?
+        """
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [{
+            'title': title,
+            'description': description,
+            'source': source,
+            'author': author,
+            'publishedAt': publishedAt,
+            'url': url
+        } for title, description, source, author, publishedAt, url in rows]
+
+
+def _ftsQuery(keywords: Optional[str]) -> Optional[str]:
+    """Turn free text into an FTS5 query that ANDs each word (prefix match on the last)"""
+    words = re.findall(r'\w+', keywords or '')
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
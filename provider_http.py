@@ -0,0 +1,245 @@
+"""
+Provider HTTP
+Shared HTTP client for the SEC, Finnhub and NewsAPI fetchers
+"""
+
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from tracing import span
+
+# Status codes worth retrying: rate limited or a transient server failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {'GET', 'HEAD'}
+
+# Set to 1 to print per-host metrics as JSON on stderr when the process exits
+METRICS_ENV_VAR = 'PROVIDER_HTTP_METRICS'
+
+LATENCY_SAMPLES = 1024
+
+
+@dataclass(frozen=True)
+class HostPolicy:
+    """I/O settings for one provider host"""
+    requestsPerSecond: float = 5.0
+    burst: int = 5
+    maxConnections: int = 10
+    connectTimeout: float = 5.0
+    readTimeout: float = 30.0
+    maxRetries: int = 3
+    backoffBase: float = 0.5
+    backoffMax: float = 20.0
+
+
+DEFAULT_POLICY = HostPolicy()
+
+HOST_POLICIES: Dict[str, HostPolicy] = {
+    # SEC fair access policy: no more than 10 requests per second
+    'data.sec.gov': HostPolicy(requestsPerSecond=10, burst=10, readTimeout=60.0),
+    'www.sec.gov': HostPolicy(requestsPerSecond=10, burst=10),
+    # Finnhub free tier: 60 calls per minute
+    'finnhub.io': HostPolicy(requestsPerSecond=1.0, burst=10),
+    # NewsAPI counts a daily budget (see news_cache); only smooth bursts here
+    'newsapi.org': HostPolicy(requestsPerSecond=5.0, burst=5),
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: short bursts allowed, average rate enforced"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self) -> float:
+        """Take a token, sleeping until one is available. Returns the time waited"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: each waiter reserves its own future slot
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostMetrics:
+    """Request counters and a window of recent latencies for one host"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.wireBytes = 0
+        self.throttledSeconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, latency: float, response: Optional[requests.Response], failed: bool, countBytes: bool = True):
+        size = wireSize = 0
+        if response is not None and countBytes:
+            size = len(response.content)
+            # Content-Length is the compressed size when the body was encoded
+            wireSize = int(response.headers.get('Content-Length') or size)
+        with self.lock:
+            self.requests += 1
+            self.latencies.append(latency)
+            if failed:
+                self.errors += 1
+            self.bytes += size
+            self.wireBytes += wireSize
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            result = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'bytes': self.bytes,
+                'wireBytes': self.wireBytes,
+                'throttledSeconds': round(self.throttledSeconds, 3),
+            }
+        for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            result[f'{name}Ms'] = round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) \
+                if latencies else None
+        return result
+
+
+class ProviderSession(requests.Session):
+    """
+    requests.Session with per-host pools, rate limits, timeouts and retries
+
+    Drop-in for requests.get / requests.Session (NewsApiClient accepts it as
+    its session), so fetchers only change where they get their session from.
+    Each host gets its own connection pool and token bucket from
+    HOST_POLICIES; failed idempotent requests are retried with full-jitter
+    exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, HostPolicy]] = None):
+        super().__init__()
+        self.policies = dict(HOST_POLICIES if policies is None else policies)
+        self.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, TokenBucket] = {}
+        self._metrics: Dict[str, HostMetrics] = {}
+
+    def configureHost(self, host: str, **settings):
+        """Override policy fields for a host (e.g. requestsPerSecond=2)"""
+        with self._lock:
+            self.policies[host] = replace(self.policies.get(host, DEFAULT_POLICY), **settings)
+            self._limiters.pop(host, None)
+            for prefix in ('https://', 'http://'):
+                self.adapters.pop(f"{prefix}{host}/", None)
+
+    def _hostState(self, host: str):
+        """Policy, limiter and metrics for a host, mounting its pool on first use"""
+        with self._lock:
+            policy = self.policies.get(host, DEFAULT_POLICY)
+            if host not in self._limiters:
+                self._limiters[host] = TokenBucket(policy.requestsPerSecond, policy.burst)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=policy.maxConnections)
+                self.mount(f"https://{host}/", adapter)
+                self.mount(f"http://{host}/", adapter)
+            metrics = self._metrics.setdefault(host, HostMetrics())
+            return policy, self._limiters[host], metrics
+
+    @staticmethod
+    def _retryAfter(response: requests.Response) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).hostname or ''
+        policy, limiter, metrics = self._hostState(host)
+        kwargs.setdefault('timeout', (policy.connectTimeout, policy.readTimeout))
+        retryable = method.upper() in RETRY_METHODS
+
+        attempt = 0
+        while True:
+            waited = limiter.wait()
+            if waited:
+                with metrics.lock:
+                    metrics.throttledSeconds += waited
+
+            started = time.perf_counter()
+            response = None
+            try:
+                with span('http.request', host=host, attempt=attempt):
+                    response = super().request(method, url, *args, **kwargs)
+                error = None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            failed = error is not None or response.status_code in RETRY_STATUSES
+            # Streamed bodies are left unread for the caller
+            metrics.record(time.perf_counter() - started, response, failed, countBytes=not kwargs.get('stream'))
+
+            if not failed or not retryable or attempt >= policy.maxRetries:
+                if error is not None:
+                    raise error
+                return response
+
+            # Full jitter: sleep a random time up to the exponential cap
+            delay = random.uniform(0, min(policy.backoffMax, policy.backoffBase * 2 ** attempt))
+            if response is not None:
+                delay = max(delay, min(policy.backoffMax, self._retryAfter(response) or 0.0))
+                response.close()
+            attempt += 1
+            with metrics.lock:
+                metrics.retries += 1
+            time.sleep(delay)
+
+    def metricsSnapshot(self) -> Dict[str, Dict]:
+        """Per-host latency percentiles, byte counts and retry counts"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        return {host: hostMetrics.snapshot() for host, hostMetrics in metrics.items()}
+
+
+_sharedSession: Optional[ProviderSession] = None
+_sharedLock = threading.Lock()
+
+
+def getSession() -> ProviderSession:
+    """The process-wide ProviderSession every fetcher shares"""
+    global _sharedSession
+    with _sharedLock:
+        if _sharedSession is None:
+            _sharedSession = ProviderSession()
+            if os.getenv(METRICS_ENV_VAR) == '1':
+                atexit.register(_printMetrics)
+        return _sharedSession
+
+
+def _printMetrics():
+    if _sharedSession is not None:
+        print(json.dumps({'providerHttp': _sharedSession.metricsSnapshot()}), file=sys.stderr)
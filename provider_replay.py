@@ -0,0 +1,333 @@
+"""
+Provider Replay
+Record provider HTTP responses to disk and replay them offline
+
+Hooks the transports underneath every provider client: requests (SEC,
+Finnhub, NewsAPI, X via tweepy, and yfinance with curl_cffi disabled) and
+httpx (Gemini). In replay mode no network is used; each response can be
+delayed and a share of them replaced by 503s to exercise retry paths.
+
+Usage:
+    PROVIDER_REPLAY=record python provider_replay.py run main.py AAPL
+    PROVIDER_REPLAY=replay PROVIDER_REPLAY_LATENCY_MS=50-200 \\
+        PROVIDER_REPLAY_ERROR_RATE=0.05 python provider_replay.py run main.py AAPL
+"""
+
+import atexit
+import base64
+import hashlib
+import json
+import os
+import random
+import runpy
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+MODE_ENV_VAR = 'PROVIDER_REPLAY'                  # 'record' or 'replay'
+DIR_ENV_VAR = 'PROVIDER_REPLAY_DIR'
+LATENCY_ENV_VAR = 'PROVIDER_REPLAY_LATENCY_MS'    # '120' or a '50-200' range
+ERROR_RATE_ENV_VAR = 'PROVIDER_REPLAY_ERROR_RATE'
+SEED_ENV_VAR = 'PROVIDER_REPLAY_SEED'
+
+# Prefix of the stderr line with this process's record/replay counts
+STATS_MARKER = '__REPLAY__ '
+
+DEFAULT_CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'provider_replay')
+
+# Query parameters that carry credentials: never written to disk or used in keys
+SECRET_PARAMS = {'token', 'apikey', 'api_key', 'key', 'access_token'}
+
+# Parameters derived from the current time; ignored when matching a recording
+VOLATILE_PARAMS = {'from', 'to', 'from_param', 'start_time', 'end_time', 'period1', 'period2', 'crumb', '_'}
+
+# Response headers that describe the wire encoding rather than the body we store
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode when a request has no recording"""
+
+
+def requestKey(method: str, url: str, body: Optional[bytes] = None) -> str:
+    """Stable key for a request: method, host, path, query (minus secrets and clock params) and body"""
+    parts = urlsplit(url)
+    params = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                    if k.lower() not in SECRET_PARAMS and k.lower() not in VOLATILE_PARAMS)
+    digest = hashlib.sha256()
+    digest.update(f"{method.upper()} {parts.hostname}{parts.path}?{urlencode(params)}".encode())
+    if body:
+        digest.update(b'\0')
+        digest.update(body if isinstance(body, bytes) else str(body).encode())
+    return digest.hexdigest()
+
+
+def _redactUrl(url: str) -> str:
+    parts = urlsplit(url)
+    params = [(k, '***' if k.lower() in SECRET_PARAMS else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return parts._replace(query=urlencode(params)).geturl()
+
+
+class Cassette:
+    """
+    On-disk recordings, one JSON file per request key
+
+    A key can hold several responses (e.g. a polled endpoint); replay hands
+    them out in recorded order and then keeps returning the last one.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CASSETTE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, int] = {}
+        self._recorded = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def record(self, key: str, method: str, url: str, status: int, headers: Dict[str, str], content: bytes):
+        try:
+            text = content.decode('utf-8')
+            body = {'text': text}
+        except UnicodeDecodeError:
+            body = {'base64': base64.b64encode(content).decode('ascii')}
+
+        response = {'status': status, 'headers': {k: v for k, v in headers.items()
+                                                  if k.lower() not in DROPPED_HEADERS}, **body}
+        path = self._path(key)
+        with self._lock:
+            # Each process starts its own take of a key rather than appending forever
+            entry = {'method': method, 'url': _redactUrl(url), 'responses': []}
+            if key in self._recorded and os.path.exists(path):
+                with open(path, encoding='utf-8') as file:
+                    entry = json.load(file)
+            self._recorded.add(key)
+            entry['responses'].append(response)
+
+            tmpPath = f"{path}.{os.getpid()}.tmp"
+            with open(tmpPath, 'w', encoding='utf-8') as file:
+                json.dump(entry, file)
+            os.replace(tmpPath, path)
+
+    def replay(self, key: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        try:
+            with open(self._path(key), encoding='utf-8') as file:
+                responses = json.load(file)['responses']
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+        response = responses[min(cursor, len(responses) - 1)]
+        content = response['text'].encode('utf-8') if 'text' in response else base64.b64decode(response['base64'])
+        return response['status'], response['headers'], content
+
+
+class ReplayController:
+    """Decides, per request, whether to record, replay, delay or fail it"""
+
+    def __init__(self, mode: str, cassette: Cassette, latencyMs: Tuple[float, float] = (0.0, 0.0),
+                 errorRate: float = 0.0, seed: int = 0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown replay mode: {mode}")
+        self.mode = mode
+        self.cassette = cassette
+        self.latencyMs = latencyMs
+        self.errorRate = errorRate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'recorded': 0, 'replayed': 0, 'misses': 0, 'injectedErrors': 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def serve(self, method: str, url: str, body: Optional[bytes]):
+        """(status, headers, content) from the cassette, after injected latency or errors"""
+        with self._lock:
+            delay = self._random.uniform(*self.latencyMs) / 1000
+            failing = self._random.random() < self.errorRate
+        if delay:
+            time.sleep(delay)
+        if failing:
+            self._count('injectedErrors')
+            return 503, {'Retry-After': '0', 'Content-Type': 'text/plain'}, b'injected failure'
+
+        recorded = self.cassette.replay(requestKey(method, url, body))
+        if recorded is None:
+            self._count('misses')
+            raise ReplayMissError(f"No recording for {method} {_redactUrl(url)}")
+        self._count('replayed')
+        return recorded
+
+    def save(self, method: str, url: str, body: Optional[bytes], status: int, headers, content: bytes):
+        self.cassette.record(requestKey(method, url, body), method, url, status, dict(headers), content)
+        self._count('recorded')
+
+
+_controller: Optional[ReplayController] = None
+
+
+def _installRequests(controller: ReplayController):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from requests.structures import CaseInsensitiveDict
+
+    class RequestsReplayMiss(ReplayMissError, requests.RequestException):
+        pass
+
+    originalSend = HTTPAdapter.send
+
+    def send(adapter, request, **kwargs):
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        if controller.mode == 'record':
+            response = originalSend(adapter, request, **kwargs)
+            controller.save(request.method, request.url, body, response.status_code,
+                            response.headers, response.content)
+            return response
+
+        try:
+            status, headers, content = controller.serve(request.method, request.url, body)
+        except ReplayMissError as e:
+            # Not a ConnectionError: a missing recording is deterministic, so retrying is pointless
+            raise RequestsReplayMiss(str(e), request=request)
+
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.reason = 'OK' if status < 400 else 'Replayed Error'
+        response.connection = adapter
+        return response
+
+    HTTPAdapter.send = send
+
+
+def _installHttpx(controller: ReplayController):
+    try:
+        import httpx
+    except ImportError:
+        return
+
+    originalHandle = httpx.HTTPTransport.handle_request
+    originalHandleAsync = httpx.AsyncHTTPTransport.handle_async_request
+
+    def handle(transport, request):
+        body = request.read()
+        if controller.mode == 'record':
+            response = originalHandle(transport, request)
+            content = response.read()
+            controller.save(request.method, str(request.url), body, response.status_code, response.headers, content)
+            return httpx.Response(response.status_code, headers=_plainHeaders(response.headers),
+                                  content=content, request=request)
+        try:
+            status, headers, content = controller.serve(request.method, str(request.url), body)
+        except ReplayMissError as e:
+            raise httpx.ConnectError(str(e), request=request)
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    async def handleAsync(transport, request):
+        body = await request.aread()
+        if controller.mode == 'record':
+            response = await originalHandleAsync(transport, request)
+            content = await response.aread()
+            controller.save(request.method, str(request.url), body, response.status_code, response.headers, content)
+            return httpx.Response(response.status_code, headers=_plainHeaders(response.headers),
+                                  content=content, request=request)
+        try:
+            # Latency is injected with a blocking sleep; async callers here are one-shot CLIs
+            status, headers, content = controller.serve(request.method, str(request.url), body)
+        except ReplayMissError as e:
+            raise httpx.ConnectError(str(e), request=request)
+        return httpx.Response(status, headers=headers, content=content, request=request)
+
+    httpx.HTTPTransport.handle_request = handle
+    httpx.AsyncHTTPTransport.handle_async_request = handleAsync
+
+
+def _plainHeaders(headers) -> Dict[str, str]:
+    """Response headers minus the wire encoding, since the content is already decoded"""
+    return {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS}
+
+
+def _parseLatency(value: str) -> Tuple[float, float]:
+    low, _, high = value.partition('-')
+    return float(low), float(high or low)
+
+
+def install(mode: str, directory: str = DEFAULT_CASSETTE_DIR, latencyMs: Tuple[float, float] = (0.0, 0.0),
+            errorRate: float = 0.0, seed: int = 0) -> ReplayController:
+    """
+    Route provider HTTP through the cassette
+
+    Must run before yfinance is imported, so it picks its requests backend.
+
+    Args:
+        mode: 'record' to call providers and save responses, 'replay' to serve them offline
+        directory: Cassette directory
+        latencyMs: (min, max) delay added to each replayed response
+        errorRate: Share of replayed responses turned into 503s
+        seed: Seed for the latency and error draws
+
+    Returns:
+        The active ReplayController (its `stats` count hits, misses and injected errors)
+    """
+    global _controller
+    if _controller is not None:
+        return _controller
+
+    # yfinance's default curl_cffi backend bypasses requests; use the requests one instead
+    os.environ['YF_DISABLE_CURL_CFFI'] = '1'
+
+    _controller = ReplayController(mode, Cassette(directory), latencyMs, errorRate, seed)
+    _installRequests(_controller)
+    _installHttpx(_controller)
+    atexit.register(_printStats)
+    return _controller
+
+
+def _printStats():
+    print(STATS_MARKER + json.dumps({'mode': _controller.mode, **_controller.stats}), file=sys.stderr)
+
+
+def installFromEnv() -> Optional[ReplayController]:
+    """Install using the PROVIDER_REPLAY* environment variables, if a mode is set"""
+    mode = os.getenv(MODE_ENV_VAR)
+    if not mode:
+        return None
+    return install(
+        mode,
+        directory=os.getenv(DIR_ENV_VAR) or DEFAULT_CASSETTE_DIR,
+        latencyMs=_parseLatency(os.getenv(LATENCY_ENV_VAR) or '0'),
+        errorRate=float(os.getenv(ERROR_RATE_ENV_VAR) or 0),
+        seed=int(os.getenv(SEED_ENV_VAR) or 0),
+    )
+
+
+def run(argv: List[str]):
+    """Run a script (or `-c code`) with record/replay installed, like `python <argv>`"""
+    installFromEnv()
+    if argv[0] == '-c':
+        sys.argv = ['-c'] + argv[2:]
+        exec(compile(argv[1], '<string>', 'exec'), {'__name__': '__main__'})
+        return
+
+    scriptPath = os.path.abspath(argv[0])
+    sys.argv = argv
+    # Scripts import their neighbours, as they would when run directly
+    sys.path.insert(0, os.path.dirname(scriptPath))
+    runpy.run_path(scriptPath, run_name='__main__')
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != 'run':
+        print(__doc__)
+        sys.exit(1)
+    run(sys.argv[2:])
@@ -0,0 +1,209 @@
+"""
+Quote Simulator
+Seeded random-walk trades, served over a websocket that speaks Finnhub's trade protocol
+
+Stands in for wss://ws.finnhub.io when testing quote_stream.py without an API key or
+outside market hours. Clients send {"type": "subscribe", "symbol": "AAPL"} and receive
+{"type": "trade", "data": [{"s", "p", "t", "v", "c"}, ...]} batches; any symbol can be
+subscribed to and starts trading on the next batch.
+
+    python quote_simulator.py [--port 8765] [--symbols 500] [--rate 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def watchlistTickers() -> list:
+    """Tickers from watchlist.json, so the simulator trades familiar names first"""
+    try:
+        with open(os.path.join(BASE_DIR, 'watchlist.json'), 'r', encoding='utf-8') as file:
+            return [ticker.strip().upper() for ticker in json.load(file).get('tickers', [])]
+    except (OSError, ValueError):
+        return []
+
+
+class TradeSimulator:
+    """
+    Poisson trade arrivals and log-normal price steps for many symbols at once.
+
+    Activity is skewed like a real tape: a few symbols trade far more often than
+    the rest. Batches come back as arrays, grouped by symbol and in time order.
+    """
+
+    def __init__(self, symbols: int, tradesPerSecond: float, seed: int = 0,
+                 names: Optional[Iterable[str]] = None, volatility: float = 0.0004):
+        """
+        Initialize the simulator
+
+        Args:
+            symbols: Symbols trading from the start
+            tradesPerSecond: Trades per second across all symbols
+            seed: Random seed
+            names: Leading symbol names (default: the watchlist, then SIM0001, SIM0002, ...)
+            volatility: Standard deviation of each trade's log price step
+        """
+        self.rng = np.random.default_rng(seed)
+        self.tradesPerSecond = tradesPerSecond
+        self.volatility = volatility
+        self.symbols = []
+        self.index: Dict[str, int] = {}
+        self.price = np.empty(0)
+        self.activity = np.empty(0)
+
+        names = list(names if names is not None else watchlistTickers())
+        generated = (f"SIM{i:04d}" for i in range(1, symbols + 1))
+        while len(self.symbols) < symbols:
+            self.add(names.pop(0) if names else next(generated))
+
+    def add(self, symbol: str) -> int:
+        """Index of a symbol, adding it to the tape if new"""
+        if symbol in self.index:
+            return self.index[symbol]
+        index = len(self.symbols)
+        self.symbols.append(symbol)
+        self.index[symbol] = index
+        self.price = np.append(self.price, self.rng.uniform(20, 500))
+        # Zipf-like activity: the n-th symbol trades about 1/n^0.8 as often as the first
+        self.activity = np.append(self.activity, 1 / (index + 1) ** 0.8)
+        return index
+
+    def nextBatch(self, startMs: int, durationMs: int) -> Batch:
+        """
+        Trades in [startMs, startMs + durationMs)
+
+        Returns:
+            (symbol index, price, size, time in ms) arrays, grouped by symbol in time order
+        """
+        rates = self.tradesPerSecond * self.activity / self.activity.sum()
+        counts = self.rng.poisson(rates * durationMs / 1000)
+        total = int(counts.sum())
+        symbolIndex = np.repeat(np.arange(len(counts)), counts)
+
+        # Cumulative log steps within each symbol's run of trades
+        steps = self.rng.normal(0, self.volatility, total)
+        cumulative = np.cumsum(steps)
+        runStarts = np.cumsum(counts) - counts
+        offsets = np.repeat(cumulative[runStarts[counts > 0]] - steps[runStarts[counts > 0]], counts[counts > 0])
+        price = np.round(self.price[symbolIndex] * np.exp(cumulative - offsets), 2)
+        if total:
+            lastOfRun = runStarts[counts > 0] + counts[counts > 0] - 1
+            self.price[counts > 0] = price[lastOfRun]
+
+        times = self._timesInRunOrder(symbolIndex, startMs, durationMs)
+        size = self.rng.integers(1, 500, total).astype(np.float64)
+        return symbolIndex, price, size, times
+
+    def _timesInRunOrder(self, symbolIndex: np.ndarray, startMs: int, durationMs: int) -> np.ndarray:
+        """Random trade times, ascending within each symbol's run"""
+        offsets = self.rng.integers(0, durationMs, len(symbolIndex))
+        order = np.lexsort((offsets, symbolIndex))
+        return startMs + offsets[order]
+
+    def message(self, batch: Batch, subscribed: Set[int]) -> Optional[str]:
+        """Finnhub trade message with the batch's trades for subscribed symbols"""
+        symbolIndex, price, size, times = batch
+        if not subscribed or len(symbolIndex) == 0:
+            return None
+        mask = np.isin(symbolIndex, np.fromiter(subscribed, np.int64, len(subscribed)))
+        if not mask.any():
+            return None
+        symbols = self.symbols
+        data = [{'c': None, 'p': p, 's': symbols[i], 't': t, 'v': v}
+                for i, p, t, v in zip(symbolIndex[mask].tolist(), price[mask].tolist(),
+                                      times[mask].tolist(), size[mask].tolist())]
+        return json.dumps({'type': 'trade', 'data': data}, separators=(',', ':'))
+
+
+async def serveSimulator(simulator: TradeSimulator, host: str = 'localhost', port: int = 8765,
+                         batchMs: int = 100):
+    """
+    Start the websocket server and its broadcast loop
+
+    Args:
+        simulator: Trade source
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        batchMs: Interval between trade messages
+
+    Returns:
+        The running websockets server
+    """
+    import websockets
+
+    connections: Dict[object, Set[int]] = {}
+
+    async def handler(connection):
+        subscribed = connections.setdefault(connection, set())
+        try:
+            async for message in connection:
+                try:
+                    request = json.loads(message)
+                    index = simulator.add(str(request['symbol']).upper())
+                except (ValueError, KeyError):
+                    await connection.send(json.dumps({'type': 'error', 'msg': 'Invalid message'}))
+                    continue
+                if request.get('type') == 'subscribe':
+                    subscribed.add(index)
+                elif request.get('type') == 'unsubscribe':
+                    subscribed.discard(index)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            connections.pop(connection, None)
+
+    async def broadcast():
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            batch = simulator.nextBatch(int(time.time() * 1000) - batchMs, batchMs)
+            for connection, subscribed in list(connections.items()):
+                message = simulator.message(batch, subscribed)
+                if message:
+                    try:
+                        await connection.send(message)
+                    except websockets.ConnectionClosed:
+                        connections.pop(connection, None)
+            await asyncio.sleep(max(0.0, batchMs / 1000 - (loop.time() - started)))
+
+    server = await websockets.serve(handler, host, port, max_size=None)
+    server.broadcaster = asyncio.ensure_future(broadcast())
+    return server
+
+
+async def run(args: argparse.Namespace):
+    simulator = TradeSimulator(args.symbols, args.rate, seed=args.seed)
+    server = await serveSimulator(simulator, args.host, args.port, args.batch_ms)
+    print(f"Simulating {args.symbols} symbols at {args.rate:,.0f} trades/s on ws://{args.host}:{args.port}",
+          file=sys.stderr)
+    await server.broadcaster
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finnhub-compatible trade websocket with simulated trades")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=2000, help="trades per second across all symbols")
+    parser.add_argument('--batch-ms', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
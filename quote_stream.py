@@ -0,0 +1,643 @@
+"""
+Quote Stream
+Live trade ingest into per-symbol tick rings, with 1m/5m/1h candles and incremental indicators
+
+All state lives in preallocated numpy arrays indexed by symbol row, so ingesting a batch
+of trades writes into existing memory instead of creating objects per tick. Updates are
+coalesced and pushed to subscribers every flush interval.
+
+    python quote_stream.py serve --simulate          # NDJSON updates on stdout, commands on stdin
+    python quote_stream.py bench --symbols 5000      # ingest throughput and memory
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+FINNHUB_WS_URL = 'wss://ws.finnhub.io'
+
+# Bar length in seconds per interval name
+INTERVALS = {'1m': 60, '5m': 300, '1h': 3600}
+
+# Closed bars kept per symbol and interval; enough for the longest window (sma50)
+CLOSE_WINDOW = 50
+
+EMA_FAST, EMA_SLOW, SIGNAL_PERIOD = 12, 26, 9
+RSI_PERIOD, BB_PERIOD = 14, 20
+
+Update = Dict
+Subscriber = Callable[[List[Update]], None]
+
+
+def _groups(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start index and length of each run of equal values in a sorted array"""
+    if len(rows) == 0:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], rows[1:] != rows[:-1])))
+    counts = np.diff(np.append(starts, len(rows)))
+    return starts, counts
+
+
+def _rankInGroup(starts: np.ndarray, counts: np.ndarray, n: int) -> np.ndarray:
+    """Position of each element within its run"""
+    return np.arange(n) - np.repeat(starts, counts)
+
+
+class TickRing:
+    """Last `capacity` trades of every symbol, in fixed (symbols x capacity) arrays"""
+
+    def __init__(self, symbols: int, capacity: int = 256):
+        self.capacity = capacity
+        self.price = np.zeros((symbols, capacity), np.float64)
+        self.size = np.zeros((symbols, capacity), np.float64)
+        self.time = np.zeros((symbols, capacity), np.int64)
+        self.written = np.zeros(symbols, np.int64)
+
+    def grow(self, symbols: int):
+        for name in ('price', 'size', 'time'):
+            old = getattr(self, name)
+            new = np.zeros((symbols, self.capacity), old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.written = np.concatenate((self.written, np.zeros(symbols - len(self.written), np.int64)))
+
+    def append(self, rows: np.ndarray, price: np.ndarray, size: np.ndarray, times: np.ndarray):
+        """Write a batch of trades, sorted by row and then time"""
+        starts, counts = _groups(rows)
+        rank = _rankInGroup(starts, counts, len(rows))
+        # Only the newest `capacity` trades of a row survive; skip the rest so no slot is written twice
+        keep = rank >= np.repeat(counts, counts) - self.capacity
+        keepRows = rows[keep]
+        slots = (self.written[keepRows] + rank[keep]) % self.capacity
+        self.price[keepRows, slots] = price[keep]
+        self.size[keepRows, slots] = size[keep]
+        self.time[keepRows, slots] = times[keep]
+        self.written[rows[starts]] += counts
+
+    def last(self, row: int, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Up to n most recent trades of one symbol, oldest first"""
+        available = int(min(self.written[row], self.capacity))
+        n = available if n is None else min(n, available)
+        slots = (self.written[row] - n + np.arange(n)) % self.capacity
+        return {'price': self.price[row, slots], 'size': self.size[row, slots], 'time': self.time[row, slots]}
+
+
+class LiveCandles:
+    """
+    Current bar and indicator state for one bar interval, for every symbol.
+
+    Closed bars feed a ring of the last CLOSE_WINDOW closes (for SMA, RSI and
+    Bollinger windows) and the recursive EMA/MACD state. Indicator values for the
+    open bar are computed on demand, as if it closed at its latest price, without
+    changing that state.
+    """
+
+    def __init__(self, seconds: int, symbols: int):
+        self.seconds = seconds
+        self.bucket = np.full(symbols, -1, np.int64)
+        self.open = np.zeros(symbols)
+        self.high = np.zeros(symbols)
+        self.low = np.zeros(symbols)
+        self.close = np.zeros(symbols)
+        self.volume = np.zeros(symbols)
+        self.closes = np.full((symbols, CLOSE_WINDOW), np.nan)
+        self.closed = np.zeros(symbols, np.int64)
+        self.ema12 = np.full(symbols, np.nan)
+        self.ema26 = np.full(symbols, np.nan)
+        self.signal = np.full(symbols, np.nan)
+        self.macdSum = np.zeros(symbols)
+        # (rows, bars, indicators at the close) for every bar closed since the last flush, in close order
+        self.closedBars: List[Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]] = []
+
+    def grow(self, symbols: int):
+        extra = symbols - len(self.bucket)
+        for name, fill in (('bucket', -1), ('open', 0), ('high', 0), ('low', 0), ('close', 0), ('volume', 0),
+                           ('closed', 0), ('ema12', np.nan), ('ema26', np.nan), ('signal', np.nan),
+                           ('macdSum', 0)):
+            old = getattr(self, name)
+            setattr(self, name, np.concatenate((old, np.full(extra, fill, old.dtype))))
+        self.closes = np.vstack((self.closes, np.full((extra, CLOSE_WINDOW), np.nan)))
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def apply(self, rows: np.ndarray, price: np.ndarray, size: np.ndarray, times: np.ndarray) -> int:
+        """
+        Fold a batch of trades (sorted by row, then time) into the current bars
+
+        Returns:
+            Trades dropped because their bar had already closed
+        """
+        buckets = times // (self.seconds * 1000)
+        boundary = np.concatenate(([True], (rows[1:] != rows[:-1]) | (buckets[1:] != buckets[:-1])))
+        segStarts = np.flatnonzero(boundary)
+        segEnds = np.append(segStarts[1:], len(rows)) - 1
+        segRows = rows[segStarts]
+        segBuckets = buckets[segStarts]
+        segOpen = price[segStarts]
+        segClose = price[segEnds]
+        segHigh = np.maximum.reduceat(price, segStarts)
+        segLow = np.minimum.reduceat(price, segStarts)
+        segVolume = np.add.reduceat(size, segStarts)
+        segTrades = segEnds - segStarts + 1
+
+        # A batch can cross a bar boundary, giving a row several segments; apply them level by level
+        rowStarts, rowCounts = _groups(segRows)
+        level = _rankInGroup(rowStarts, rowCounts, len(segRows))
+        late = 0
+        for depth in range(int(level.max()) + 1 if len(level) else 0):
+            sel = level == depth
+            r, b = segRows[sel], segBuckets[sel]
+            current = self.bucket[r]
+
+            same = current == b
+            if same.any():
+                rs = r[same]
+                self.high[rs] = np.maximum(self.high[rs], segHigh[sel][same])
+                self.low[rs] = np.minimum(self.low[rs], segLow[sel][same])
+                self.close[rs] = segClose[sel][same]
+                self.volume[rs] += segVolume[sel][same]
+
+            rolled = (current >= 0) & (current < b)
+            if rolled.any():
+                self._closeBars(r[rolled])
+
+            fresh = current < b
+            if fresh.any():
+                rf = r[fresh]
+                self.bucket[rf] = b[fresh]
+                self.open[rf] = segOpen[sel][fresh]
+                self.high[rf] = segHigh[sel][fresh]
+                self.low[rf] = segLow[sel][fresh]
+                self.close[rf] = segClose[sel][fresh]
+                self.volume[rf] = segVolume[sel][fresh]
+
+            stale = b < current
+            if stale.any():
+                late += int(segTrades[sel][stale].sum())
+        return late
+
+    def _closeBars(self, rows: np.ndarray):
+        """Commit the open bars of rows to the close ring and EMA/MACD state, and queue them for the next flush"""
+        closes = self.close[rows]
+        ema12, ema26, signal, macdSum = self._advance(rows, closes, self.closed[rows], self._window(rows, closes))
+        self.ema12[rows], self.ema26[rows], self.signal[rows], self.macdSum[rows] = ema12, ema26, signal, macdSum
+        self.closes[rows, self.closed[rows] % CLOSE_WINDOW] = closes
+        self.closed[rows] += 1
+
+        # A batch can close several bars of one symbol, so indicators are taken now rather than at flush
+        self.closedBars.append((rows, self.openBars(rows), self.indicators(rows, live=False)))
+
+    def openBars(self, rows: np.ndarray) -> np.ndarray:
+        """(time, open, high, low, close, volume) of the current bar per row"""
+        return np.column_stack((self.bucket[rows] * self.seconds, self.open[rows], self.high[rows],
+                                self.low[rows], self.close[rows], self.volume[rows]))
+
+    # ------------------------------------------------------------------
+    # Indicators
+    # ------------------------------------------------------------------
+
+    def _window(self, rows: np.ndarray, live: Optional[np.ndarray] = None) -> np.ndarray:
+        """Last CLOSE_WINDOW closes per row, oldest first, NaN where fewer exist
+
+        With live prices, the window ends with them instead of the oldest close dropping out"""
+        count = self.closed[rows]
+        if live is None:
+            offsets = np.arange(-CLOSE_WINDOW, 0)
+            index = count[:, None] + offsets
+            window = self.closes[rows[:, None], index % CLOSE_WINDOW]
+            return np.where(index >= 0, window, np.nan)
+
+        offsets = np.arange(-(CLOSE_WINDOW - 1), 0)
+        index = count[:, None] + offsets
+        window = np.where(index >= 0, self.closes[rows[:, None], index % CLOSE_WINDOW], np.nan)
+        return np.column_stack((window, live))
+
+    def _advance(self, rows: np.ndarray, closes: np.ndarray, countBefore: np.ndarray,
+                 window: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        EMA12, EMA26, MACD signal and the signal's seed sum after one more close
+
+        EMAs start as the simple average of their first n closes and the signal as the
+        average of the first nine MACD values, as finnhub_chart_fetcher computes them.
+        window must already end with the new close.
+        """
+        count = countBefore + 1
+
+        def ema(previous, n):
+            multiplier = 2 / (n + 1)
+            seeded = window[:, -n:].mean(axis=1)
+            return np.where(count < n, np.nan,
+                            np.where(count == n, seeded, (closes - previous) * multiplier + previous))
+
+        ema12 = ema(self.ema12[rows], EMA_FAST)
+        ema26 = ema(self.ema26[rows], EMA_SLOW)
+        macd = ema12 - ema26
+
+        macdCount = count - EMA_SLOW + 1
+        macdSum = np.where((macdCount >= 1) & (macdCount <= SIGNAL_PERIOD), self.macdSum[rows] + macd,
+                           self.macdSum[rows])
+        multiplier = 2 / (SIGNAL_PERIOD + 1)
+        previous = self.signal[rows]
+        signal = np.where(macdCount < SIGNAL_PERIOD, np.nan,
+                          np.where(macdCount == SIGNAL_PERIOD, macdSum / SIGNAL_PERIOD,
+                                   (macd - previous) * multiplier + previous))
+        return ema12, ema26, signal, macdSum
+
+    def indicators(self, rows: np.ndarray, live: bool) -> Dict[str, np.ndarray]:
+        """
+        Indicator values per row, for the open bar (live) or the last closed bar
+
+        Returns:
+            Arrays keyed like finnhub_chart_fetcher's indicators; NaN until enough bars exist
+        """
+        if live:
+            closes = self.close[rows]
+            window = self._window(rows, closes)
+            ema12, ema26, signal, _ = self._advance(rows, closes, self.closed[rows], window)
+        else:
+            window = self._window(rows)
+            ema12, ema26, signal = self.ema12[rows], self.ema26[rows], self.signal[rows]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            changes = np.diff(window[:, -(RSI_PERIOD + 1):], axis=1)
+            gain = np.clip(changes, 0, None).mean(axis=1)
+            loss = np.clip(-changes, 0, None).mean(axis=1)
+            rsi = np.where(loss == 0, 100.0, 100 - 100 / (1 + gain / loss))
+            rsi = np.where(np.isnan(gain), np.nan, rsi)
+
+            bbWindow = window[:, -BB_PERIOD:]
+            middle = bbWindow.mean(axis=1)
+            spread = 2 * bbWindow.std(axis=1)
+        macd = ema12 - ema26
+        return {
+            'sma20': middle,
+            'sma50': window.mean(axis=1),
+            'ema12': ema12,
+            'ema26': ema26,
+            'rsi': rsi,
+            'macd': macd,
+            'macdSignal': signal,
+            'macdHistogram': macd - signal,
+            'bbUpper': middle + spread,
+            'bbMiddle': middle,
+            'bbLower': middle - spread,
+        }
+
+
+class QuoteStream:
+    """
+    Symbol registry, tick rings and live candles for every interval, plus subscribers
+
+    Feed it with ingest() (arrays) or ingestTrades() (Finnhub trade dicts) and call
+    flush() periodically: each subscriber then gets one list with the latest bar and
+    indicators of every symbol and interval that changed since the last flush.
+    """
+
+    def __init__(self, symbols: int = 1024, tickCapacity: int = 256, intervals: Iterable[str] = INTERVALS):
+        self.capacity = symbols
+        self.rows: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.ticks = TickRing(symbols, tickCapacity)
+        self.candles = {name: LiveCandles(INTERVALS[name], symbols) for name in intervals}
+        self.dirty = np.zeros(symbols, bool)
+        self.subscribers: Dict[int, Tuple[Subscriber, Optional[np.ndarray], List[str]]] = {}
+        self._ids = itertools.count(1)
+        self.stats = {'trades': 0, 'batches': 0, 'late': 0, 'updates': 0}
+
+    # ------------------------------------------------------------------
+    # Symbols
+    # ------------------------------------------------------------------
+
+    def row(self, symbol: str) -> int:
+        """Row of a symbol, registering it (and growing every array) if new"""
+        row = self.rows.get(symbol)
+        if row is not None:
+            return row
+        row = len(self.names)
+        if row == self.capacity:
+            self._grow(self.capacity * 2)
+        self.rows[symbol] = row
+        self.names.append(symbol)
+        return row
+
+    def _grow(self, symbols: int):
+        self.ticks.grow(symbols)
+        for candles in self.candles.values():
+            candles.grow(symbols)
+        self.dirty = np.concatenate((self.dirty, np.zeros(symbols - self.capacity, bool)))
+        for key, (callback, mask, intervals) in self.subscribers.items():
+            if mask is not None:
+                self.subscribers[key] = (callback, np.concatenate((mask, np.zeros(symbols - self.capacity, bool))),
+                                         intervals)
+        self.capacity = symbols
+
+    def memoryBytes(self) -> int:
+        """Bytes held by the tick rings and candle state"""
+        arrays = [self.ticks.price, self.ticks.size, self.ticks.time, self.ticks.written, self.dirty]
+        for candles in self.candles.values():
+            arrays += [value for value in vars(candles).values() if isinstance(value, np.ndarray)]
+        return sum(array.nbytes for array in arrays)
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def ingest(self, rows: np.ndarray, price: np.ndarray, size: np.ndarray, times: np.ndarray):
+        """
+        Add a batch of trades
+
+        Args:
+            rows: Symbol rows (from row())
+            price: Trade prices
+            size: Trade sizes
+            times: Trade times in epoch milliseconds
+        """
+        if len(rows) == 0:
+            return
+        order = np.lexsort((times, rows))
+        rows, price, size, times = rows[order], price[order], size[order], times[order]
+        self.ticks.append(rows, price, size, times)
+        for candles in self.candles.values():
+            self.stats['late'] += candles.apply(rows, price, size, times)
+        self.dirty[rows] = True
+        self.stats['trades'] += len(rows)
+        self.stats['batches'] += 1
+
+    def ingestTrades(self, trades: List[Dict]):
+        """Add trades in Finnhub's websocket shape: {'s': symbol, 'p': price, 'v': volume, 't': ms}"""
+        n = len(trades)
+        rows = np.fromiter((self.row(trade['s']) for trade in trades), np.int64, n)
+        price = np.fromiter((trade['p'] for trade in trades), np.float64, n)
+        size = np.fromiter((trade.get('v') or 0 for trade in trades), np.float64, n)
+        times = np.fromiter((trade['t'] for trade in trades), np.int64, n)
+        self.ingest(rows, price, size, times)
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+
+    def subscribe(self, callback: Subscriber, symbols: Optional[Iterable[str]] = None,
+                  intervals: Optional[Iterable[str]] = None) -> int:
+        """
+        Receive updates for some symbols (default: all) and intervals (default: all)
+
+        Returns:
+            Token for unsubscribe()
+        """
+        mask = None
+        if symbols is not None:
+            rows = [self.row(symbol) for symbol in symbols]
+            mask = np.zeros(self.capacity, bool)
+            mask[rows] = True
+        token = next(self._ids)
+        self.subscribers[token] = (callback, mask, list(intervals or self.candles))
+        return token
+
+    def unsubscribe(self, token: int):
+        self.subscribers.pop(token, None)
+
+    def flush(self) -> int:
+        """
+        Push the latest bar and indicators of every changed symbol to its subscribers
+
+        Every bar closed since the last flush is reported once, oldest first, with final=True
+        and its indicators at the close; then the open bar with final=False.
+
+        Returns:
+            Updates delivered
+        """
+        wanted = np.zeros(self.capacity, bool)
+        for _, mask, _ in self.subscribers.values():
+            if mask is None:
+                wanted[:] = True
+                break
+            wanted |= mask
+
+        byInterval = {}
+        for name, candles in self.candles.items():
+            updates = []
+            for rows, bars, values in candles.closedBars:
+                keep = wanted[rows]
+                if keep.any():
+                    updates += self._updates(name, rows[keep], bars[keep],
+                                             {key: array[keep] for key, array in values.items()}, final=True)
+            candles.closedBars.clear()
+            liveRows = np.flatnonzero(self.dirty & wanted & (candles.bucket >= 0))
+            if len(liveRows):
+                updates += self._updates(name, liveRows, candles.openBars(liveRows),
+                                         candles.indicators(liveRows, live=True), final=False)
+            byInterval[name] = updates
+        self.dirty[:] = False
+
+        delivered = 0
+        for callback, mask, intervals in list(self.subscribers.values()):
+            updates = [update for name in intervals for update in byInterval.get(name, ())
+                       if mask is None or mask[self.rows[update['symbol']]]]
+            if updates:
+                callback(updates)
+                delivered += len(updates)
+        self.stats['updates'] += delivered
+        return delivered
+
+    def _updates(self, interval: str, rows: np.ndarray, bars: np.ndarray, values: Dict[str, np.ndarray],
+                 final: bool) -> List[Update]:
+        # Rounded like the REST chart payload; NaN (not enough bars yet) becomes None
+        rounded = {key: np.round(array, 4 if key.startswith('macd') else 2).tolist() for key, array in values.items()}
+        barList = bars.tolist()
+
+        updates = []
+        for i, row in enumerate(rows.tolist()):
+            bar = barList[i]
+            updates.append({
+                'symbol': self.names[row],
+                'interval': interval,
+                'final': final,
+                'bar': {'time': int(bar[0]), 'open': round(bar[1], 2), 'high': round(bar[2], 2),
+                        'low': round(bar[3], 2), 'close': round(bar[4], 2), 'volume': bar[5]},
+                'indicators': {key: (None if value != value else value) for key, value in
+                               ((key, column[i]) for key, column in rounded.items())},
+            })
+        return updates
+
+
+# ----------------------------------------------------------------------
+# Websocket feed
+# ----------------------------------------------------------------------
+
+async def consumeTrades(stream: QuoteStream, url: str, symbols: Iterable[str], commands: asyncio.Queue,
+                        maxBackoff: float = 30.0):
+    """
+    Feed trades from a Finnhub-protocol websocket into the stream, reconnecting with backoff
+
+    Args:
+        stream: QuoteStream to feed
+        url: Websocket URL (Finnhub with ?token=, or the local simulator)
+        symbols: Symbols to subscribe to on connect
+        commands: Queue of ('subscribe' | 'unsubscribe', symbol) sent to the open connection
+        maxBackoff: Longest wait between reconnects, in seconds
+    """
+    import websockets
+
+    subscribed = set(symbols)
+    backoff = 1.0
+    while True:
+        try:
+            async with websockets.connect(url, max_size=None) as socket:
+                backoff = 1.0
+                for symbol in sorted(subscribed):
+                    await socket.send(json.dumps({'type': 'subscribe', 'symbol': symbol}))
+
+                async def forwardCommands():
+                    while True:
+                        op, symbol = await commands.get()
+                        (subscribed.add if op == 'subscribe' else subscribed.discard)(symbol)
+                        await socket.send(json.dumps({'type': op, 'symbol': symbol}))
+
+                forwarder = asyncio.ensure_future(forwardCommands())
+                try:
+                    async for message in socket:
+                        payload = json.loads(message)
+                        if payload.get('type') == 'trade' and payload.get('data'):
+                            stream.ingestTrades(payload['data'])
+                finally:
+                    forwarder.cancel()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Trade feed error: {e}; reconnecting in {backoff:.0f}s", file=sys.stderr)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, maxBackoff)
+
+
+async def readCommands(stream: QuoteStream, commands: asyncio.Queue):
+    """Apply {"op": "subscribe" | "unsubscribe", "symbols": [...]} lines from stdin"""
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line:
+            return
+        try:
+            command = json.loads(line)
+            for symbol in command.get('symbols', []):
+                symbol = symbol.strip().upper()
+                stream.row(symbol)
+                await commands.put((command['op'], symbol))
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring command {line.strip()!r}: {e}", file=sys.stderr)
+
+
+async def serve(args: argparse.Namespace):
+    """Stream NDJSON updates to stdout until stdin closes"""
+    import wire
+
+    stream = QuoteStream(args.symbols, args.tick_capacity)
+    out = sys.stdout.buffer
+
+    def emit(updates: List[Update]):
+        out.write(b''.join(wire.dumps(update, compact=True) + b'\n' for update in updates))
+        out.flush()
+
+    stream.subscribe(emit)
+
+    url = args.url
+    if args.simulate:
+        from quote_simulator import TradeSimulator, serveSimulator
+        simulator = TradeSimulator(args.simulate_symbols, args.simulate_rate, seed=args.seed)
+        server = await serveSimulator(simulator, 'localhost', 0)
+        url = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+    elif not url:
+        apiKey = os.getenv('FINNHUB_API_KEY')
+        if not apiKey:
+            print("FINNHUB_API_KEY not configured; use --simulate for the local trade simulator", file=sys.stderr)
+            sys.exit(1)
+        url = f"{FINNHUB_WS_URL}?token={apiKey}"
+
+    commands: asyncio.Queue = asyncio.Queue()
+    feed = asyncio.ensure_future(consumeTrades(stream, url, args.subscribe, commands))
+    reader = asyncio.ensure_future(readCommands(stream, commands))
+    try:
+        while not reader.done():
+            await asyncio.sleep(args.flush_ms / 1000)
+            stream.flush()
+    finally:
+        feed.cancel()
+
+
+def bench(args: argparse.Namespace):
+    """Ingest simulated batches as fast as possible and report throughput and memory"""
+    from quote_simulator import TradeSimulator
+
+    simulator = TradeSimulator(args.symbols, args.rate, seed=args.seed)
+    stream = QuoteStream(args.symbols, args.tick_capacity)
+    rowOf = np.fromiter((stream.row(symbol) for symbol in simulator.symbols), np.int64, len(simulator.symbols))
+    stream.subscribe(lambda updates: None, simulator.symbols[:args.watched])
+
+    # Simulated clock: batches of batch_ms each, spanning several 1m bars
+    clock = int(time.time() * 1000)
+    batches = [simulator.nextBatch(clock + i * args.batch_ms, args.batch_ms) for i in range(args.batches)]
+    trades = sum(len(batch[0]) for batch in batches)
+
+    started = time.perf_counter()
+    flushSeconds = 0.0
+    for i, (symbolIndex, price, size, times) in enumerate(batches):
+        stream.ingest(rowOf[symbolIndex], price, size, times)
+        if (i + 1) % max(1, args.flush_ms // args.batch_ms) == 0:
+            flushStarted = time.perf_counter()
+            stream.flush()
+            flushSeconds += time.perf_counter() - flushStarted
+    elapsed = time.perf_counter() - started
+
+    simulatedSeconds = args.batches * args.batch_ms / 1000
+    print(f"symbols={args.symbols} trades={trades:,} batches={args.batches} "
+          f"simulated={simulatedSeconds:.0f}s wall={elapsed:.2f}s")
+    print(f"  ingest+flush {trades / elapsed:,.0f} trades/s ({elapsed / args.batches * 1000:.2f} ms per "
+          f"{args.batch_ms} ms batch), flush {flushSeconds * 1000:.0f} ms total for {args.watched} watched symbols")
+    print(f"  state {stream.memoryBytes() / 1e6:.1f} MB, late trades {stream.stats['late']}, "
+          f"updates {stream.stats['updates']:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live trade ingest with tick rings and candles")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serveParser = sub.add_parser('serve', help="stream updates for subscribed symbols as NDJSON")
+    serveParser.add_argument('--url', help="Finnhub-protocol websocket (default: Finnhub with FINNHUB_API_KEY)")
+    serveParser.add_argument('--simulate', action='store_true', help="use the local trade simulator")
+    serveParser.add_argument('--simulate-symbols', type=int, default=500)
+    serveParser.add_argument('--simulate-rate', type=float, default=2000, help="simulated trades per second")
+    serveParser.add_argument('--subscribe', nargs='*', default=[], help="symbols to subscribe to at start")
+    serveParser.add_argument('--flush-ms', type=int, default=250)
+
+    benchParser = sub.add_parser('bench', help="measure ingest throughput with simulated trades")
+    benchParser.add_argument('--rate', type=float, default=200_000, help="simulated trades per second")
+    benchParser.add_argument('--batches', type=int, default=1200)
+    benchParser.add_argument('--batch-ms', type=int, default=100)
+    benchParser.add_argument('--flush-ms', type=int, default=250)
+    benchParser.add_argument('--watched', type=int, default=100, help="symbols with a subscriber")
+
+    for subParser in (serveParser, benchParser):
+        subParser.add_argument('--symbols', type=int, default=5000, help="symbol capacity (grows as needed)")
+        subParser.add_argument('--tick-capacity', type=int, default=256, help="trades kept per symbol")
+        subParser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'bench':
+        bench(args)
+    else:
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
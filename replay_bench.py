@@ -0,0 +1,136 @@
+"""
+Replay Benchmark
+Time the report pipelines end to end against recorded provider responses
+
+Record once with network access and real keys:
+    python replay_bench.py --record --tickers AAPL MSFT
+
+Then benchmark offline, optionally with injected latency and errors:
+    python replay_bench.py --runs 5 --latency-ms 50-200 --error-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from provider_replay import (DEFAULT_CASSETTE_DIR, DIR_ENV_VAR, ERROR_RATE_ENV_VAR, LATENCY_ENV_VAR,
+                             MODE_ENV_VAR, SEED_ENV_VAR, STATS_MARKER)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '.cache', 'bench')
+LAUNCHER = os.path.join(BASE_DIR, 'provider_replay.py')
+
+NEWS_CODE = """
+import json, os, sys
+from news_fetcher import NewsFetcher
+fetcher = NewsFetcher(os.getenv('NEWS_API_KEY', 'replay'), useCache=False, useIndex=False)
+print(json.dumps(fetcher.getStockNews(sys.argv[1])))
+"""
+
+# Keys only need to exist in replay mode; recordings never contain them
+PLACEHOLDER_KEYS = ['NEWS_API_KEY', 'FINNHUB_API_KEY', 'TWITTER_BEARER_TOKEN', 'GEMINI_API_KEY']
+
+
+def targetCommand(target: str, ticker: Optional[str]) -> Tuple[List[str], Optional[str]]:
+    """(arguments after the launcher, stdin) for one pipeline run"""
+    if target == 'stock':
+        return ['main.py', ticker], None
+    if target == 'sec':
+        return ['sec_data_fetcher.py'], ticker
+    if target == 'chart':
+        return ['finnhub_chart_fetcher.py', ticker, os.getenv('FINNHUB_API_KEY', 'replay')], None
+    if target == 'news':
+        return ['-c', NEWS_CODE, ticker], None
+    if target == 'sentiment':
+        return [os.path.join('sentiment', 'main.py')], None
+    raise ValueError(f"Unknown target: {target}")
+
+
+TARGETS = ['stock', 'sec', 'chart', 'news', 'sentiment']
+TICKERLESS_TARGETS = {'sentiment'}
+
+
+def runOnce(target: str, ticker: Optional[str], env: Dict[str, str]) -> Dict:
+    """Run one pipeline in a fresh process, as the server would"""
+    args, stdin = targetCommand(target, ticker)
+    with tempfile.TemporaryDirectory() as stateDir:
+        # Sentiment state (checkpoints, archive, caches) starts empty so every run sends the same requests
+        runEnv = {**env, 'SENTIMENT_STATE_DIR': stateDir}
+        started = time.perf_counter()
+        completed = subprocess.run([sys.executable, LAUNCHER, 'run', *args], input=stdin, env=runEnv,
+                                   cwd=BASE_DIR, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+
+    stats = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith(STATS_MARKER):
+            stats = json.loads(line[len(STATS_MARKER):])
+    return {'target': target, 'ticker': ticker, 'ok': completed.returncode == 0,
+            'seconds': round(elapsed, 4), 'replay': stats}
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    seconds = sorted(run['seconds'] for run in runs)
+    return {
+        'runs': len(runs),
+        'failures': sum(not run['ok'] for run in runs),
+        'medianMs': round(statistics.median(seconds) * 1000, 1),
+        'p95Ms': round(seconds[min(len(seconds) - 1, int(0.95 * len(seconds)))] * 1000, 1),
+        'maxMs': round(seconds[-1] * 1000, 1),
+        'misses': sum(run['replay'].get('misses', 0) for run in runs),
+        'injectedErrors': sum(run['replay'].get('injectedErrors', 0) for run in runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark report pipelines against recorded provider responses")
+    parser.add_argument('--record', action='store_true', help="call the real providers and save their responses")
+    parser.add_argument('--tickers', nargs='+', default=['AAPL'])
+    parser.add_argument('--targets', nargs='+', default=TARGETS, choices=TARGETS)
+    parser.add_argument('--runs', type=int, default=3, help="runs per target and ticker (replay only)")
+    parser.add_argument('--latency-ms', default='0', help="added latency per response, e.g. 120 or 50-200")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of responses replaced by 503s")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cassette', default=DEFAULT_CASSETTE_DIR)
+    parser.add_argument('--output', help="results file (default: .cache/bench/replay-<timestamp>.json)")
+    args = parser.parse_args()
+
+    env = {**os.environ, MODE_ENV_VAR: 'record' if args.record else 'replay', DIR_ENV_VAR: args.cassette,
+           LATENCY_ENV_VAR: args.latency_ms, ERROR_RATE_ENV_VAR: str(args.error_rate), SEED_ENV_VAR: str(args.seed)}
+    if not args.record:
+        for name in PLACEHOLDER_KEYS:
+            env.setdefault(name, 'replay')
+    runsPerCase = 1 if args.record else args.runs
+
+    results = {}
+    for target in args.targets:
+        tickers = [None] if target in TICKERLESS_TARGETS else args.tickers
+        runs = [runOnce(target, ticker, env) for ticker in tickers for _ in range(runsPerCase)]
+        results[target] = {'summary': summarize(runs), 'runs': runs}
+        summary = results[target]['summary']
+        print(f"{target:<10} runs={summary['runs']:<3} failures={summary['failures']:<3} "
+              f"median={summary['medianMs']:>8.1f}ms p95={summary['p95Ms']:>8.1f}ms "
+              f"misses={summary['misses']} injectedErrors={summary['injectedErrors']}")
+
+    if args.record:
+        print(f"\nRecorded responses in {args.cassette}")
+        return
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"replay-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({'settings': {'tickers': args.tickers, 'runs': args.runs, 'latencyMs': args.latency_ms,
+                                'errorRate': args.error_rate, 'seed': args.seed},
+                   'results': results}, file, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+// Bounded in-memory report cache with single-flight loading and stale-while-revalidate
+//
+// Concurrent requests for the same key share one computation. Fresh entries are served
+// as-is; stale ones are served immediately while a single background refresh replaces
+// them. Entries past the stale window, and the least recently used beyond maxEntries,
+// are dropped.
+
+class ReportCache {
+    constructor({ maxEntries = 200, freshMs = 60 * 1000, staleMs = 10 * 60 * 1000, now = Date.now } = {}) {
+        this.maxEntries = maxEntries;
+        this.freshMs = freshMs;
+        this.staleMs = staleMs;
+        this.now = now;
+        this.entries = new Map();   // key -> { value, storedAt }, in least recently used order
+        this.flights = new Map();   // key -> { promise, parts, listeners }
+        this.counts = { hit: 0, stale: 0, miss: 0, coalesced: 0, refreshes: 0, errors: 0, evictions: 0 };
+    }
+
+    /**
+     * Look up a key, computing it at most once across concurrent callers
+     *
+     * compute(emit) returns a promise of the value; emit(part) sends a partial result
+     * (e.g. one streamed section) to every caller waiting on that computation.
+     * shouldCache(value) can veto storing a value. Returns { status, result } where
+     * status is HIT, STALE, MISS or COALESCED and result is a promise of the value.
+     * onPartial is only called for MISS and COALESCED, including parts emitted
+     * before the caller joined.
+     */
+    get(key, compute, { onPartial = null, shouldCache = () => true } = {}) {
+        const entry = this.entries.get(key);
+        const age = entry ? this.now() - entry.storedAt : Infinity;
+
+        if (age <= this.freshMs) {
+            this.touch(key, entry);
+            this.counts.hit += 1;
+            return { status: 'HIT', result: Promise.resolve(entry.value) };
+        }
+
+        if (age <= this.freshMs + this.staleMs) {
+            this.touch(key, entry);
+            this.counts.stale += 1;
+            if (!this.flights.has(key)) {
+                this.counts.refreshes += 1;
+                // Background refresh failures keep serving the old value
+                this.load(key, compute, shouldCache).promise.catch(() => {});
+            }
+            return { status: 'STALE', result: Promise.resolve(entry.value) };
+        }
+
+        let flight = this.flights.get(key);
+        const status = flight ? 'COALESCED' : 'MISS';
+        this.counts[status.toLowerCase()] += 1;
+        if (!flight) flight = this.load(key, compute, shouldCache);
+
+        if (onPartial) {
+            flight.parts.forEach(onPartial);
+            flight.listeners.add(onPartial);
+            const unsubscribe = () => flight.listeners.delete(onPartial);
+            flight.promise.then(unsubscribe, unsubscribe);
+        }
+        return { status, result: flight.promise };
+    }
+
+    load(key, compute, shouldCache) {
+        const flight = { promise: null, parts: [], listeners: new Set() };
+        const emit = (part) => {
+            flight.parts.push(part);
+            flight.listeners.forEach((listener) => listener(part));
+        };
+
+        this.flights.set(key, flight);
+        flight.promise = Promise.resolve()
+            .then(() => compute(emit))
+            .then((value) => {
+                if (shouldCache(value)) this.set(key, value);
+                return value;
+            }, (error) => {
+                this.counts.errors += 1;
+                throw error;
+            })
+            .finally(() => this.flights.delete(key));
+        return flight;
+    }
+
+    set(key, value) {
+        this.entries.delete(key);
+        this.entries.set(key, { value, storedAt: this.now() });
+        while (this.entries.size > this.maxEntries) {
+            this.entries.delete(this.entries.keys().next().value);
+            this.counts.evictions += 1;
+        }
+    }
+
+    touch(key, entry) {
+        this.entries.delete(key);
+        this.entries.set(key, entry);
+    }
+
+    stats() {
+        const lookups = this.counts.hit + this.counts.stale + this.counts.miss + this.counts.coalesced;
+        return {
+            entries: this.entries.size,
+            inFlight: this.flights.size,
+            ...this.counts,
+            hitRate: lookups ? (lookups - this.counts.miss) / lookups : null,
+        };
+    }
+
+    renderPrometheus(name = 'report_cache') {
+        const lines = [
+            `# HELP ${name}_lookups_total Report cache lookups by outcome`,
+            `# TYPE ${name}_lookups_total counter`,
+        ];
+        for (const status of ['hit', 'stale', 'miss', 'coalesced']) {
+            lines.push(`${name}_lookups_total{status="${status}"} ${this.counts[status]}`);
+        }
+        for (const counter of ['refreshes', 'errors', 'evictions']) {
+            lines.push(`# TYPE ${name}_${counter}_total counter`, `${name}_${counter}_total ${this.counts[counter]}`);
+        }
+        lines.push(`# TYPE ${name}_entries gauge`, `${name}_entries ${this.entries.size}`);
+        return lines.join('\n');
+    }
+}
+
+module.exports = { ReportCache };
@@ -0,0 +1,229 @@
+"""
+Report Store
+On-disk cache of report sections, with request counts and warm-cache hit rates
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'report_store.sqlite3')
+
+# How long a section stays fresh. Filings and daily candles change slowly; quotes and news do not
+SECTION_TTLS = {
+    'stock': 30 * 60,
+    'sec': 24 * 60 * 60,
+    'chart': 6 * 60 * 60,
+    'news': 15 * 60,
+}
+
+# Who wrote an entry; hits on warm-up entries are counted separately
+SOURCE_REQUEST = 'request'
+SOURCE_WARMUP = 'warmup'
+
+
+class ReportStore:
+    """
+    Fresh-or-nothing cache of report_worker sections, shared by every process on the box.
+
+    Interactive report runs read and fill it, and count each ticker they serve.
+    warmup.py fills it ahead of demand and uses those counts to decide what to
+    refresh first. Every interactive lookup is tallied per day and section, so
+    the share answered by warm-up entries can be reported.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, ttlSeconds: Optional[Dict[str, int]] = None,
+                 maxEntries: int = 2000):
+        """
+        Initialize the store
+
+        Args:
+            path: SQLite file backing the store
+            ttlSeconds: Freshness per section (default: SECTION_TTLS)
+            maxEntries: Entries kept before least recently fetched are evicted
+        """
+        self.path = path
+        self.ttlSeconds = {**SECTION_TTLS, **(ttlSeconds or {})}
+        self.maxEntries = maxEntries
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS report_sections (
+                    key TEXT PRIMARY KEY,
+                    section TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    source TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS report_sections_age ON report_sections (fetched_at);
+                CREATE TABLE IF NOT EXISTS report_requests (
+                    ticker TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (ticker, day)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS report_lookups (
+                    day TEXT NOT NULL,
+                    section TEXT NOT NULL,
+                    lookups INTEGER NOT NULL,
+                    hits INTEGER NOT NULL,
+                    warm_hits INTEGER NOT NULL,
+                    PRIMARY KEY (day, section)
+                ) WITHOUT ROWID;
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, commit on success and always close it"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def makeKey(section: str, ticker: str, **params) -> str:
+        """Cache key for one section of one ticker's report"""
+        normalizedParams = {k: v for k, v in sorted(params.items()) if v is not None}
+        return json.dumps([section, ticker.upper(), normalizedParams], separators=(',', ':'))
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Tuple[object, float, str]]:
+        """Get a stored payload, its age in seconds and its source, fresh or stale"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, fetched_at, source FROM report_sections WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0]), time.time() - row[1], row[2]
+
+    def entriesSince(self, sections: List[str], since: float = 0.0) -> List[Tuple[str, str, str, object, float]]:
+        """
+        Entries of some sections fetched after a point in time, oldest first
+
+        Returns:
+            (key, section, ticker, payload, fetched_at) tuples
+        """
+        placeholders = ', '.join('?' * len(sections))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT key, section, ticker, payload, fetched_at FROM report_sections "
+                f"WHERE section IN ({placeholders}) AND fetched_at > ? ORDER BY fetched_at",
+                (*sections, since)
+            ).fetchall()
+        return [(key, section, ticker, json.loads(payload), fetchedAt)
+                for key, section, ticker, payload, fetchedAt in rows]
+
+    def isFresh(self, section: str, age: float) -> bool:
+        return age < self.ttlSeconds.get(section, 0)
+
+    def put(self, key: str, section: str, ticker: str, payload, source: str = SOURCE_REQUEST):
+        """Store a section payload and evict the oldest entries over the limit"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO report_sections (key, section, ticker, payload, fetched_at, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, section, ticker.upper(), json.dumps(payload, allow_nan=False), time.time(), source)
+            )
+            conn.execute("""
+                DELETE FROM report_sections WHERE key IN (
+                    SELECT key FROM report_sections ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.maxEntries,))
+
+    def lookup(self, section: str, key: str):
+        """
+        Get a fresh payload for an interactive request, tallying the outcome
+
+        Returns:
+            The payload, or None on a miss or stale entry
+        """
+        cached = self.get(key)
+        hit = cached is not None and self.isFresh(section, cached[1])
+        warmHit = hit and cached[2] == SOURCE_WARMUP
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO report_lookups (day, section, lookups, hits, warm_hits) VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (day, section) DO UPDATE SET
+                    lookups = lookups + 1, hits = hits + excluded.hits, warm_hits = warm_hits + excluded.warm_hits
+            """, (self._today(), section, int(hit), int(warmHit)))
+        return cached[0] if hit else None
+
+    # ------------------------------------------------------------------
+    # Demand
+    # ------------------------------------------------------------------
+
+    def recordRequest(self, ticker: str):
+        """Count one interactive report for ticker"""
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO report_requests (ticker, day, count) VALUES (?, ?, 1)
+                ON CONFLICT (ticker, day) DO UPDATE SET count = count + 1
+            """, (ticker.upper(), self._today()))
+
+    def requestFrequency(self, days: int = 14, halfLifeDays: float = 2.0) -> Dict[str, float]:
+        """
+        Recent demand per ticker, with each day's count decayed by its age
+
+        Args:
+            days: Days of history considered
+            halfLifeDays: Age at which a request counts half as much as one today
+
+        Returns:
+            Weighted request count by ticker, highest first
+        """
+        today = datetime.now(timezone.utc).date()
+        since = (today - timedelta(days=days)).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ticker, day, count FROM report_requests WHERE day >= ?", (since,)
+            ).fetchall()
+            conn.execute("DELETE FROM report_requests WHERE day < ?", (since,))
+
+        scores: Dict[str, float] = {}
+        for ticker, day, count in rows:
+            age = (today - datetime.strptime(day, '%Y-%m-%d').date()).days
+            scores[ticker] = scores.get(ticker, 0.0) + count * math.pow(0.5, age / halfLifeDays)
+        return dict(sorted(scores.items(), key=lambda item: -item[1]))
+
+    # ------------------------------------------------------------------
+    # Hit rates
+    # ------------------------------------------------------------------
+
+    def hitRates(self, days: int = 1) -> List[Dict]:
+        """Interactive lookups, hits and warm-up hits per day and section, newest first"""
+        since = (datetime.now(timezone.utc).date() - timedelta(days=days - 1)).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT day, section, lookups, hits, warm_hits FROM report_lookups
+                WHERE day >= ? ORDER BY day DESC, section
+            """, (since,)).fetchall()
+
+        return [{
+            'day': day,
+            'section': section,
+            'lookups': lookups,
+            'hits': hits,
+            'warmHits': warmHits,
+            'hitRate': round(hits / lookups, 3) if lookups else None,
+            'warmHitRate': round(warmHits / lookups, 3) if lookups else None,
+        } for day, section, lookups, hits, warmHits in rows]
@@ -0,0 +1,175 @@
+"""
+Report Worker
+Fetch every section of a ticker report concurrently and stream each one as it finishes
+
+Writes one JSON object per line (NDJSON) to stdout:
+    {"section": "news", "ok": true, "cached": false, "ms": 412.3, "data": [...]}
+    {"section": "sec", "ok": false, "ms": 980.1, "error": "..."}
+
+Fresh sections are served from the on-disk report store, which warmup.py fills ahead of demand.
+
+Usage:
+    python report_worker.py AAPL [--sections stock sec news chart] [--company-name Apple] [--period 1y]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import wire
+from report_store import SOURCE_REQUEST, ReportStore
+from tracing import span
+
+SECTIONS = ['stock', 'sec', 'news', 'chart']
+NUM_ARTICLES = 10
+
+
+def fetchStock(ticker: str, options: argparse.Namespace):
+    from main import build_stock_data
+    return build_stock_data(ticker)
+
+
+def fetchSec(ticker: str, options: argparse.Namespace):
+    from sec_data_fetcher import SecDataFetcher
+    fetcher = SecDataFetcher(ticker)
+    report = fetcher.getReport()
+    # The report still renders (as notes) without filings; don't cache that as a result
+    if fetcher.companyFacts is None:
+        raise RuntimeError(f"SEC filings not available for {ticker}")
+    return report
+
+
+def fetchNews(ticker: str, options: argparse.Namespace):
+    apiKey = os.getenv('NEWS_API_KEY')
+    if not apiKey:
+        raise RuntimeError("NEWS_API_KEY not configured. Please add it to your .env file")
+
+    from news_fetcher import NewsFetcher
+    return NewsFetcher(apiKey).getStockNews(ticker, options.company_name, NUM_ARTICLES)
+
+
+def fetchChart(ticker: str, options: argparse.Namespace):
+    apiKey = os.getenv('FINNHUB_API_KEY')
+    if not apiKey:
+        raise RuntimeError("FINNHUB_API_KEY not configured. Please add it to your .env file")
+
+    from finnhub_chart_fetcher import PERIODS, fetch_chart_data_finnhub
+    resolution, days = PERIODS.get(options.period, ('D', 365))
+    result = fetch_chart_data_finnhub(ticker, apiKey, resolution, days)
+    if not result.get('success'):
+        raise RuntimeError(result.get('error', 'No chart data available'))
+    return result
+
+
+FETCHERS: Dict[str, Callable] = {
+    'stock': fetchStock,
+    'sec': fetchSec,
+    'news': fetchNews,
+    'chart': fetchChart,
+}
+
+
+def sectionKey(name: str, ticker: str, options: argparse.Namespace) -> str:
+    """Store key for a section; only the options that change its content are included"""
+    if name == 'news':
+        return ReportStore.makeKey(name, ticker, companyName=options.company_name)
+    if name == 'chart':
+        return ReportStore.makeKey(name, ticker, period=options.period)
+    return ReportStore.makeKey(name, ticker)
+
+
+def loadSection(name: str, ticker: str, options: argparse.Namespace, store: Optional[ReportStore] = None,
+                source: str = SOURCE_REQUEST):
+    """
+    Fetch one section and save it to the store
+
+    Args:
+        name: Section name from SECTIONS
+        ticker: Stock ticker symbol
+        options: Parsed command line options (company name, chart period)
+        store: Report store to write, or None to skip it
+        source: Recorded as the entry's writer (interactive request or warm-up)
+
+    Returns:
+        Section payload
+    """
+    with span(f"report.{name}", ticker=ticker):
+        data = FETCHERS[name](ticker, options)
+    if store is not None:
+        store.put(sectionKey(name, ticker, options), name, ticker, data, source)
+    return data
+
+
+def runSection(name: str, ticker: str, options: argparse.Namespace, store: Optional[ReportStore] = None) -> bytes:
+    """Serve one section from the store or its fetcher and encode its record, turning failures into an error record"""
+    started = time.perf_counter()
+    try:
+        data = store.lookup(name, sectionKey(name, ticker, options)) if store is not None else None
+        cached = data is not None
+        if not cached:
+            data = loadSection(name, ticker, options, store)
+        with span("serialize", section=name):
+            return encode({'section': name, 'ok': True, 'cached': cached, 'ms': elapsedMs(started), 'data': data})
+    except Exception as e:
+        return encode({'section': name, 'ok': False, 'ms': elapsedMs(started), 'error': str(e)})
+
+
+def elapsedMs(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def encode(record: Dict) -> bytes:
+    # Always compact: one record per line, and NaN never reaches the browser's JSON.parse
+    return wire.dumps(record, compact=True)
+
+
+def streamReport(ticker: str, sections: List[str], options: argparse.Namespace, out=None,
+                 store: Optional[ReportStore] = None):
+    """
+    Fetch the sections on a thread pool and write each record as soon as it is ready
+
+    Args:
+        ticker: Stock ticker symbol
+        sections: Section names from SECTIONS
+        options: Parsed command line options (company name, chart period)
+        out: Stream for the NDJSON lines, text or binary (default: stdout)
+        store: Report store to serve fresh sections from and save new ones to
+    """
+    out = out or sys.stdout
+    buffer = getattr(out, 'buffer', out)
+    with ThreadPoolExecutor(max_workers=len(sections)) as executor:
+        futures = [executor.submit(runSection, name, ticker, options, store) for name in sections]
+        for future in as_completed(futures):
+            buffer.write(future.result() + b'\n')
+            buffer.flush()
+
+
+def parseArgs(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream a combined ticker report as NDJSON")
+    parser.add_argument('ticker')
+    parser.add_argument('--sections', nargs='+', default=SECTIONS, choices=SECTIONS)
+    parser.add_argument('--company-name', default=None)
+    parser.add_argument('--period', default='1y', help="chart period, e.g. 1mo, 1y, 5y")
+    parser.add_argument('--no-store', action='store_true', help="always call the providers")
+    return parser.parse_args(argv)
+
+
+def main():
+    options = parseArgs()
+    ticker = options.ticker.strip().upper()
+
+    # The fetchers report problems with print(); keep stdout for the NDJSON stream only
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    store = None
+    if not options.no_store:
+        store = ReportStore()
+        store.recordRequest(ticker)
+    streamReport(ticker, list(dict.fromkeys(options.sections)), options, out, store)
+
+
+if __name__ == "__main__":
+    main()
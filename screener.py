@@ -0,0 +1,511 @@
+"""
+Stock Screener
+Filter every cached ticker at once with expressions over report fields, SEC metrics and indicators
+
+    python screener.py screen "salesGrowth.Q1 > 20 and grossMargin > 50 and rsi < 30" [--sort=-rsi] [--limit 50]
+    python screener.py fields                   # what expressions can use
+    python screener.py bench --names 5000       # compile and evaluation time on a synthetic universe
+
+The panel (one row per ticker, one column per field) is rebuilt incrementally from the
+report store: only sections fetched since the last build are read. Rows outlive store
+eviction, so the universe grows with everything warm-up and interactive requests fetch.
+"""
+
+import argparse
+import ast
+import difflib
+import os
+import sys
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import wire
+from report_store import ReportStore
+from sec_data_fetcher import REPORT_METRICS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PANEL_PATH = os.path.join(BASE_DIR, '.cache', 'screen_panel.pkl')
+
+# Quarterly series from the stock section: field -> (report list, value key, quarters).
+# Columns are '<field>.Q1' (latest) to '.Qn'; a bare field name means Q1.
+STOCK_SERIES = {
+    'salesGrowth': ('salesGrowth', 'growth', 3),
+    'fcfGrowth': ('fcfGrowth', 'growth', 4),
+    'grossMargin': ('grossMargins', 'margin', 4),
+    'earningsSurprise': ('earningsSurprise', 'surprise', 4),
+}
+STOCK_SCALARS = {
+    'price': ('companyInfo', 'price'),
+    'marketCap': ('companyInfo', 'marketCap'),
+    'shortPercentOfFloat': ('shortInterest', 'shortPercentOfFloat'),
+    'sharesShort': ('shortInterest', 'sharesShort'),
+    'daysToCover': ('shortInterest', 'daysToCover'),
+}
+STOCK_TEXT = {'name': 'name', 'sector': 'sector', 'industry': 'industry'}
+
+SEC_QUARTERS = 3
+
+# Latest value of each daily chart indicator, plus the last close
+CHART_INDICATORS = ['sma20', 'sma50', 'ema12', 'ema26', 'rsi', 'macd', 'macdSignal', 'macdHistogram',
+                    'bbUpper', 'bbMiddle', 'bbLower']
+CHART_RESOLUTION = 'D'
+
+TEXT_COLUMNS = list(STOCK_TEXT)
+SECTION_COLUMNS = {
+    'stock': [f"{field}.Q{q}" for field, (_, _, quarters) in STOCK_SERIES.items() for q in range(1, quarters + 1)]
+             + list(STOCK_SCALARS) + TEXT_COLUMNS,
+    'sec': [f"{metric}.Q{q}" for metric in REPORT_METRICS for q in range(1, SEC_QUARTERS + 1)],
+    'chart': CHART_INDICATORS + ['close'],
+}
+COLUMNS = [column for columns in SECTION_COLUMNS.values() for column in columns]
+
+FUNCTIONS = {'abs': np.abs, 'isna': pd.isna, 'notna': pd.notna}
+
+
+def _number(value) -> float:
+    """Float for numeric report values; 'N/A', None and text become NaN"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+def stockFields(payload: Dict) -> Dict:
+    """Panel fields from a main.py stock report"""
+    fields = {}
+    for field, (listName, valueKey, quarters) in STOCK_SERIES.items():
+        entries = payload.get(listName) or []
+        for q in range(quarters):
+            fields[f"{field}.Q{q + 1}"] = _number(entries[q].get(valueKey)) if q < len(entries) else np.nan
+    for field, (group, key) in STOCK_SCALARS.items():
+        fields[field] = _number((payload.get(group) or {}).get(key))
+    for field, key in STOCK_TEXT.items():
+        value = (payload.get('companyInfo') or {}).get(key)
+        fields[field] = value if isinstance(value, str) and value != 'N/A' else None
+    return fields
+
+
+def secFields(payload) -> Dict:
+    """Panel fields from the SEC section's metrics; entries stored as bare report text have none"""
+    return dict(payload.get('secMetrics') or {}) if isinstance(payload, dict) else {}
+
+
+def chartFields(payload: Dict) -> Optional[Dict]:
+    """Panel fields from a daily chart payload; None for other resolutions"""
+    if payload.get('interval') != CHART_RESOLUTION:
+        return None
+    indicators = payload.get('indicators') or {}
+    fields = {name: _number(indicators[name][-1]['value']) if indicators.get(name) else np.nan
+              for name in CHART_INDICATORS}
+    fields['close'] = _number(payload.get('currentPrice'))
+    return fields
+
+
+EXTRACTORS: Dict[str, Callable] = {'stock': stockFields, 'sec': secFields, 'chart': chartFields}
+
+
+class ScreenPanel:
+    """
+    Cross-sectional panel: one row per ticker, float columns per field and text columns
+    for name, sector and industry. Persisted as a pickle next to the report store.
+    """
+
+    def __init__(self, frame: Optional[pd.DataFrame] = None, builtAt: float = 0.0):
+        self.frame = frame if frame is not None else self.emptyFrame()
+        self.builtAt = builtAt
+        self._arrays = None
+
+    @staticmethod
+    def emptyFrame(tickers=()) -> pd.DataFrame:
+        frame = pd.DataFrame(np.nan, index=pd.Index(list(tickers), name='ticker'), columns=COLUMNS)
+        frame[TEXT_COLUMNS] = frame[TEXT_COLUMNS].astype(object)
+        return frame
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PANEL_PATH) -> 'ScreenPanel':
+        """Read a saved panel, or start an empty one"""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            frame = pd.read_pickle(path)
+            return cls(frame.reindex(columns=COLUMNS), frame.attrs.get('builtAt', 0.0))
+        except Exception as e:
+            print(f"Error reading screen panel, rebuilding: {e}", file=sys.stderr)
+            return cls()
+
+    def save(self, path: str = DEFAULT_PANEL_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.frame.attrs['builtAt'] = self.builtAt
+        temporary = f"{path}.tmp"
+        self.frame.to_pickle(temporary)
+        os.replace(temporary, path)
+
+    def refresh(self, store: ReportStore) -> int:
+        """
+        Apply sections fetched since the last build
+
+        A refreshed section replaces all of its ticker's columns for that section,
+        so fields missing from the new payload become NaN.
+
+        Returns:
+            Section entries applied
+        """
+        latest: Dict[Tuple[str, str], Dict] = {}
+        newest = self.builtAt
+        for _, section, ticker, payload, fetchedAt in store.entriesSince(list(EXTRACTORS), self.builtAt):
+            newest = max(newest, fetchedAt)
+            fields = EXTRACTORS[section](payload)
+            if fields is not None:
+                latest[(section, ticker)] = fields
+        self.builtAt = newest
+        if not latest:
+            return 0
+
+        tickers = sorted({ticker for _, ticker in latest})
+        missing = [ticker for ticker in tickers if ticker not in self.frame.index]
+        if missing:
+            self.frame = pd.concat([self.frame, self.emptyFrame(missing)])
+
+        for section, columns in SECTION_COLUMNS.items():
+            rows = {ticker: fields for (name, ticker), fields in latest.items() if name == section}
+            if not rows:
+                continue
+            update = pd.DataFrame.from_dict(rows, orient='index').reindex(columns=columns)
+            numeric = [column for column in columns if column not in TEXT_COLUMNS]
+            self.frame.loc[update.index, numeric] = update[numeric].astype(float).to_numpy()
+            for column in columns:
+                if column in TEXT_COLUMNS:
+                    self.frame.loc[update.index, column] = update[column].to_numpy()
+        self._arrays = None
+        return len(latest)
+
+    @property
+    def tickers(self) -> np.ndarray:
+        return self.frame.index.to_numpy()
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Column arrays the compiled expressions read, built once per refresh"""
+        if self._arrays is None:
+            self._arrays = {column: self.frame[column].to_numpy() for column in self.frame.columns}
+        return self._arrays
+
+
+def loadPanel(store: Optional[ReportStore] = None, path: str = DEFAULT_PANEL_PATH) -> ScreenPanel:
+    """Saved panel brought up to date with the report store"""
+    panel = ScreenPanel.load(path)
+    if panel.refresh(store or ReportStore()):
+        panel.save(path)
+    return panel
+
+
+# ----------------------------------------------------------------------
+# Expressions
+# ----------------------------------------------------------------------
+
+COMPARISONS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+    ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+ARITHMETIC = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+    ast.Mod: np.mod, ast.Pow: np.power,
+}
+
+
+def _fieldName(node: ast.AST) -> Optional[str]:
+    """'salesGrowth.Q1' for Attribute(Name('salesGrowth'), 'Q1'), 'rsi' for Name('rsi')"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _fieldName(node.value)
+        return f"{parent}.{node.attr}" if parent else None
+    return None
+
+
+def resolveField(name: str) -> str:
+    """Panel column for a field name; a bare series name means its latest quarter"""
+    for candidate in (name, f"{name}.Q1"):
+        if candidate in COLUMNS:
+            return candidate
+    suggestions = difflib.get_close_matches(name, COLUMNS, n=3)
+    hint = f"; did you mean {', '.join(suggestions)}?" if suggestions else ""
+    raise ValueError(f"Unknown field '{name}'{hint}")
+
+
+class Screen:
+    """
+    A filter expression compiled to column operations.
+
+    Expressions use Python syntax: and/or/not, comparisons (chained too), arithmetic,
+    `in [...]` for text fields and abs()/isna()/notna(). Missing values fail every
+    comparison, so a ticker without a field never passes a filter on it (but does
+    pass its negation with `not`).
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.fields: List[str] = []
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {e.msg}") from None
+        self._evaluate = self._compile(tree.body, condition=True)
+
+    def __call__(self, arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        """Boolean mask of rows passing the filter"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            try:
+                result = self._evaluate(arrays)
+            except TypeError as e:
+                raise ValueError(f"Cannot evaluate {self.expression!r}: {e}") from None
+        return np.asarray(result, dtype=bool)
+
+    def _resolve(self, name: str) -> str:
+        column = resolveField(name)
+        if column not in self.fields:
+            self.fields.append(column)
+        return column
+
+    def _compile(self, node: ast.AST, condition: bool = False) -> Callable:
+        """Turn an AST node into a function of the column arrays"""
+        if condition and not self._isCondition(node):
+            raise ValueError(f"'{ast.unparse(node)}' is not a condition")
+
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value, condition=True) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+            def boolOp(arrays):
+                result = parts[0](arrays)
+                for part in parts[1:]:
+                    result = combine(result, part(arrays))
+                return result
+            return boolOp
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand, condition=isinstance(node.op, ast.Not))
+            if isinstance(node.op, ast.Not):
+                return lambda arrays: np.logical_not(operand(arrays))
+            if isinstance(node.op, ast.USub):
+                return lambda arrays: np.negative(operand(arrays))
+            if isinstance(node.op, ast.UAdd):
+                return operand
+
+        if isinstance(node, ast.Compare):
+            return self._compileCompare(node)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC:
+            left, right, op = self._compile(node.left), self._compile(node.right), ARITHMETIC[type(node.op)]
+            return lambda arrays: op(left(arrays), right(arrays))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+            if len(node.args) != 1 or node.keywords:
+                raise ValueError(f"{node.func.id}() takes one argument")
+            function, argument = FUNCTIONS[node.func.id], self._compile(node.args[0])
+            return lambda arrays: function(argument(arrays))
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) \
+                and not isinstance(node.value, bool):
+            value = node.value
+            return lambda arrays: value
+
+        name = _fieldName(node)
+        if name:
+            column = self._resolve(name)
+            return lambda arrays: arrays[column]
+
+        raise ValueError(f"Unsupported syntax in expression: '{ast.unparse(node)}'")
+
+    def _compileCompare(self, node: ast.Compare) -> Callable:
+        operands = [self._compile(node.left)]
+        steps = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)) or not all(
+                        isinstance(element, ast.Constant) for element in comparator.elts):
+                    raise ValueError("'in' needs a list of constants, e.g. sector in ['Technology', 'Energy']")
+                values = np.array([element.value for element in comparator.elts], dtype=object)
+                invert = isinstance(op, ast.NotIn)
+                steps.append(lambda left, right, values=values, invert=invert:
+                             np.isin(left, values, invert=invert))
+                operands.append(lambda arrays: None)
+            elif type(op) in COMPARISONS:
+                steps.append(COMPARISONS[type(op)])
+                operands.append(self._compile(comparator))
+            else:
+                raise ValueError(f"Unsupported comparison in expression: '{ast.unparse(node)}'")
+
+        def compare(arrays):
+            values = [operand(arrays) for operand in operands]
+            result = None
+            for i, step in enumerate(steps):
+                passed = step(values[i], values[i + 1])
+                result = passed if result is None else np.logical_and(result, passed)
+            return result
+        return compare
+
+    @staticmethod
+    def _isCondition(node: ast.AST) -> bool:
+        if isinstance(node, (ast.BoolOp, ast.Compare)):
+            return True
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return True
+        return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ('isna', 'notna')
+
+
+@lru_cache(maxsize=256)
+def compileScreen(expression: str) -> Screen:
+    return Screen(expression)
+
+
+def _jsonValue(value):
+    return None if isinstance(value, float) and value != value else value
+
+
+def screen(panel: ScreenPanel, expression: str, sort: Optional[str] = None, limit: Optional[int] = None,
+           columns: Optional[List[str]] = None) -> Dict:
+    """
+    Run a filter over the panel
+
+    Args:
+        panel: Cross-sectional panel
+        expression: Filter, e.g. "salesGrowth.Q1 > 20 and rsi < 30"
+        sort: Field to order by, '-' prefix for descending (missing values last)
+        limit: Most rows returned
+        columns: Fields returned per row (default: name plus the fields the expression uses)
+
+    Returns:
+        {'expression', 'universe', 'matches', 'ms', 'rows': [{'ticker', field: value, ...}]}
+    """
+    started = time.perf_counter()
+    compiled = compileScreen(expression)
+    arrays = panel.arrays
+    matched = np.flatnonzero(compiled(arrays))
+
+    sortColumn = resolveField(sort.lstrip('-+')) if sort else None
+    if sortColumn:
+        order = pd.Series(arrays[sortColumn][matched]).sort_values(
+            ascending=not sort.startswith('-'), na_position='last', kind='stable').index.to_numpy()
+        matched = matched[order]
+    total = len(matched)
+    if limit is not None:
+        matched = matched[:limit]
+
+    fields = [resolveField(field) for field in columns] if columns else ['name'] + compiled.fields
+    fields = list(dict.fromkeys(fields + ([sortColumn] if sortColumn else [])))
+    values = {field: arrays[field][matched].tolist() for field in fields}
+    rows = [{'ticker': ticker, **{field: _jsonValue(values[field][i]) for field in fields}}
+            for i, ticker in enumerate(panel.tickers[matched].tolist())]
+    return {
+        'expression': expression,
+        'universe': len(panel.tickers),
+        'matches': total,
+        'ms': round((time.perf_counter() - started) * 1000, 2),
+        'rows': rows,
+    }
+
+
+# ----------------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------------
+
+def syntheticPanel(names: int, seed: int = 0) -> ScreenPanel:
+    """Random panel with every column filled, for timing"""
+    rng = np.random.default_rng(seed)
+    frame = ScreenPanel.emptyFrame([f"SYN{i:05d}" for i in range(names)])
+    for column in COLUMNS:
+        if column in TEXT_COLUMNS:
+            frame[column] = rng.choice(['Technology', 'Healthcare', 'Energy', 'Financial Services'], names)
+        elif column == 'rsi':
+            frame[column] = rng.uniform(0, 100, names)
+        else:
+            frame[column] = rng.normal(10, 30, names)
+    # Some gaps, as in real coverage
+    numeric = [column for column in COLUMNS if column not in TEXT_COLUMNS]
+    values = frame[numeric].to_numpy()
+    values[rng.random(values.shape) < 0.05] = np.nan
+    frame[numeric] = values
+    return ScreenPanel(frame, time.time())
+
+
+def bench(args: argparse.Namespace):
+    panel = syntheticPanel(args.names, args.seed)
+    panel.arrays
+
+    started = time.perf_counter()
+    Screen(args.expression)
+    compileMs = (time.perf_counter() - started) * 1000
+
+    compiled = compileScreen(args.expression)
+    samples, fullSamples = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        mask = compiled(panel.arrays)
+        samples.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        result = screen(panel, args.expression, sort=args.sort, limit=args.limit)
+        fullSamples.append((time.perf_counter() - started) * 1000)
+
+    print(f"{args.names:,} names, {len(COLUMNS)} columns: {args.expression}")
+    print(f"  compile {compileMs:.2f} ms, filter median {np.median(samples):.3f} ms "
+          f"(p95 {np.percentile(samples, 95):.3f}), screen with sort and rows median {np.median(fullSamples):.3f} ms")
+    print(f"  {int(mask.sum())} matches")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen cached tickers with filter expressions")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    screenParser = sub.add_parser('screen', help="run a filter expression")
+    screenParser.add_argument('expression')
+    screenParser.add_argument('--sort', help="field to order by, '-' prefix for descending (write --sort=-field)")
+    screenParser.add_argument('--limit', type=int, default=100)
+    screenParser.add_argument('--columns', nargs='+', help="fields to return")
+    screenParser.add_argument('--json', action='store_true', help="print the result as JSON")
+
+    sub.add_parser('fields', help="list the fields expressions can use")
+
+    benchParser = sub.add_parser('bench', help="time a filter on a synthetic universe")
+    benchParser.add_argument('--names', type=int, default=5000)
+    benchParser.add_argument('--expression',
+                             default="salesGrowth.Q1 > 20 and grossMargin > 50 and rsi < 30 and shortPercentOfFloat > 10")
+    benchParser.add_argument('--sort', default='-salesGrowth')
+    benchParser.add_argument('--limit', type=int, default=100)
+    benchParser.add_argument('--runs', type=int, default=200)
+    benchParser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'fields':
+        for section, columns in SECTION_COLUMNS.items():
+            print(f"{section}: {', '.join(columns)}")
+        return
+    if args.command == 'bench':
+        bench(args)
+        return
+
+    panel = loadPanel()
+    try:
+        result = screen(panel, args.expression, args.sort, args.limit, args.columns)
+    except ValueError as e:
+        if args.json:
+            wire.write({'success': False, 'error': str(e)})
+        else:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.json:
+        wire.write({'success': True, **result})
+        return
+    print(f"{result['matches']} of {result['universe']} tickers match ({result['ms']} ms)")
+    for row in result['rows']:
+        values = ' '.join(f"{field}={value}" for field, value in row.items() if field != 'ticker')
+        print(f"  {row['ticker']:<8} {values}")
+
+
+if __name__ == "__main__":
+    main()
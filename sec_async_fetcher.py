@@ -0,0 +1,209 @@
+"""
+Async SEC Data Fetcher
+Fetches SEC Edgar financial data for many tickers concurrently
+"""
+
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+from provider_http import getSession
+from sec_data_fetcher import KNOWN_CIKS, SecDataFetcher
+
+
+def extractMetrics(ticker: str, cik: str, rawFacts: bytes, numQuarters: int = 3) -> Dict:
+    """
+    Parse a companyfacts payload and compute the report metrics
+
+    Runs in a worker process so JSON parsing and the metric passes do not
+    stall the event loop that drives the downloads.
+
+    Args:
+        ticker: Stock ticker symbol
+        cik: Zero-padded CIK the facts belong to
+        rawFacts: Raw companyfacts response body
+        numQuarters: Number of quarters per metric (default: 3)
+
+    Returns:
+        Dictionary with the sales, earnings and EBITDA sections
+    """
+    fetcher = SecDataFetcher(ticker)
+    fetcher.cik = cik
+    fetcher.companyFacts = json.loads(rawFacts)
+
+    # SecDataFetcher reports missing concepts on stdout; keep that off the results
+    with contextlib.redirect_stdout(sys.stderr):
+        return {
+            'ticker': fetcher.ticker,
+            'cik': cik,
+            'salesGrowth': fetcher.getSalesGrowth(numQuarters),
+            'earningsGrowth': fetcher.getEarningsGrowth(numQuarters),
+            'ebitdaMargins': fetcher.getEbitdaMargins(numQuarters)
+        }
+
+
+class AsyncSecDataFetcher:
+    """
+    Fetch SEC Edgar data for a list of tickers under the SEC rate limit.
+
+    The limit itself (10 requests per second, SEC fair access policy) is the
+    per-host token bucket in provider_http's HOST_POLICIES, shared with every
+    other SEC call in the process; this class only caps concurrency.
+    """
+
+    def __init__(self, maxConcurrency: int = 8, timeout: float = 30.0):
+        """
+        Initialize the async fetcher
+
+        Args:
+            maxConcurrency: Maximum downloads in flight at once
+            timeout: Per-request timeout in seconds
+        """
+        self.baseUrl = "https://data.sec.gov"
+        self.tickersUrl = "https://www.sec.gov/files/company_tickers.json"
+        # SEC requires a User-Agent header; compression and retries come from the shared session
+        self.headers = {
+            'User-Agent': 'Research Analyst research@example.com'
+        }
+        self.maxConcurrency = maxConcurrency
+        self.timeout = timeout
+        self.tickerToCik: Optional[Dict[str, str]] = None
+
+        self._session = getSession()
+        self._ioPool = ThreadPoolExecutor(max_workers=maxConcurrency)
+
+    async def _get(self, url: str, semaphore: asyncio.Semaphore) -> Optional[bytes]:
+        """Download one URL off the event loop, returning None on 404 (the session paces it per host)"""
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            response = await loop.run_in_executor(
+                self._ioPool,
+                lambda: self._session.get(url, headers=self.headers, timeout=self.timeout)
+            )
+
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.content
+
+    async def _loadTickerMap(self, semaphore: asyncio.Semaphore) -> Dict[str, str]:
+        """Load the SEC ticker -> CIK table once for the whole batch"""
+        if self.tickerToCik is None:
+            mapping = dict(KNOWN_CIKS)
+            try:
+                raw = await self._get(self.tickersUrl, semaphore)
+                if raw:
+                    for entry in json.loads(raw).values():
+                        mapping[entry['ticker'].upper()] = str(entry['cik_str']).zfill(10)
+            except Exception as e:
+                print(f"Error loading SEC ticker table, using known CIKs only: {e}", file=sys.stderr)
+            self.tickerToCik = mapping
+
+        return self.tickerToCik
+
+    async def _fetchOne(self, ticker: str, numQuarters: int, semaphore: asyncio.Semaphore,
+                        executor: Executor) -> Dict:
+        """Download and process a single ticker, never raising"""
+        started = time.perf_counter()
+        result = {'ticker': ticker, 'cik': None}
+
+        try:
+            cik = self.tickerToCik.get(ticker)
+            if not cik:
+                result['error'] = f"Ticker {ticker} not found"
+                return result
+            result['cik'] = cik
+
+            factsUrl = f"{self.baseUrl}/api/xbrl/companyfacts/CIK{cik}.json"
+            rawFacts = await self._get(factsUrl, semaphore)
+            if rawFacts is None:
+                result['error'] = "No company facts available"
+                return result
+
+            loop = asyncio.get_running_loop()
+            metrics = await loop.run_in_executor(
+                executor, extractMetrics, ticker, cik, rawFacts, numQuarters
+            )
+            result.update(metrics)
+
+        except Exception as e:
+            result['error'] = str(e)
+
+        finally:
+            result['elapsedMs'] = round((time.perf_counter() - started) * 1000, 1)
+
+        return result
+
+    async def fetchMany(self, tickers: List[str], numQuarters: int = 3,
+                        executor: Optional[Executor] = None) -> AsyncIterator[Dict]:
+        """
+        Fetch SEC metrics for many tickers, yielding each as it completes
+
+        Args:
+            tickers: Stock ticker symbols
+            numQuarters: Number of quarters per metric (default: 3)
+            executor: Executor for metric extraction (default: a process pool)
+
+        Yields:
+            Per-ticker result dictionaries, in completion order; failures
+            carry an 'error' key instead of metrics
+        """
+        semaphore = asyncio.Semaphore(self.maxConcurrency)
+
+        ownExecutor = executor is None
+        if ownExecutor:
+            executor = ProcessPoolExecutor()
+
+        # Deduplicate while keeping the caller's order
+        uniqueTickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+
+        try:
+            await self._loadTickerMap(semaphore)
+            tasks = [
+                asyncio.ensure_future(self._fetchOne(t, numQuarters, semaphore, executor))
+                for t in uniqueTickers
+            ]
+            try:
+                for nextDone in asyncio.as_completed(tasks):
+                    yield await nextDone
+            finally:
+                for task in tasks:
+                    task.cancel()
+        finally:
+            if ownExecutor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def fetchAll(self, tickers: List[str], numQuarters: int = 3,
+                       executor: Optional[Executor] = None) -> Dict[str, Dict]:
+        """Fetch SEC metrics for many tickers and return them keyed by ticker"""
+        results = {}
+        async for result in self.fetchMany(tickers, numQuarters, executor):
+            results[result['ticker']] = result
+        return results
+
+    def close(self):
+        """Release the I/O threads (the shared session stays open for other fetchers)"""
+        self._ioPool.shutdown(wait=False)
+
+
+async def _run(tickers: List[str]):
+    fetcher = AsyncSecDataFetcher()
+    try:
+        async for result in fetcher.fetchMany(tickers):
+            print(json.dumps(result), flush=True)
+    finally:
+        fetcher.close()
+
+
+def main():
+    """Fetch SEC data for tickers given on the command line, one JSON line each"""
+    tickers = sys.argv[1:] or input("Enter ticker symbols: ").replace(',', ' ').split()
+    asyncio.run(_run(tickers))
+
+
+if __name__ == "__main__":
+    main()
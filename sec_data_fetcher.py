@@ -3,25 +3,46 @@ SEC Data Fetcher
 Uses SEC Edgar API to fetch quarterly financial data
 """
 
-import requests
 import json
 from typing import Dict, List, Optional
 
+import requests
+
+from provider_http import getSession
+from sec_point_in_time import AsOfFactIndex
+from tracing import span, traced
+
+# Known CIK mapping for common tickers, used when the SEC lookup fails
+# You can expand this list as needed
+KNOWN_CIKS = {
+    'AAPL': '0000320193',
+    'MSFT': '0000789019',
+    'GOOGL': '0001652044',
+    'GOOG': '0001652044',
+    'TSLA': '0001318605',
+    'META': '0001326801',
+    'AMZN': '0001018724',
+    'NVDA': '0001045810',
+    'PLTR': '0001321655',
+}
+
 
 class SecDataFetcher:
     """Fetch financial data from SEC Edgar API"""
 
-    def __init__(self, ticker: str):
+    def __init__(self, ticker: str, session: Optional[requests.Session] = None):
         self.ticker = ticker.upper()
         self.baseUrl = "https://data.sec.gov"
-        # SEC requires a User-Agent header
+        # SEC requires a User-Agent header; compression, timeouts and rate limits come from the session
         self.headers = {
-            'User-Agent': 'Research Analyst research@example.com',
-            'Accept-Encoding': 'gzip, deflate'
+            'User-Agent': 'Research Analyst research@example.com'
         }
+        self.session = session or getSession()
         self.cik = None
         self.companyFacts = None
+        self.asOfIndex = None
 
+    @traced("sec.getCik")
     def getCik(self) -> Optional[str]:
         """Get CIK (Central Index Key) for the ticker"""
         try:
@@ -31,7 +52,7 @@ class SecDataFetcher:
 
             # Try direct ticker lookup first
             try:
-                response = requests.get(submissionsUrl, headers=self.headers)
+                response = self.session.get(submissionsUrl, headers=self.headers)
                 if response.status_code == 200:
                     data = response.json()
                     self.cik = str(data['cik']).zfill(10)
@@ -40,21 +61,8 @@ class SecDataFetcher:
                 pass
 
             # If that fails, use a known CIK mapping for common tickers
-            # You can expand this list as needed
-            cikMapping = {
-                'AAPL': '0000320193',
-                'MSFT': '0000789019',
-                'GOOGL': '0001652044',
-                'GOOG': '0001652044',
-                'TSLA': '0001318605',
-                'META': '0001326801',
-                'AMZN': '0001018724',
-                'NVDA': '0001045810',
-                'PLTR': '0001321655',
-            }
-
-            if self.ticker in cikMapping:
-                self.cik = cikMapping[self.ticker]
+            if self.ticker in KNOWN_CIKS:
+                self.cik = KNOWN_CIKS[self.ticker]
                 return self.cik
 
             print(f"Ticker {self.ticker} not found. Please add CIK mapping.")
@@ -64,6 +72,7 @@ class SecDataFetcher:
             print(f"Error getting CIK: {e}")
             return None
 
+    @traced("sec.getCompanyFacts")
     def getCompanyFacts(self) -> Optional[Dict]:
         """Get all company facts from SEC"""
         if not self.cik:
@@ -75,16 +84,18 @@ class SecDataFetcher:
         try:
             # Get company facts JSON
             factsUrl = f"{self.baseUrl}/api/xbrl/companyfacts/CIK{self.cik}.json"
-            response = requests.get(factsUrl, headers=self.headers)
+            response = self.session.get(factsUrl, headers=self.headers)
             response.raise_for_status()
 
-            self.companyFacts = response.json()
+            with span("sec.parseJson", bytes=len(response.content)):
+                self.companyFacts = response.json()
             return self.companyFacts
 
         except Exception as e:
             print(f"Error getting company facts: {e}")
             return None
 
+    @traced("sec.getQuarterlyData")
     def getQuarterlyData(self, conceptName: str, units: str = "USD") -> List[Dict]:
         """
         Get quarterly data for a specific financial concept
@@ -142,6 +153,47 @@ class SecDataFetcher:
             print(f"Error getting quarterly data for {conceptName}: {e}")
             return []
 
+    @traced("sec.getAsOfIndex")
+    def getAsOfIndex(self) -> Optional[AsOfFactIndex]:
+        """Get the point-in-time index over all company facts (built once)"""
+        if self.asOfIndex is None:
+            if not self.companyFacts:
+                self.getCompanyFacts()
+
+            if not self.companyFacts:
+                return None
+
+            self.asOfIndex = AsOfFactIndex(self.companyFacts)
+
+        return self.asOfIndex
+
+    def getQuarterlyDataAsOf(self, conceptName: str, asOfDate: str, units: str = "USD") -> List[Dict]:
+        """
+        Get quarterly data for a concept as it was known on a given date
+
+        Unlike getQuarterlyData, each period appears once, using the latest
+        version filed on or before asOfDate, so restatements filed later
+        never leak into the result.
+
+        Args:
+            conceptName: XBRL concept name (e.g., 'Revenues', 'NetIncomeLoss')
+            asOfDate: Point in time (YYYY-MM-DD)
+            units: Unit of measurement (default: 'USD')
+
+        Returns:
+            List of quarterly data points - most recent first
+        """
+        index = self.getAsOfIndex()
+        if index is None:
+            return []
+
+        if not index.hasConcept(conceptName, units):
+            print(f"Concept '{conceptName}' ({units}) not found")
+            return []
+
+        return index.seriesAsOf(conceptName, asOfDate, units)
+
+    @traced("sec.getSalesGrowth")
     def getSalesGrowth(self, numQuarters: int = 3) -> Dict:
         """Get year-over-year sales growth for last N quarters"""
         # Try different revenue concept names
@@ -191,6 +243,7 @@ class SecDataFetcher:
 
         return results if results else {"error": "Insufficient data for Y/Y comparison"}
 
+    @traced("sec.getEarningsGrowth")
     def getEarningsGrowth(self, numQuarters: int = 3) -> Dict:
         """Get year-over-year earnings growth for last N quarters"""
         # Try different earnings concept names
@@ -242,6 +295,7 @@ class SecDataFetcher:
 
         return results if results else {"error": "Insufficient data for Y/Y comparison"}
 
+    @traced("sec.getEbitdaMargins")
     def getEbitdaMargins(self, numQuarters: int = 3) -> Dict:
         """Get EBITDA margins for last N quarters"""
         # EBITDA is not always directly reported, may need to calculate
@@ -296,53 +350,93 @@ class SecDataFetcher:
 
         return results if results else {"note": "EBITDA data not available"}
 
-    def printReport(self):
-        """Print formatted SEC data report"""
-        print(f"\n{'='*60}")
-        print(f"SEC DATA REPORT: {self.ticker}")
-        print(f"{'='*60}")
-
+    def getReportData(self, numQuarters: int = 3) -> Dict[str, Dict]:
+        """Sales growth, earnings growth and EBITDA margin results, keyed by metric name"""
         if not self.cik:
             self.getCik()
+        return {
+            'secSalesGrowth': self.getSalesGrowth(numQuarters),
+            'earningsGrowth': self.getEarningsGrowth(numQuarters),
+            'ebitdaMargin': self.getEbitdaMargins(numQuarters),
+        }
 
-        print(f"CIK: {self.cik}")
-        print()
+    @traced("sec.getReport")
+    def getReport(self) -> Dict:
+        """
+        Formatted report plus its percentages as numbers, as the report store keeps it
+
+        Returns:
+            {'report': formatReport text, 'secMetrics': {'secSalesGrowth.Q1': 6.07, ...}}
+        """
+        data = self.getReportData()
+        return {'report': self.formatReport(data), 'secMetrics': reportMetrics(data)}
+
+    @traced("sec.formatReport")
+    def formatReport(self, data: Optional[Dict[str, Dict]] = None) -> str:
+        """Formatted SEC data report, as printed by printReport (data: getReportData results, fetched if omitted)"""
+        data = data or self.getReportData()
+
+        rule = '=' * 60
+        lines = ["", rule, f"SEC DATA REPORT: {self.ticker}", rule, f"CIK: {self.cik}", ""]
 
         # Sales Growth
-        print(f"{'='*60}")
-        print("SALES GROWTH Y/Y (from SEC filings)")
-        print(f"{'='*60}")
-        salesGrowth = self.getSalesGrowth(3)
-        self._printDict(salesGrowth)
+        lines += [rule, "SALES GROWTH Y/Y (from SEC filings)", rule]
+        self._formatDict(data['secSalesGrowth'], lines)
 
         # Earnings Growth
-        print(f"\n{'='*60}")
-        print("EARNINGS GROWTH Y/Y (from SEC filings)")
-        print(f"{'='*60}")
-        earningsGrowth = self.getEarningsGrowth(3)
-        self._printDict(earningsGrowth)
+        lines += ["", rule, "EARNINGS GROWTH Y/Y (from SEC filings)", rule]
+        self._formatDict(data['earningsGrowth'], lines)
 
         # EBITDA Margins
-        print(f"\n{'='*60}")
-        print("EBITDA MARGINS (from SEC filings)")
-        print(f"{'='*60}")
-        ebitdaMargins = self.getEbitdaMargins(3)
-        self._printDict(ebitdaMargins)
+        lines += ["", rule, "EBITDA MARGINS (from SEC filings)", rule]
+        self._formatDict(data['ebitdaMargin'], lines)
+
+        lines += ["", rule, ""]
+        return "\n".join(lines)
 
-        print(f"\n{'='*60}\n")
+    def printReport(self):
+        """Print formatted SEC data report"""
+        print(self.formatReport())
 
-    def _printDict(self, data: Dict, indent: int = 0):
-        """Helper to print nested dictionaries"""
+    def _formatDict(self, data: Dict, lines: List[str], indent: int = 0):
+        """Helper to append nested dictionaries to the report lines"""
         if not isinstance(data, dict):
-            print(f"{' '*indent}{data}")
+            lines.append(f"{' '*indent}{data}")
             return
 
         for key, value in data.items():
             if isinstance(value, dict):
-                print(f"{' '*indent}{key}:")
-                self._printDict(value, indent + 2)
+                lines.append(f"{' '*indent}{key}:")
+                self._formatDict(value, lines, indent + 2)
             else:
-                print(f"{' '*indent}{key}: {value}")
+                lines.append(f"{' '*indent}{key}: {value}")
+
+
+# Metric name -> percentage field of each quarter in getReportData results
+REPORT_METRICS = {
+    'secSalesGrowth': 'yoyGrowth',
+    'earningsGrowth': 'yoyGrowth',
+    'ebitdaMargin': 'ebitdaMargin',
+}
+
+
+def reportMetrics(data: Dict[str, Dict]) -> Dict[str, float]:
+    """
+    Percentages from getReportData results, e.g. {'secSalesGrowth.Q1': 6.07, 'earningsGrowth.Q2': -3.1}
+
+    Args:
+        data: SecDataFetcher.getReportData results
+
+    Returns:
+        Metric values keyed by '<metric>.Q<n>'; metrics without data are left out
+    """
+    metrics = {}
+    for metric, field in REPORT_METRICS.items():
+        for label, values in (data.get(metric) or {}).items():
+            if isinstance(values, dict) and field in values:
+                # Labels read 'Q1 - FY2025 Q3'; values are formatted like '6.07%'
+                metrics[f"{metric}.{label.split(' ', 1)[0]}"] = float(values[field].rstrip('%'))
+    return metrics
 
 
 def main():
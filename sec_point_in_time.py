@@ -0,0 +1,230 @@
+"""
+SEC Point-in-Time Index
+As-of (filing date) lookups over SEC company facts, without lookahead
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class AsOfFactIndex:
+    """
+    Index every version of every reported period by the date it was filed.
+
+    Company facts keep each restatement of a period as a separate entry.
+    This index groups them by (concept, units) and period, and keeps the
+    versions of each period sorted by their `filed` date so a value can be
+    looked up exactly as it was known on a given day.
+    """
+
+    def __init__(self, companyFacts: Dict, taxonomy: str = "us-gaap"):
+        """
+        Build the index from a companyfacts JSON payload
+
+        Args:
+            companyFacts: Raw response of the SEC companyfacts endpoint
+            taxonomy: Fact taxonomy to index (default: 'us-gaap')
+        """
+        self.taxonomy = taxonomy
+        # (concept, units) -> {(start, end): ([filed...], [entry...])}
+        self._periods: Dict[Tuple[str, str], Dict[Tuple, Tuple[List[str], List[Dict]]]] = {}
+
+        facts = (companyFacts or {}).get('facts', {}).get(taxonomy, {})
+        for conceptName, concept in facts.items():
+            for units, items in concept.get('units', {}).items():
+                self._periods[(conceptName, units)] = self._buildPeriods(items)
+
+    @staticmethod
+    def _buildPeriods(items: Iterable[Dict]) -> Dict[Tuple, Tuple[List[str], List[Dict]]]:
+        """Group raw fact entries by period and sort each group by filed date"""
+        grouped: Dict[Tuple, List[Dict]] = {}
+        for item in items:
+            if not item.get('end') or not item.get('filed'):
+                continue
+            key = (item.get('start'), item['end'])
+            grouped.setdefault(key, []).append({
+                'date': item.get('end'),
+                'start': item.get('start'),
+                'fiscalYear': item.get('fy'),
+                'fiscalPeriod': item.get('fp'),
+                'value': item.get('val'),
+                'filed': item.get('filed'),
+                'form': item.get('form')
+            })
+
+        periods = {}
+        for key, versions in grouped.items():
+            # Stable sort keeps the SEC ordering for same-day amendments
+            versions.sort(key=lambda x: x['filed'])
+            periods[key] = ([v['filed'] for v in versions], versions)
+        return periods
+
+    def concepts(self) -> List[Tuple[str, str]]:
+        """List the (concept, units) pairs available in the index"""
+        return list(self._periods.keys())
+
+    def hasConcept(self, conceptName: str, units: str = "USD") -> bool:
+        """Check whether a concept is present in the index"""
+        return (conceptName, units) in self._periods
+
+    def versions(self, conceptName: str, end: str, units: str = "USD",
+                 start: Optional[str] = None) -> List[Dict]:
+        """
+        Get every filed version of one period, oldest filing first
+
+        Args:
+            conceptName: XBRL concept name (e.g., 'Revenues')
+            end: Period end date (YYYY-MM-DD)
+            units: Unit of measurement (default: 'USD')
+            start: Period start date, None for instant concepts
+
+        Returns:
+            List of versions sorted by filed date
+        """
+        periods = self._periods.get((conceptName, units), {})
+        entry = periods.get((start, end))
+        return list(entry[1]) if entry else []
+
+    def valueAsOf(self, conceptName: str, end: str, asOfDate: str, units: str = "USD",
+                  start: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get the version of one period that was current on a given date
+
+        Args:
+            conceptName: XBRL concept name (e.g., 'Revenues')
+            end: Period end date (YYYY-MM-DD)
+            asOfDate: Point in time (YYYY-MM-DD); filings on this date count as known
+            units: Unit of measurement (default: 'USD')
+            start: Period start date, None for instant concepts
+
+        Returns:
+            The latest version filed on or before asOfDate, or None
+        """
+        periods = self._periods.get((conceptName, units), {})
+        entry = periods.get((start, end))
+        if not entry:
+            return None
+
+        filedDates, versions = entry
+        i = bisect_right(filedDates, asOfDate)
+        return versions[i - 1] if i else None
+
+    def seriesAsOf(self, conceptName: str, asOfDate: str, units: str = "USD",
+                   quarterlyOnly: bool = True) -> List[Dict]:
+        """
+        Get one value per period as it was known on a given date
+
+        Args:
+            conceptName: XBRL concept name (e.g., 'Revenues')
+            asOfDate: Point in time (YYYY-MM-DD)
+            units: Unit of measurement (default: 'USD')
+            quarterlyOnly: Keep only 10-Q / Q1-Q3 entries, like getQuarterlyData
+
+        Returns:
+            List of data points sorted by period end - most recent first
+        """
+        periods = self._periods.get((conceptName, units), {})
+
+        series = []
+        for filedDates, versions in periods.values():
+            i = bisect_right(filedDates, asOfDate)
+            if not i:
+                continue
+            point = versions[i - 1]
+            if quarterlyOnly and not _isQuarterly(point):
+                continue
+            series.append(point)
+
+        series.sort(key=lambda x: x['date'], reverse=True)
+        return series
+
+    def asOfJoin(self, conceptName: str, dates: Iterable, units: str = "USD",
+                 quarterlyOnly: bool = True) -> pd.DataFrame:
+        """
+        As-of join a date grid against every period of a concept
+
+        Each cell holds the value of a period as it was known on the grid
+        date, or NaN if that period had not been filed yet. Lookups are done
+        with one vectorized searchsorted per period rather than per cell.
+        With quarterlyOnly, a cell is also NaN while the version known on its
+        date is not quarterly, the same rule as seriesAsOf.
+
+        Args:
+            conceptName: XBRL concept name (e.g., 'Revenues')
+            dates: Grid of point-in-time dates (anything pandas can parse)
+            units: Unit of measurement (default: 'USD')
+            quarterlyOnly: Keep only 10-Q / Q1-Q3 entries, like getQuarterlyData
+
+        Returns:
+            DataFrame indexed by grid date with one column per period end
+        """
+        grid = pd.DatetimeIndex(pd.to_datetime(list(dates))).normalize()
+        gridDays = grid.values.astype('datetime64[D]')
+        periods = self._periods.get((conceptName, units), {})
+
+        columns = {}
+        for (start, end), (filedDates, versions) in sorted(periods.items(), key=_periodSortKey):
+            if quarterlyOnly and not any(_isQuarterly(v) for v in versions):
+                continue
+
+            filed = np.array(filedDates, dtype='datetime64[D]')
+            values = np.array([np.nan if v['value'] is None else v['value'] for v in versions],
+                              dtype=float)
+            if quarterlyOnly:
+                # Judge each cell by the form of the version current on its date, not by any version
+                values[[not _isQuarterly(v) for v in versions]] = np.nan
+
+            idx = np.searchsorted(filed, gridDays, side='right') - 1
+            column = np.where(idx >= 0, values[np.clip(idx, 0, None)], np.nan)
+
+            # Periods sharing an end date (quarter vs YTD) are told apart by start
+            label = end if start is None else f"{start}/{end}"
+            columns[label] = column
+
+        return pd.DataFrame(columns, index=grid)
+
+    def latestAsOfJoin(self, conceptName: str, dates: Iterable, units: str = "USD",
+                       quarterlyOnly: bool = True) -> pd.DataFrame:
+        """
+        For each grid date, get the most recent period known and its value
+
+        Args:
+            conceptName: XBRL concept name (e.g., 'Revenues')
+            dates: Grid of point-in-time dates (anything pandas can parse)
+            units: Unit of measurement (default: 'USD')
+            quarterlyOnly: Keep only 10-Q / Q1-Q3 entries, like getQuarterlyData
+
+        Returns:
+            DataFrame indexed by grid date with 'periodEnd' and 'value' columns
+        """
+        panel = self.asOfJoin(conceptName, dates, units, quarterlyOnly)
+        if panel.empty:
+            return pd.DataFrame({'periodEnd': pd.Series(dtype=object),
+                                 'value': pd.Series(dtype=float)}, index=panel.index)
+
+        # Columns are sorted by period end (then start), so the last known
+        # column is the newest period, preferring the quarter over YTD
+        known = panel.notna().to_numpy()
+        hasAny = known.any(axis=1)
+        lastIdx = known.shape[1] - 1 - np.argmax(known[:, ::-1], axis=1)
+
+        labels = np.array(panel.columns, dtype=object)
+        values = panel.to_numpy()[np.arange(len(panel)), lastIdx]
+        return pd.DataFrame({
+            'periodEnd': np.where(hasAny, labels[lastIdx], None),
+            'value': np.where(hasAny, values, np.nan)
+        }, index=panel.index)
+
+
+def _isQuarterly(point: Dict) -> bool:
+    """Match the quarterly filter used by SecDataFetcher.getQuarterlyData"""
+    return point.get('form') == '10-Q' or point.get('fiscalPeriod') in ['Q1', 'Q2', 'Q3']
+
+
+def _periodSortKey(item) -> Tuple[str, str]:
+    """Sort periods by end date, then start date (quarter after YTD)"""
+    (start, end), _ = item
+    return (end, start or '')
@@ -1,57 +1,172 @@
 import pandas as pd
-import os
-from google import genai 
+import datetime
+import sys
+
+from lexicon_scorer import rank_posts, top_informative
+from model_client import CachedModelClient, GeminiModelClient, gemini_available
+from prompt_packing import DEFAULT_CHUNK_TOKENS, POST_SEPARATOR, estimate_tokens, map_reduce_analysis
+from topic_clustering import DEFAULT_TOPICS, cluster_posts, describe_clusters
+from tweet_archive import read_window
 
 # --- Configuration ---
-# Update this to the actual file name you generated
-FILE_PATH = 'market_tweets_2025-12-08.csv' 
+HOURS_BACK = 24          # Analysis window read from the tweet archive
+TARGET_PER_USER = 3      # Max posts per account sent for analysis
+TOP_K_POSTS = 40         # Local triage: only the k most informative posts reach Gemini
+CLUSTER_THRESHOLD = 150  # Above this many posts (after triage), Gemini sees local theme clusters instead of raw posts
+N_TOPICS = DEFAULT_TOPICS
+POLARIZED_ACCOUNTS = 5   # Most bullish / most bearish accounts listed next to the themes
 
 TEXT_COLUMN = 'Text'    
 USERNAME_COLUMN = 'Handle' 
+LIKES_COLUMN = 'Likes'
+RETWEETS_COLUMN = 'Retweets'
+
+# Archive column -> prompt column; only these columns are read from disk
+ARCHIVE_COLUMNS = {
+    'id': 'post_id',
+    'created_at': 'created_at',
+    'handle': USERNAME_COLUMN,
+    'text': TEXT_COLUMN,
+    'likes': LIKES_COLUMN,
+    'retweets': RETWEETS_COLUMN,
+}
+
+
+def load_posts(hours_back: int = HOURS_BACK, per_user: int = TARGET_PER_USER) -> pd.DataFrame:
+    """
+    Loads the newest posts per account from the last `hours_back` hours of the archive.
+    """
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=hours_back)
+    df = read_window(since, columns=list(ARCHIVE_COLUMNS))
+
+    # The archive is returned newest first, so head() keeps each account's latest posts
+    df = df.groupby('handle', sort=False).head(per_user)
+    return df.rename(columns=ARCHIVE_COLUMNS).reset_index(drop=True)
+
+# Instructions for the final analysis; the posts (or partial summaries) follow them
+ANALYSIS_INSTRUCTIONS = (
+    "TASK: Analyze the sentiment and key themes from the financial/macro X posts provided below. "
+    "The posts are from highly influential traders, analysts, and economists. "
+    "Analyze the posts from the last week and provide a clear, structured summary with the following sections:\n\n"
+    "1. **Overall Market Sentiment:** A single sentence summary (e.g., Strongly Bearish, Moderately Bullish).\n"
+    "2. **Key Themes:** A bulleted list of the top 3-5 macro topics discussed (e.g., Fed Policy, VIX Skew, Recession Risk).\n"
+    "3. **Account Sentiment Breakdown:** A brief, 1-2 sentence analysis for the accounts with the most polarized (extreme positive or negative) posts, citing specific examples or keywords."
+)
+
+POSTS_HEADER = "\n\n--- POSTS FOR ANALYSIS ---\n"
+
+
+def format_posts(df: pd.DataFrame) -> list:
+    """
+    Formats every post as one line of prompt text, column-wise instead of row by row.
+    """
+    # 'post_id' and 'created_at' are optional (e.g. older CSV exports lack them)
+    post_ids = df['post_id'].astype(str) if 'post_id' in df.columns else 'N/A'
+    created = df['created_at'].astype(str) if 'created_at' in df.columns else 'N/A'
+
+    lines = ("[ACCOUNT: @" + df[USERNAME_COLUMN].astype(str) + "] Post ID: " + post_ids +
+             " | Date: " + created + " | Text: \"" + df[TEXT_COLUMN].astype(str) + "\"")
+    return lines.tolist()
+
+
+THEMES_HEADER = (
+    "\n\n--- THEME CLUSTERS (computed locally from {total} posts; each theme lists its post count, "
+    "average lexicon polarity from -1 bearish to +1 bullish, top terms and representative posts) ---\n"
+)
+
+
+def _quote(row) -> str:
+    return f"  - @{row[USERNAME_COLUMN]}: \"{row[TEXT_COLUMN]}\""
+
+
+def format_themes(df: pd.DataFrame, n_topics: int = N_TOPICS) -> list:
+    """
+    Clusters the posts into themes and formats one prompt block per theme,
+    plus one block with the most polarized accounts.
+
+    Only counts, top terms and a few representative posts are included, so
+    the prompt grows with the number of themes rather than the number of posts.
+    """
+    ranked = rank_posts(df.reset_index(drop=True), TEXT_COLUMN, LIKES_COLUMN, RETWEETS_COLUMN).sort_index()
+    clusters = cluster_posts(ranked[TEXT_COLUMN], n_topics=n_topics)
+
+    blocks = []
+    for number, theme in enumerate(describe_clusters(clusters), start=1):
+        members = ranked.iloc[theme["members"]]
+        # Posts nearest the centroid, plus the most informative post if it is not one of them
+        picks = list(theme["representatives"])
+        most_informative = int(members["informativeness"].idxmax())
+        if most_informative not in picks:
+            picks.append(most_informative)
 
-def generate_gemini_prompt(df: pd.DataFrame) -> str:
+        lines = [f"[THEME {number}] {theme['count']} posts | avg polarity {members['polarity'].mean():+.2f} | "
+                 f"terms: {', '.join(theme['terms'])}"]
+        lines += [_quote(row) for _, row in ranked.iloc[picks].iterrows()]
+        blocks.append("\n".join(lines))
+
+    by_account = ranked.groupby(USERNAME_COLUMN)["polarity"].agg(["mean", "count"]).sort_values("mean")
+    extremes = pd.concat([by_account.head(POLARIZED_ACCOUNTS), by_account.tail(POLARIZED_ACCOUNTS)])
+    extremes = extremes[~extremes.index.duplicated()]
+    lines = ["[MOST POLARIZED ACCOUNTS] (average polarity, post count)"]
+    lines += [f"  - @{handle}: {row['mean']:+.2f} over {int(row['count'])} posts" for handle, row in extremes.iterrows()]
+    blocks.append("\n".join(lines))
+    return blocks
+
+
+def triage_posts(df: pd.DataFrame, top_k: int = TOP_K_POSTS) -> pd.DataFrame:
+    """
+    Local triage: keeps the top_k most informative posts (most polarized, most
+    engaged) in their original order, so low-information posts never reach Gemini.
+    """
+    return top_informative(df, top_k, TEXT_COLUMN, LIKES_COLUMN, RETWEETS_COLUMN)
+
+
+def prompt_sections(df: pd.DataFrame, top_k: int = TOP_K_POSTS) -> tuple:
+    """
+    (header, blocks) for the analysis prompt. Posts are triaged to the top_k
+    first; the rest are sent raw when at most CLUSTER_THRESHOLD remain,
+    otherwise as local theme clusters.
+    """
+    df = triage_posts(df, top_k)
+    if len(df) > CLUSTER_THRESHOLD:
+        return THEMES_HEADER.format(total=len(df)), format_themes(df)
+    return POSTS_HEADER, format_posts(df)
+
+
+def generate_gemini_prompt(df: pd.DataFrame, top_k: int = TOP_K_POSTS) -> str:
     """
     Transforms the DataFrame of posts into a single, structured prompt string.
     """
-    
-    # 1. Set up the overall instruction for the Gemini model
-    prompt_instructions = (
-        "TASK: Analyze the sentiment and key themes from the financial/macro X posts provided below. "
-        "The posts are from highly influential traders, analysts, and economists. "
-        "Analyze the posts from the last week and provide a clear, structured summary with the following sections:\n\n"
-        "1. **Overall Market Sentiment:** A single sentence summary (e.g., Strongly Bearish, Moderately Bullish).\n"
-        "2. **Key Themes:** A bulleted list of the top 3-5 macro topics discussed (e.g., Fed Policy, VIX Skew, Recession Risk).\n"
-        "3. **Account Sentiment Breakdown:** A brief, 1-2 sentence analysis for the accounts with the most polarized (extreme positive or negative) posts, citing specific examples or keywords."
-        "\n\n--- POSTS FOR ANALYSIS ---\n"
-    )
-    
-    # 2. Structure each individual post for clarity using .join()
-    
-    # Check for 'post_id' and 'created_at' before attempting to access them
-    post_strings = []
-    for _, row in df.iterrows():
-        post_id = row.get('post_id', 'N/A')
-        created_at = row.get('created_at', 'N/A')
-        
-        post_strings.append(
-            f"[ACCOUNT: @{row[USERNAME_COLUMN]}] Post ID: {post_id} | Date: {created_at} | Text: \"{row[TEXT_COLUMN]}\""
-        )
-    
-    data_block = "\n\n".join(post_strings)
-    
-    return prompt_instructions + data_block
+    header, blocks = prompt_sections(df, top_k)
+    return ANALYSIS_INSTRUCTIONS + header + POST_SEPARATOR.join(blocks)
+
+
+def analyze_posts(df: pd.DataFrame, client, chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+                  top_k: int = TOP_K_POSTS) -> str:
+    """
+    Runs the sentiment analysis through `client` (anything with generate(prompt) -> str),
+    splitting it into map-reduce calls when the prompt exceeds the token budget.
+    """
+    header, blocks = prompt_sections(df, top_k)
+    return map_reduce_analysis(client, ANALYSIS_INSTRUCTIONS, blocks, header, chunk_tokens=chunk_tokens)
 
 
-def main():
-    """Reads the CSV, generates the prompt, and attempts the API call."""
+def main(file_path: str = None):
+    """Loads the posts, generates the prompt, and attempts the API call."""
     
+    # An explicit CSV path is still accepted for debugging; otherwise read the archive
+
     try:
-        df = pd.read_csv(FILE_PATH)
+        df = pd.read_csv(file_path) if file_path else load_posts()
     except FileNotFoundError:
-        print(f"Error: File not found at {FILE_PATH}. Please check your file name.")
+        print(f"Error: File not found at {file_path}. Please check your file name.")
         return
     except Exception as e:
-        print(f"Error reading file: {e}")
+        print(f"Error reading posts: {e}")
+        return
+
+    if df.empty:
+        print(f"No posts found in the last {HOURS_BACK} hours. Run fetch_tweets.py first.")
         return
 
     # Check for mandatory columns
@@ -60,8 +175,15 @@ def main():
         print(f"Available columns: {df.columns.tolist()}")
         return
 
+    # Local triage first; large inputs are then clustered and Gemini only sees the themes
+    if len(df) > TOP_K_POSTS:
+        print(f"Scoring {len(df)} posts locally; keeping the top {TOP_K_POSTS}.")
+    if min(len(df), TOP_K_POSTS) > CLUSTER_THRESHOLD:
+        print(f"Clustering {TOP_K_POSTS} posts locally; sending {N_TOPICS} theme summaries to Gemini.")
+
     # Generate the complete prompt string
-    final_prompt = generate_gemini_prompt(df)
+    header, blocks = prompt_sections(df)
+    final_prompt = ANALYSIS_INSTRUCTIONS + header + POST_SEPARATOR.join(blocks)
 
     # --- Output/API Call ---
     print("=" * 70)
@@ -69,21 +191,19 @@ def main():
     print("=" * 70)
     print(final_prompt)
     print("=" * 70)
+    print(f"Estimated prompt size: ~{estimate_tokens(final_prompt):,} tokens for {min(len(df), TOP_K_POSTS)} of {len(df)} posts")
     
     # Check if the API key is set in the environment
-    if os.getenv("GEMINI_API_KEY"):
+    if gemini_available():
         try:
-            # The client automatically picks up the GEMINI_API_KEY from the environment
-            client = genai.Client() 
+            client = CachedModelClient(GeminiModelClient())
             print("\nSending request to Gemini API...")
             
-            response = client.models.generate_content(
-                model='gemini-2.5-flash', 
-                contents=final_prompt
-            )
+            result = map_reduce_analysis(client, ANALYSIS_INSTRUCTIONS, blocks, header)
+            print(f"(LLM cache: {client.hits} hit(s), {client.misses} call(s) to Gemini)")
             
             print("\n--- GEMINI ANALYSIS RESULT ---")
-            print(response.text)
+            print(result)
             print("------------------------------")
 
         except Exception as e:
@@ -94,4 +214,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
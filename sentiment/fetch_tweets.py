@@ -1,125 +1,308 @@
 import tweepy
 import csv
 import datetime
+import json
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def fetch_optimized():
-    # 1. Setup
-    bearer_token = os.getenv("TWITTER_BEARER_TOKEN")
-    if not bearer_token:
-        print("[!] Error: No Bearer Token found in environment.")
-        return
+from tweet_archive import append_tweets, read_window
 
-    client = tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=True)
-
-    # 2. Configuration
-    ACCOUNTS = [
-        "tony_mansour", "jam_croissant", "vixologist", "_justinjc_",
-        "NoelConvex", "vighnaraj2022", "jaredhstocks", "spotgamma",
-        "lord_fed", "FedGuy12", "Ksidiii", "BergMilton",
-        "KrisAbdelmessih", "wabuffo", "wesbury", "RyanDetrick", 
-        "zerohedge"
-    ]
-    
-    TARGET_PER_USER = 3  # Max 3 posts per user
-    MAX_PAGES = 10       # We can search deeper now since we have a time-stop
-    HOURS_BACK = 24      # TIME FILTER: Only look at the last 24 hours
+# Files live next to this script so runs from any directory share state
+BASE_DIR = os.getenv("SENTIMENT_STATE_DIR") or os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_FILE = os.path.join(BASE_DIR, "tweet_checkpoints.json")
+OUTPUT_FILE = "market_tweets.csv"
 
-    # Calculate the cutoff time (UTC to match Twitter)
-    cutoff_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=HOURS_BACK)
+# Recent search only reaches back 7 days; older since_ids are rejected
+SEARCH_WINDOW = datetime.timedelta(days=7)
+
+ACCOUNTS = [
+    "tony_mansour", "jam_croissant", "vixologist", "_justinjc_",
+    "NoelConvex", "vighnaraj2022", "jaredhstocks", "spotgamma",
+    "lord_fed", "FedGuy12", "Ksidiii", "BergMilton",
+    "KrisAbdelmessih", "wabuffo", "wesbury", "RyanDetrick",
+    "zerohedge"
+]
+
+QUERY_SUFFIX = " -is:retweet -is:reply"
+MAX_QUERY_LENGTH = 512     # Basic tier limit for recent search queries
+MAX_CONCURRENT_SHARDS = 4
+SEARCH_REQUESTS_PER_15_MIN = 60   # Basic tier app limit for recent search
+
+TARGET_PER_USER = 3  # Max 3 posts per user
+MAX_PAGES = 10       # We can search deeper now since we have a time-stop
+HOURS_BACK = 24      # TIME FILTER: Only look at the last 24 hours
+
+
+class RateLimiter:
+    """Thread-safe token bucket: short bursts allowed, average rate enforced"""
+
+    def __init__(self, max_calls, period_seconds, burst=1):
+        self.rate = max_calls / period_seconds
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Tokens may go negative: each waiter reserves its own future slot
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0
+        if delay > 0:
+            time.sleep(delay)
+
+
+def build_query_shards(accounts, max_length=MAX_QUERY_LENGTH):
+    """Split accounts into (accounts, query) shards that fit the query length limit"""
+    shards = []
+    shard = []
+    for user in accounts:
+        candidate = " OR ".join(f"from:{u}" for u in shard + [user]) + QUERY_SUFFIX
+        if shard and len(candidate) > max_length:
+            shards.append(shard)
+            shard = []
+        shard.append(user)
+    if shard:
+        shards.append(shard)
 
-    # 3. State Tracking
-    collected_data = {user: [] for user in ACCOUNTS}
-    finished_users = set() # Users who have hit their max count OR ran out of time
-    
-    # Build Query
-    query = " OR ".join([f"from:{user}" for user in ACCOUNTS])
-    query += " -is:retweet -is:reply"
+    return [(s, " OR ".join(f"from:{u}" for u in s) + QUERY_SUFFIX) for s in shards]
 
-    print(f"Fetching tweets from the last {HOURS_BACK} hours...")
-    
+
+def load_checkpoints():
+    """Per-query checkpoints: {query: {"newest_id": ..., "newest_time": ...}}"""
+    try:
+        with open(CHECKPOINT_FILE, encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_checkpoints(checkpoints):
+    tmp_path = CHECKPOINT_FILE + ".tmp"
+    with open(tmp_path, mode='w', encoding='utf-8') as file:
+        json.dump(checkpoints, file, indent=2)
+    os.replace(tmp_path, CHECKPOINT_FILE)
+
+
+def search_since(client, query, checkpoint, cutoff_time, max_pages,
+                 limiter=None, accounts=None, on_page=None):
+    """
+    Page through recent search results newer than the checkpoint.
+
+    Paging stops at the time cutoff. It does not stop early once accounts
+    have enough posts: the checkpoint advances past everything newer, so
+    skipped tweets would never reach the archive. Per-account caps are
+    applied when posts are read back for analysis. If given, on_page(page_tweets,
+    users_map) is called as soon as each page arrives. Returns (tweets,
+    users_map, newest_tweet, complete) where newest_tweet is the most
+    recent tweet seen (or None) and complete says whether paging reached
+    the old checkpoint or the time cutoff. Only a complete run may advance
+    the checkpoint; after an API error or max_pages, tweets between the
+    old checkpoint and the last page fetched are still missing.
+    """
+    params = {
+        "query": query,
+        "max_results": 100,
+        "tweet_fields": ['created_at', 'public_metrics', 'author_id'],
+        "expansions": ['author_id'],
+        "user_fields": ['username', 'name'],
+    }
+    if checkpoint:
+        params["since_id"] = checkpoint["newest_id"]
+    else:
+        # First run: no need to page past the time window at all
+        params["start_time"] = cutoff_time
+
+    tweets = []
+    users_map = {}
+    newest_tweet = None
     next_token = None
     page_count = 0
-    stop_searching = False
+    complete = False
 
     # --- THE PAGINATION LOOP ---
-    while not stop_searching and page_count < MAX_PAGES:
+    while page_count < max_pages:
         page_count += 1
-        print(f"  > Requesting Page {page_count}...")
+        if limiter:
+            limiter.wait()
 
         try:
-            response = client.search_recent_tweets(
-                query=query,
-                max_results=100,
-                tweet_fields=['created_at', 'public_metrics', 'author_id'],
-                expansions=['author_id'],
-                user_fields=['username', 'name'],
-                next_token=next_token
-            )
+            response = client.search_recent_tweets(next_token=next_token, **params)
         except Exception as e:
             print(f"    [!] API Error: {e}")
             break
 
         if not response.data:
-            print("    [!] No more data available.")
+            complete = True
             break
 
-        # Map ID -> Username
-        users_map = {u['id']: u for u in response.includes['users']}
+        users_map.update({u['id']: u for u in response.includes.get('users', [])})
+        if newest_tweet is None:
+            # Results come newest first, so the first tweet of page 1 is the newest
+            newest_tweet = response.data[0]
 
-        # Check if the whole batch is too old (Optimization)
-        # If the NEWEST tweet in this batch is already older than 24h, stop everything.
-        if response.data[0].created_at < cutoff_time:
-            print("    [!] Batch is entirely older than 24h. Stopping.")
-            break
+        page_tweets = [t for t in response.data if t.created_at >= cutoff_time]
+        tweets.extend(page_tweets)
+        if on_page and page_tweets:
+            on_page(page_tweets, users_map)
 
-        for tweet in response.data:
-            # 1. TIME CHECK: Is this specific tweet too old?
-            if tweet.created_at < cutoff_time:
-                # We found a tweet older than 24h. 
-                # Note: We don't break immediately because tweets aren't perfectly sorted by user,
-                # but usually we are near the end of useful data.
-                continue
-
-            user_info = users_map.get(tweet.author_id)
-            if not user_info: continue
-            
-            username = user_info.username
-
-            # 2. COUNT CHECK: Do we already have 3 for this user?
-            if len(collected_data.get(username, [])) < TARGET_PER_USER:
-                collected_data[username].append({
-                    "created_at": tweet.created_at,
-                    "handle": username,
-                    "name": user_info.name,
-                    "text": tweet.text,
-                    "likes": tweet.public_metrics.get('like_count', 0),
-                    "retweets": tweet.public_metrics.get('retweet_count', 0),
-                    "url": f"https://twitter.com/{username}/status/{tweet.id}"
-                })
-
-        # Check if we should stop pagination
-        # If the OLDEST tweet in this batch is older than our cutoff, 
+        # If the OLDEST tweet in this batch is older than our cutoff,
         # the next page will definitely be too old. Stop saving tokens.
         if response.data[-1].created_at < cutoff_time:
-            print("    [!] Reached 24h time limit. Stopping pagination.")
-            stop_searching = True
-        
-        # Continue to next page if needed
+            complete = True
+            break
+
         next_token = response.meta.get('next_token')
         if not next_token:
+            complete = True
+            break
+
+    print(f"  > Shard of {len(accounts) if accounts else '?'} accounts: {len(tweets)} tweets in {page_count} page(s)"
+          f"{'' if complete else ' (incomplete, checkpoint kept)'}")
+    return tweets, users_map, newest_tweet, complete
+
+
+def to_records(tweets, users_map):
+    """Convert API tweets into archive records, skipping unknown authors."""
+    records = []
+    for tweet in tweets:
+        user_info = users_map.get(tweet.author_id)
+        if not user_info: continue
+
+        records.append({
+            "id": tweet.id,
+            "created_at": tweet.created_at,
+            "handle": user_info.username,
+            "name": user_info.name,
+            "text": tweet.text,
+            "likes": tweet.public_metrics.get('like_count', 0),
+            "retweets": tweet.public_metrics.get('retweet_count', 0),
+            "url": f"https://twitter.com/{user_info.username}/status/{tweet.id}"
+        })
+    return records
+
+
+def make_client():
+    bearer_token = os.getenv("TWITTER_BEARER_TOKEN")
+    if not bearer_token:
+        print("[!] Error: No Bearer Token found in environment.")
+        return None
+    return tweepy.Client(bearer_token=bearer_token, wait_on_rate_limit=True)
+
+
+def stream_tweets(client, hours_back=HOURS_BACK):
+    """
+    Fetch new tweets for every shard concurrently, yielding each page of
+    archive records as soon as it arrives.
+
+    Once the consumer has drained the stream, the new tweets are appended to
+    the archive and the per-shard checkpoints are advanced. The generator's
+    return value (StopIteration.value) is the number of newly archived tweets.
+    """
+    # Calculate the cutoff time (UTC to match Twitter)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cutoff_time = now - datetime.timedelta(hours=hours_back)
+
+    # Build one query per shard of accounts that fits the length limit
+    shards = build_query_shards(ACCOUNTS)
+
+    # State Tracking
+    checkpoints = load_checkpoints()
+    for _, query in shards:
+        checkpoint = checkpoints.get(query)
+        if checkpoint and datetime.datetime.fromisoformat(checkpoint["newest_time"]) < now - SEARCH_WINDOW:
+            print("  > Checkpoint is older than the search window. Starting fresh.")
+            checkpoints.pop(query)
+
+    print(f"Fetching new tweets from the last {hours_back} hours across {len(shards)} query shard(s)...")
+
+    pages = queue.Queue()
+    done = object()
+
+    def on_page(page_tweets, users_map):
+        pages.put(to_records(page_tweets, users_map))
+
+    def run_shard(query, accounts):
+        try:
+            return search_since(client, query, checkpoints.get(query), cutoff_time, MAX_PAGES,
+                                limiter, accounts, on_page)
+        finally:
+            pages.put(done)
+
+    # All shards share one limiter so together they stay under the app rate limit
+    limiter = RateLimiter(SEARCH_REQUESTS_PER_15_MIN, 15 * 60, burst=MAX_CONCURRENT_SHARDS)
+    records = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SHARDS) as pool:
+        futures = [(query, pool.submit(run_shard, query, accounts)) for accounts, query in shards]
+
+        finished = 0
+        while finished < len(shards):
+            page = pages.get()
+            if page is done:
+                finished += 1
+                continue
+            records.extend(page)
+            yield page
+
+        results = [(query, future.result()) for query, future in futures]
+
+    # Append new tweets to the date-partitioned archive
+    new_count = append_tweets(records)
+
+    # Only advance checkpoints once the tweets behind them are safely archived, and
+    # only for shards that paged all the way back; the others retry from the old one
+    for query, (_, _, newest_tweet, complete) in results:
+        if newest_tweet is not None and complete:
+            checkpoints[query] = {
+                "newest_id": str(newest_tweet.id),
+                "newest_time": newest_tweet.created_at.isoformat()
+            }
+    save_checkpoints(checkpoints)
+
+    return new_count
+
+
+def fetch_optimized():
+    # 1. Setup
+    client = make_client()
+    if client is None:
+        return
+
+    # 2. Fetch new tweets into the archive
+    stream = stream_tweets(client)
+    new_count = 0
+    while True:
+        try:
+            next(stream)
+        except StopIteration as finished:
+            new_count = finished.value
             break
 
+    # 3. Build the per-user view of the last 24h from the archive
+    cutoff_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=HOURS_BACK)
+    collected_data = {user.lower(): [] for user in ACCOUNTS}
+    for tweet in read_window(cutoff_time).to_dict("records"):
+        user_tweets = collected_data.get(tweet["handle"].lower())
+        # COUNT CHECK: Do we already have 3 for this user?
+        if user_tweets is not None and len(user_tweets) < TARGET_PER_USER:
+            user_tweets.append(tweet)
+
     # 4. Save to CSV
-    filename = "market_tweets.csv"
+    filename = OUTPUT_FILE
     total_tweets = sum(len(tweets) for tweets in collected_data.values())
-    
+
     with open(filename, mode='w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
         writer.writerow(["Time (UTC)", "Handle", "Name", "Text", "Likes", "Retweets", "URL"])
-        
+
         for user in ACCOUNTS:
-            for tweet in collected_data[user]:
+            for tweet in collected_data[user.lower()]:
                 writer.writerow([
                     tweet["created_at"],
                     tweet["handle"],
@@ -130,7 +313,7 @@ def fetch_optimized():
                     tweet["url"]
                 ])
 
-    print(f"\nSuccess! Saved {total_tweets} tweets from the last 24h to {filename}")
+    print(f"\nSuccess! {new_count} new tweets. Saved {total_tweets} tweets from the last 24h to {filename}")
 
 if __name__ == "__main__":
     fetch_optimized()
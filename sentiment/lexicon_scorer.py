@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+# Finance-specific polarity lexicon: positive = bullish, negative = bearish.
+# Weights are on a rough -3..+3 scale.
+FINANCE_LEXICON = {
+    # Bullish
+    "bull": 2.0, "bullish": 2.5, "rally": 2.0, "rallies": 2.0, "rallying": 2.0,
+    "breakout": 2.0, "beat": 1.5, "beats": 1.5, "upside": 1.5, "upgrade": 2.0,
+    "upgraded": 2.0, "strong": 1.5, "strength": 1.5, "surge": 2.0, "surges": 2.0,
+    "soar": 2.0, "soars": 2.0, "gain": 1.0, "gains": 1.0, "higher": 1.0,
+    "buy": 1.5, "buying": 1.5, "long": 1.0, "squeeze": 1.0, "recovery": 1.5,
+    "recover": 1.5, "easing": 1.0, "cut": 0.5, "cuts": 0.5, "dovish": 1.5,
+    "soft": 0.5, "landing": 0.5, "expansion": 1.5, "growth": 1.0, "record": 1.0,
+    "outperform": 2.0, "support": 1.0, "bid": 1.0, "risk-on": 2.0, "ath": 2.0,
+    "melt": 1.0, "rip": 1.5, "green": 1.0, "moon": 2.0, "accumulate": 1.5,
+    # Bearish
+    "bear": -2.0, "bearish": -2.5, "selloff": -2.5, "sell": -1.5, "selling": -1.5,
+    "crash": -3.0, "crashing": -3.0, "plunge": -2.5, "plunges": -2.5, "tumble": -2.0,
+    "drop": -1.5, "drops": -1.5, "lower": -1.0, "miss": -1.5, "misses": -1.5,
+    "downgrade": -2.0, "downgraded": -2.0, "weak": -1.5, "weakness": -1.5,
+    "recession": -2.5, "default": -2.5, "inflation": -1.0, "hawkish": -1.5,
+    "hike": -1.0, "hikes": -1.0, "short": -1.0, "shorts": -1.0, "risk-off": -2.0,
+    "capitulation": -2.0, "panic": -2.5, "fear": -2.0, "layoffs": -2.0,
+    "contraction": -1.5, "slowdown": -1.5, "stagflation": -2.5, "bubble": -1.5,
+    "overvalued": -1.5, "downside": -1.5, "red": -1.0, "dump": -2.0, "rug": -2.0,
+    "liquidation": -2.0, "volatility": -0.5, "spike": -0.5, "warning": -1.5,
+    "losses": -1.5, "loss": -1.5, "bankruptcy": -3.0, "collapse": -3.0,
+}
+
+NEGATORS = {"not", "no", "never", "none", "nobody", "nothing", "neither", "nor",
+            "without", "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't",
+            "didn't", "won't", "wouldn't", "can't", "cannot", "couldn't", "shouldn't", "hardly"}
+
+NEGATION_WINDOW = 3       # Tokens after a negator whose polarity is flipped
+NEGATION_FACTOR = -0.75   # "not bullish" is milder than "bearish"
+NORMALIZATION_ALPHA = 15  # VADER-style squashing of raw sums into [-1, 1]
+
+TOKEN_PATTERN = r"[a-z][a-z'\-]*"
+
+
+def score_texts(texts: pd.Series, lexicon: dict = FINANCE_LEXICON) -> pd.Series:
+    """
+    Lexicon polarity score in [-1, 1] for each text, computed column-wise.
+
+    All texts are tokenized and exploded into one long token Series, so the
+    lexicon lookup and negation handling run as vectorized array operations
+    rather than a Python loop per post.
+    """
+    original_index = texts.index
+    # Work on positional labels so duplicate index values cannot merge posts
+    texts = texts.fillna("").astype(str).reset_index(drop=True)
+    tokens = texts.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    if tokens.empty:
+        return pd.Series(0.0, index=original_index)
+
+    post = tokens.index.to_numpy()
+    weights = tokens.map(lexicon).fillna(0.0).to_numpy(dtype=float)
+
+    # Position of each token within its post, and of the latest negator before it
+    position = tokens.groupby(level=0).cumcount().to_numpy()
+    is_negator = (tokens.isin(NEGATORS) | tokens.str.endswith("n't")).to_numpy(dtype=bool)
+    negator_position = pd.Series(np.where(is_negator, position, np.nan), index=tokens.index)
+    last_negator = negator_position.groupby(level=0).ffill().to_numpy()
+
+    distance = position - last_negator
+    negated = (distance > 0) & (distance <= NEGATION_WINDOW)
+    weights = np.where(negated, weights * NEGATION_FACTOR, weights)
+
+    raw = pd.Series(weights, index=post).groupby(level=0).sum()
+    raw = raw.reindex(texts.index, fill_value=0.0).to_numpy()
+    return pd.Series(raw / np.sqrt(raw * raw + NORMALIZATION_ALPHA), index=original_index)
+
+
+def rank_posts(df: pd.DataFrame, text_column: str, likes_column: str = None,
+               retweets_column: str = None) -> pd.DataFrame:
+    """
+    Adds 'polarity' and 'informativeness' columns and sorts by informativeness.
+
+    Informativeness favours strongly polarized posts with engagement:
+    |polarity| weighted by log engagement (retweets count double).
+    An existing 'polarity' column (e.g. scored while streaming) is reused.
+    """
+    ranked = df.copy()
+    if "polarity" not in ranked.columns:
+        ranked["polarity"] = score_texts(ranked[text_column])
+
+    engagement = pd.Series(0.0, index=ranked.index)
+    if likes_column and likes_column in ranked.columns:
+        engagement += pd.to_numeric(ranked[likes_column], errors="coerce").fillna(0)
+    if retweets_column and retweets_column in ranked.columns:
+        engagement += 2 * pd.to_numeric(ranked[retweets_column], errors="coerce").fillna(0)
+
+    # +1 keeps zero-engagement posts rankable by polarity alone
+    ranked["informativeness"] = ranked["polarity"].abs() * (1 + np.log1p(engagement))
+    return ranked.sort_values("informativeness", ascending=False, kind="stable")
+
+
+def top_informative(df: pd.DataFrame, k: int, text_column: str, likes_column: str = None,
+                    retweets_column: str = None) -> pd.DataFrame:
+    """The k most informative posts, kept in their original order."""
+    if len(df) <= k:
+        return df
+    ranked = rank_posts(df.reset_index(drop=True), text_column, likes_column, retweets_column)
+    return df.iloc[np.sort(ranked.index.to_numpy()[:k])]
@@ -1,9 +1,77 @@
+import argparse
+import datetime
 import os
-import sys
-import subprocess
+import pandas as pd
 from dotenv import load_dotenv
 
+import analyze_tweets
+import fetch_tweets
+from analyze_tweets import (ARCHIVE_COLUMNS, HOURS_BACK, TARGET_PER_USER, TEXT_COLUMN,
+                            USERNAME_COLUMN, analyze_posts, generate_gemini_prompt)
+from lexicon_scorer import score_texts
+from model_client import CachedModelClient, GeminiModelClient
+from sentiment_series import SentimentSeries
+from tweet_archive import read_window
+
+
+def score_frame(records: pd.DataFrame) -> pd.DataFrame:
+    """Renames archive columns to prompt columns and adds the local polarity score."""
+    frame = records[list(ARCHIVE_COLUMNS)].rename(columns=ARCHIVE_COLUMNS)
+    frame["polarity"] = score_texts(frame[TEXT_COLUMN])
+    return frame
+
+
+def run_pipeline(tweet_client, model_client=None, hours_back: int = HOURS_BACK):
+    """
+    Fetch, score and analyze in one process, without a CSV handoff.
+
+    Posts already archived for the window are scored first; new tweets are
+    then scored page by page while later pages are still being fetched.
+    Returns the Gemini analysis, or the prompt if no model client is given.
+    """
+    since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=hours_back)
+    frames = [score_frame(read_window(since, columns=list(ARCHIVE_COLUMNS)))]
+
+    stream = fetch_tweets.stream_tweets(tweet_client, hours_back)
+    new_count = 0
+    while True:
+        try:
+            page = next(stream)
+        except StopIteration as finished:
+            new_count = finished.value
+            break
+        frames.append(score_frame(pd.DataFrame(page)))
+        print(f"  > Scored {len(page)} new posts")
+
+    df = pd.concat(frames, ignore_index=True).drop_duplicates("post_id", keep="last")
+
+    # Every scored post feeds the rolling per-account series, not just the ones sent to Gemini
+    series = SentimentSeries()
+    added = series.add_posts(df)
+    print(f"[+] Sentiment series updated with {added} post(s).")
+    for alert in series.alerts():
+        print(f"[!] {alert['message']}")
+
+    df = (df.sort_values("created_at", ascending=False)
+            .groupby(USERNAME_COLUMN, sort=False).head(TARGET_PER_USER)
+            .reset_index(drop=True))
+    print(f"[+] {new_count} new tweets archived; {len(df)} posts in the last {hours_back}h window.")
+
+    if df.empty:
+        return None
+
+    if model_client is None:
+        return generate_gemini_prompt(df)
+    return analyze_posts(df, model_client)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Market sentiment pipeline")
+    parser.add_argument("--stage", choices=["all", "fetch", "analyze"], default="all",
+                        help="run a single stage on its own (for debugging)")
+    parser.add_argument("--csv", help="analyze stage only: read posts from this CSV instead of the archive")
+    args = parser.parse_args()
+
     # 1. Load environment variables from .env file
     # This reads the file and injects variables into os.environ
     loaded = load_dotenv()
@@ -14,6 +82,14 @@ def main():
 
     if not loaded:
         print("[!] Warning: .env file not found.")
+
+    # Debug stages run the original scripts' entry points, in-process
+    if args.stage == "fetch":
+        fetch_tweets.fetch_optimized()
+        return
+    if args.stage == "analyze":
+        analyze_tweets.main(args.csv)
+        return
     
     # 2. Verify Keys exist
     twitter_token = os.getenv("TWITTER_BEARER_TOKEN")
@@ -28,37 +104,29 @@ def main():
 
     print("[+] Keys loaded successfully.")
 
-    # 3. Step 1: Run the Fetcher
+    # 3. Fetch, score and analyze as one streaming pass
     print("\n" + "-"*30)
-    print(">>> STEP 1: Fetching Tweets...")
+    print(">>> Fetching and scoring tweets...")
     print("-"*30)
-    
-    try:
-        # We pass os.environ (which now contains our loaded keys) to the child process
-        subprocess.run(
-            [sys.executable, "fetch_tweets.py"], 
-            env=os.environ, 
-            check=True
-        )
-    except subprocess.CalledProcessError:
-        print("\n[!] Fetch script failed. Stopping pipeline.")
-        return
 
-    # 4. Step 2: Run the Analyzer
-    print("\n" + "-"*30)
-    print(">>> STEP 2: Analyzing with Gemini...")
-    print("-"*30)
+    tweet_client = fetch_tweets.make_client()
+    model_client = CachedModelClient(GeminiModelClient())
 
     try:
-        subprocess.run(
-            [sys.executable, "analyze_tweets.py"], 
-            env=os.environ, 
-            check=True
-        )
-    except subprocess.CalledProcessError:
-        print("\n[!] Analysis script failed.")
+        result = run_pipeline(tweet_client, model_client)
+    except Exception as e:
+        print(f"\n[!] Pipeline failed: {e}")
         return
 
+    if result is None:
+        print("\n[!] No posts found in the analysis window.")
+        return
+
+    print("\n--- GEMINI ANALYSIS RESULT ---")
+    print(result)
+    print("------------------------------")
+    print(f"(LLM cache: {model_client.hits} hit(s), {model_client.misses} call(s) to Gemini)")
+
     print("\n" + "="*60)
     print("   PIPELINE COMPLETE")
     print("="*60)
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_MODEL = 'gemini-2.5-flash'
+
+# Response cache lives next to this script so every entry point shares it
+# (SENTIMENT_STATE_DIR moves all pipeline state elsewhere, e.g. for benchmarks)
+CACHE_DIR = os.path.join(os.getenv("SENTIMENT_STATE_DIR") or os.path.dirname(os.path.abspath(__file__)), ".llm_cache")
+DEFAULT_CACHE_TTL = 7 * 24 * 60 * 60      # 1 week
+DEFAULT_CACHE_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+
+class GeminiModelClient:
+    """
+    Thin wrapper around the Gemini API exposing generate(prompt) -> str.
+
+    Anything with the same generate() method (e.g. a local fake that
+    returns canned text) can be used wherever this client is expected.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL):
+        # Imported lazily so prompt-only runs work without google-genai installed
+        from google import genai
+
+        self.model = model
+        # The client automatically picks up the GEMINI_API_KEY from the environment
+        self.client = genai.Client()
+
+    def generate(self, prompt: str) -> str:
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt
+        )
+        return response.text
+
+
+class FakeModelClient:
+    """
+    Local stand-in for GeminiModelClient, for tests and offline runs.
+
+    Every prompt is recorded, and the answer comes from `respond(prompt)`
+    (default: a short canned line). A `delay` keeps calls in flight long
+    enough for overlapping calls to show up in `max_active`.
+    """
+
+    def __init__(self, respond=None, delay: float = 0.0):
+        self.model = "fake"
+        self.respond = respond or (lambda prompt: f"Summary of a {len(prompt)}-character prompt.")
+        self.delay = delay
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self.lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            return self.respond(prompt)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def gemini_available() -> bool:
+    """True if a Gemini API key is configured in the environment."""
+    return bool(os.getenv("GEMINI_API_KEY"))
+
+
+class CachedModelClient:
+    """
+    Content-addressed, on-disk cache in front of a model client.
+
+    Each response is stored under the SHA-256 of the model name and the full
+    prompt (instructions plus the formatted posts), so an identical rerun is
+    answered from disk at zero API cost. Map-reduce chunk prompts go through
+    the same cache, so unchanged chunks are reused when only a few posts are
+    new. Entries expire after `ttl_seconds`; once the cache exceeds
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, client, cache_dir: str = CACHE_DIR, ttl_seconds: int = DEFAULT_CACHE_TTL,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.client = client
+        self.model = getattr(client, "model", type(client).__name__)
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_key(self, prompt: str) -> str:
+        # Trailing whitespace per line never changes the answer, so ignore it
+        normalized = "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+        digest = hashlib.sha256()
+        digest.update(self.model.encode())
+        digest.update(b"\0")
+        digest.update(normalized.encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def generate(self, prompt: str) -> str:
+        path = self._path(self.cache_key(prompt))
+
+        try:
+            with open(path, encoding="utf-8") as file:
+                entry = json.load(file)
+            if time.time() - entry["created_at"] < self.ttl_seconds:
+                os.utime(path)  # mark as recently used for eviction
+                self.hits += 1
+                return entry["response"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+        self.misses += 1
+        response = self.client.generate(prompt)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, mode="w", encoding="utf-8") as file:
+            json.dump({"model": self.model, "created_at": time.time(), "response": response}, file)
+        os.replace(tmp_path, path)
+
+        self._evict()
+        return response
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones over the size limit."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+                # mtime is refreshed on every hit; creation time is inside the entry,
+                # but anything untouched for a full TTL is certainly expired
+                if now - stat.st_mtime > self.ttl_seconds:
+                    os.remove(path)
+                    continue
+            except FileNotFoundError:
+                continue  # removed by a concurrent run
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
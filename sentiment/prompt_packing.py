@@ -0,0 +1,124 @@
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# Rough English average for Gemini/GPT-style tokenizers; errs on the high side
+CHARS_PER_TOKEN = 4
+
+DEFAULT_CHUNK_TOKENS = 24000   # Post tokens per map call, well under model context
+DEFAULT_MAX_WORKERS = 4        # Concurrent map calls
+
+# Average posts per chunk when cutting at content-defined boundaries
+CHUNK_BOUNDARY_SPACING = 64
+
+POST_SEPARATOR = "\n\n"
+
+MAP_INSTRUCTIONS = (
+    "TASK: You are reading one batch out of several batches of financial/macro X posts. "
+    "Summarize ONLY this batch as compact notes for a later merge step, with these sections:\n\n"
+    "1. **Batch Sentiment:** One line (e.g., Strongly Bearish, Moderately Bullish) and the share of bullish vs bearish posts.\n"
+    "2. **Themes:** Up to 5 macro topics, each with a post count and 1-2 keywords.\n"
+    "3. **Polarized Accounts:** Accounts with the most extreme positive or negative posts, each with a short quote or keyword.\n"
+    "\n--- POSTS IN THIS BATCH ---\n"
+)
+
+MERGE_INSTRUCTIONS = (
+    "TASK: Merge the batch notes below into ONE set of notes with the same three sections "
+    "(Batch Sentiment, Themes, Polarized Accounts), adding up counts and keeping the strongest examples."
+)
+
+REDUCE_HEADER = "\n\n--- PARTIAL SUMMARIES OF POST BATCHES (merge these; the raw posts are not shown) ---\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate from character count (no tokenizer round trip)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _is_boundary(post: str, spacing: int) -> bool:
+    """Content-defined chunk boundary: depends only on the post itself."""
+    digest = hashlib.blake2b(post.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % spacing == 0
+
+
+def pack_posts(posts: List[str], budget_tokens: int,
+               boundary_spacing: int = CHUNK_BOUNDARY_SPACING) -> List[List[str]]:
+    """
+    Greedily pack posts, in order, into chunks whose estimated size fits the budget.
+
+    Besides the budget, a chunk also ends after any post whose hash marks a
+    content-defined boundary. Adding or dropping a few posts then only
+    changes the chunks around them, so cached summaries of the other chunks
+    stay valid. A single post larger than the budget gets a chunk of its own
+    rather than being dropped or split mid-sentence.
+    """
+    separator_tokens = estimate_tokens(POST_SEPARATOR)
+    chunks = []
+    chunk = []
+    chunk_tokens = 0
+
+    for post in posts:
+        post_tokens = estimate_tokens(post) + separator_tokens
+        if chunk and chunk_tokens + post_tokens > budget_tokens:
+            chunks.append(chunk)
+            chunk = []
+            chunk_tokens = 0
+        chunk.append(post)
+        chunk_tokens += post_tokens
+        if boundary_spacing and _is_boundary(post, boundary_spacing):
+            chunks.append(chunk)
+            chunk = []
+            chunk_tokens = 0
+
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def build_map_prompt(chunk: List[str]) -> str:
+    # No batch numbering: the prompt depends only on the chunk, so it caches well
+    return MAP_INSTRUCTIONS + POST_SEPARATOR.join(chunk)
+
+
+def build_reduce_prompt(instructions: str, summaries: List[str]) -> str:
+    blocks = [f"[BATCH {i + 1}]\n{summary}" for i, summary in enumerate(summaries)]
+    return instructions + REDUCE_HEADER + POST_SEPARATOR.join(blocks)
+
+
+def map_reduce_analysis(client, instructions: str, posts: List[str], posts_header: str,
+                        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+                        max_workers: int = DEFAULT_MAX_WORKERS) -> str:
+    """
+    Analyze posts with a model client, staying under the prompt token budget.
+
+    If everything fits, this is one call with the original single prompt.
+    Otherwise posts are packed into chunks, each chunk is summarized
+    concurrently (map), and the partial summaries are merged into the final
+    report by the original instructions (reduce). Reduction is repeated in
+    rounds if the summaries themselves overflow the budget.
+
+    `client` is anything with generate(prompt) -> str.
+    """
+    single_prompt = instructions + posts_header + POST_SEPARATOR.join(posts)
+    if estimate_tokens(single_prompt) <= chunk_tokens:
+        return client.generate(single_prompt)
+
+    chunks = pack_posts(posts, chunk_tokens - estimate_tokens(MAP_INSTRUCTIONS))
+    print(f"  > {len(posts)} posts exceed the prompt budget; summarizing {len(chunks)} chunks...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        prompts = [build_map_prompt(chunk) for chunk in chunks]
+        summaries = list(pool.map(client.generate, prompts))
+
+        # Merge summaries in rounds until they fit one reduce prompt
+        reduce_budget = chunk_tokens - estimate_tokens(instructions + REDUCE_HEADER)
+        while len(summaries) > 1 and estimate_tokens(POST_SEPARATOR.join(summaries)) > reduce_budget:
+            groups = pack_posts(summaries, reduce_budget, boundary_spacing=0)
+            if len(groups) == len(summaries):
+                break  # each summary alone fills the budget; merge what we have
+            print(f"  > Merging {len(summaries)} partial summaries into {len(groups)}...")
+            merge_prompts = [build_reduce_prompt(MERGE_INSTRUCTIONS, group) for group in groups]
+            summaries = list(pool.map(client.generate, merge_prompts))
+
+    return client.generate(build_reduce_prompt(instructions, summaries))
@@ -0,0 +1,245 @@
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Series database lives next to this script so every entry point shares it
+BASE_DIR = os.getenv("SENTIMENT_STATE_DIR") or os.path.dirname(os.path.abspath(__file__))
+SERIES_DB = os.path.join(BASE_DIR, "sentiment_series.sqlite3")
+
+OVERALL = "*"                 # Pseudo-account holding the all-accounts series
+WINDOWS = (1, 7, 30)          # Rolling windows, in days
+SEEN_RETENTION_DAYS = 60      # Post ids older than this are forgotten
+
+TREND_THRESHOLD = 0.3         # Short vs long window mean change that raises an alert
+DIVERGENCE_THRESHOLD = 0.5    # Account vs overall mean gap that raises an alert
+MIN_ALERT_POSTS = 3           # Posts needed in the short window before alerting
+
+
+def to_day(timestamps) -> pd.Series:
+    """UTC day number (days since the Unix epoch) for each timestamp."""
+    ts = pd.to_datetime(pd.Series(timestamps), utc=True)
+    return (ts - pd.Timestamp(0, tz="UTC")).dt.days
+
+
+def day_to_date(day: int) -> str:
+    return (pd.Timestamp(0) + pd.Timedelta(days=int(day))).strftime("%Y-%m-%d")
+
+
+class SentimentSeries:
+    """
+    Per-account and overall daily sentiment, with rolling window aggregates.
+
+    Daily buckets (post count, polarity sum and sum of squares) are the only
+    history kept. Each rolling window keeps a running total per account:
+    adding a post is an O(1) update, and moving to a new day subtracts the
+    buckets that fell out of the window, once per day. Post ids are tracked
+    so re-scoring the same archive window never counts a post twice.
+    """
+
+    def __init__(self, path=SERIES_DB, windows=WINDOWS):
+        self.path = path
+        self.windows = tuple(windows)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS daily (
+                    handle TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    posts INTEGER NOT NULL,
+                    total REAL NOT NULL,
+                    total_sq REAL NOT NULL,
+                    PRIMARY KEY (handle, day)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS rolling (
+                    handle TEXT NOT NULL,
+                    window_days INTEGER NOT NULL,
+                    through_day INTEGER NOT NULL,
+                    posts INTEGER NOT NULL,
+                    total REAL NOT NULL,
+                    PRIMARY KEY (handle, window_days)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS seen (
+                    post_id INTEGER PRIMARY KEY,
+                    day INTEGER NOT NULL
+                );
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def add_posts(self, df, id_column="post_id", time_column="created_at",
+                  handle_column="Handle", polarity_column="polarity"):
+        """
+        Fold scored posts into the daily buckets and rolling windows.
+
+        Posts are grouped by (account, day) first, so the database work is
+        one update per group rather than per post. Returns the number of
+        posts that had not been added before.
+        """
+        if df.empty:
+            return 0
+
+        posts = pd.DataFrame({
+            "post_id": pd.to_numeric(df[id_column]).astype("int64").to_numpy(),
+            "day": to_day(df[time_column]).to_numpy(),
+            "handle": df[handle_column].astype(str).str.lower().to_numpy(),
+            "polarity": df[polarity_column].astype(float).to_numpy(),
+        }).drop_duplicates("post_id")
+
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE batch (post_id INTEGER PRIMARY KEY)")
+            conn.executemany("INSERT INTO batch VALUES (?)", ((int(i),) for i in posts["post_id"]))
+            known = {row[0] for row in conn.execute(
+                "SELECT post_id FROM seen WHERE post_id IN (SELECT post_id FROM batch)")}
+            posts = posts[~posts["post_id"].isin(known)]
+            if posts.empty:
+                return 0
+
+            conn.executemany("INSERT INTO seen (post_id, day) VALUES (?, ?)",
+                             zip(posts["post_id"].tolist(), posts["day"].tolist()))
+
+            posts = pd.concat([posts, posts.assign(handle=OVERALL)], ignore_index=True)
+            posts["polarity_sq"] = posts["polarity"] ** 2
+            groups = (posts.groupby(["handle", "day"])
+                           .agg(count=("polarity", "size"), total=("polarity", "sum"),
+                                total_sq=("polarity_sq", "sum"))
+                           .reset_index()
+                           .sort_values("day", kind="stable"))
+
+            for handle, day, count, total, total_sq in groups.itertuples(index=False):
+                self._add_bucket(conn, handle, int(day), int(count), float(total), float(total_sq))
+
+            latest = int(posts["day"].max())
+            conn.execute("DELETE FROM seen WHERE day < ?", (latest - SEEN_RETENTION_DAYS,))
+
+        return len(posts) // 2
+
+    def _add_bucket(self, conn, handle, day, count, total, total_sq):
+        conn.execute("""
+            INSERT INTO daily (handle, day, posts, total, total_sq) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (handle, day) DO UPDATE SET
+                posts = posts + excluded.posts,
+                total = total + excluded.total,
+                total_sq = total_sq + excluded.total_sq
+        """, (handle, day, count, total, total_sq))
+
+        for window in self.windows:
+            row = conn.execute("SELECT through_day, posts, total FROM rolling WHERE handle = ? AND window_days = ?",
+                               (handle, window)).fetchone()
+            if row is None:
+                # First time this window is seen: seed it from the buckets (includes this one)
+                posts, window_total = self._bucket_sum(conn, handle, day - window, day)
+                conn.execute("INSERT INTO rolling VALUES (?, ?, ?, ?, ?)",
+                             (handle, window, day, posts, window_total))
+                continue
+
+            through_day, posts, window_total = row
+            if day > through_day:
+                # Evict the days that slid out of the window (each day leaves once)
+                evicted_posts, evicted_total = self._bucket_sum(
+                    conn, handle, through_day - window, min(day, through_day + window) - window)
+                posts -= evicted_posts
+                window_total -= evicted_total
+                if day - through_day >= window:
+                    posts, window_total = 0, 0.0
+                through_day = day
+            elif day <= through_day - window:
+                continue  # Too old for this window; only the daily bucket changes
+
+            conn.execute("UPDATE rolling SET through_day = ?, posts = ?, total = ? WHERE handle = ? AND window_days = ?",
+                         (through_day, posts + count, window_total + total, handle, window))
+
+    @staticmethod
+    def _bucket_sum(conn, handle, after_day, through_day):
+        """Posts and polarity total over days in (after_day, through_day]."""
+        posts, total = conn.execute(
+            "SELECT COALESCE(SUM(posts), 0), COALESCE(SUM(total), 0.0) FROM daily "
+            "WHERE handle = ? AND day > ? AND day <= ?", (handle, after_day, through_day)).fetchone()
+        return posts, total
+
+    def rolling(self, handle=OVERALL):
+        """{window: (posts, mean polarity)} as of the latest day seen for the account."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT window_days, posts, total FROM rolling WHERE handle = ?",
+                                (handle.lower(),)).fetchall()
+        return {window: (posts, total / posts if posts else None) for window, posts, total in rows}
+
+    def daily_series(self, handle=OVERALL, days=30):
+        """Daily post count, mean and standard deviation of polarity, oldest first."""
+        with self._connect() as conn:
+            frame = pd.read_sql_query(
+                "SELECT day, posts, total, total_sq FROM daily WHERE handle = ? "
+                "AND day > (SELECT MAX(day) FROM daily WHERE handle = ?) - ? ORDER BY day",
+                conn, params=(handle.lower(), handle.lower(), days))
+        frame["mean"] = frame["total"] / frame["posts"]
+        frame["std"] = (frame["total_sq"] / frame["posts"] - frame["mean"] ** 2).clip(lower=0) ** 0.5
+        frame["date"] = frame["day"].map(day_to_date)
+        return frame[["date", "posts", "mean", "std"]]
+
+    def snapshot(self):
+        """One row per account with posts and mean polarity for every window."""
+        with self._connect() as conn:
+            frame = pd.read_sql_query("SELECT handle, window_days, through_day, posts, total FROM rolling", conn)
+        if frame.empty:
+            return pd.DataFrame()
+        frame["mean"] = frame["total"] / frame["posts"].where(frame["posts"] > 0)
+        return frame.pivot(index="handle", columns="window_days", values=["posts", "mean", "through_day"])
+
+    def alerts(self, short=7, long=30, trend_threshold=TREND_THRESHOLD,
+               divergence_threshold=DIVERGENCE_THRESHOLD, min_posts=MIN_ALERT_POSTS):
+        """
+        Trend and divergence alerts from the rolling aggregates alone.
+
+        A trend alert fires when an account's short-window mean moved at least
+        trend_threshold away from its long-window mean; a divergence alert
+        when it sits at least divergence_threshold away from the overall
+        short-window mean.
+        """
+        table = self.snapshot()
+        if table.empty or short not in table["mean"].columns or long not in table["mean"].columns:
+            return []
+
+        means = table["mean"]
+        posts = table["posts"]
+        through_day = table["through_day"][short]
+        overall = means[short].get(OVERALL)
+        latest = through_day.max()
+        found = []
+        for handle in table.index:
+            # Accounts that went quiet keep their last window; don't compare them to today
+            if posts.at[handle, short] < min_posts or through_day[handle] <= latest - short:
+                continue
+            short_mean = means.at[handle, short]
+            long_mean = means.at[handle, long]
+            label = "overall" if handle == OVERALL else f"@{handle}"
+
+            if pd.notna(long_mean) and abs(short_mean - long_mean) >= trend_threshold:
+                direction = "more bullish" if short_mean > long_mean else "more bearish"
+                found.append({"type": "trend", "handle": handle, "change": short_mean - long_mean,
+                              "message": f"{label} turned {direction}: {short}d mean {short_mean:+.2f} "
+                                         f"vs {long}d mean {long_mean:+.2f}"})
+
+            if handle != OVERALL and pd.notna(overall) and abs(short_mean - overall) >= divergence_threshold:
+                found.append({"type": "divergence", "handle": handle, "change": short_mean - overall,
+                              "message": f"{label} diverges from the crowd: {short}d mean {short_mean:+.2f} "
+                                         f"vs overall {overall:+.2f}"})
+        return found
+
+
+if __name__ == "__main__":
+    series = SentimentSeries()
+    if len(sys.argv) > 1:
+        print(series.daily_series(sys.argv[1].lstrip("@")).to_string(index=False))
+    else:
+        print(series.snapshot().to_string())
+        for alert in series.alerts():
+            print(f"[!] {alert['message']}")
@@ -0,0 +1,73 @@
+from model_client import FakeModelClient
+from prompt_packing import (MAP_INSTRUCTIONS, MERGE_INSTRUCTIONS, POST_SEPARATOR, estimate_tokens,
+                            map_reduce_analysis, pack_posts)
+
+INSTRUCTIONS = "TASK: Write the final sentiment report.\n"
+HEADER = "\n--- POSTS ---\n"
+
+
+def make_posts(count, length=100):
+    return [f"@account{i % 7}: post {i} " + "x" * length for i in range(count)]
+
+
+def chunk_tokens(chunk):
+    return sum(estimate_tokens(post) + estimate_tokens(POST_SEPARATOR) for post in chunk)
+
+
+def test_pack_posts_keeps_every_post_in_order_under_the_budget():
+    posts = make_posts(200)
+    chunks = pack_posts(posts, budget_tokens=300)
+
+    assert [post for chunk in chunks for post in chunk] == posts
+    assert len(chunks) > 1
+    assert all(chunk_tokens(chunk) <= 300 for chunk in chunks)
+
+
+def test_pack_posts_gives_an_oversized_post_its_own_chunk():
+    posts = make_posts(3) + ["y" * 4000] + make_posts(3)
+    chunks = pack_posts(posts, budget_tokens=300, boundary_spacing=0)
+
+    assert ["y" * 4000] in chunks
+    assert [post for chunk in chunks for post in chunk] == posts
+
+
+def test_small_input_is_one_call_with_the_single_prompt():
+    client = FakeModelClient()
+    posts = make_posts(3)
+
+    result = map_reduce_analysis(client, INSTRUCTIONS, posts, HEADER, chunk_tokens=2000)
+
+    assert client.prompts == [INSTRUCTIONS + HEADER + POST_SEPARATOR.join(posts)]
+    assert result == client.respond(client.prompts[0])
+
+
+def test_map_calls_run_concurrently_and_fit_the_budget():
+    client = FakeModelClient(delay=0.05)
+    posts = make_posts(300)
+
+    map_reduce_analysis(client, INSTRUCTIONS, posts, HEADER, chunk_tokens=1000, max_workers=4)
+
+    map_prompts = [prompt for prompt in client.prompts if prompt.startswith(MAP_INSTRUCTIONS)]
+    assert len(map_prompts) > 4
+    assert all(estimate_tokens(prompt) <= 1000 for prompt in map_prompts)
+    assert 1 < client.max_active <= 4
+    # Every post reaches exactly one map prompt
+    assert sum(prompt.count("@account") for prompt in map_prompts) == len(posts)
+
+
+def test_overflowing_summaries_are_merged_in_rounds_before_the_final_reduce():
+    def respond(prompt):
+        # Long partial summaries, so they cannot all fit one reduce prompt
+        return "notes " + "z" * 1200 if not prompt.startswith(INSTRUCTIONS) else "FINAL REPORT"
+
+    client = FakeModelClient(respond)
+    posts = make_posts(300)
+
+    result = map_reduce_analysis(client, INSTRUCTIONS, posts, HEADER, chunk_tokens=1000)
+
+    merge_prompts = [prompt for prompt in client.prompts if prompt.startswith(MERGE_INSTRUCTIONS)]
+    assert merge_prompts
+    assert all(estimate_tokens(prompt) <= 1000 for prompt in merge_prompts)
+    assert client.prompts[-1].startswith(INSTRUCTIONS)
+    assert estimate_tokens(client.prompts[-1]) <= 1000
+    assert result == "FINAL REPORT"
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from analyze_tweets import (LIKES_COLUMN, RETWEETS_COLUMN, TEXT_COLUMN, USERNAME_COLUMN, analyze_posts,
+                            generate_gemini_prompt)
+from lexicon_scorer import top_informative
+from model_client import FakeModelClient
+
+POSTS = [
+    ("spotgamma", "Bullish breakout, strong rally into the close", 120, 40),
+    ("zerohedge", "Recession fear is spreading, credit selloff and panic", 300, 90),
+    ("wesbury", "Had a sandwich for lunch today", 0, 0),
+    ("FedGuy12", "Hawkish hike risk, weak liquidity and a drop lower", 80, 10),
+]
+
+
+def make_posts():
+    return pd.DataFrame(POSTS, columns=[USERNAME_COLUMN, TEXT_COLUMN, LIKES_COLUMN, RETWEETS_COLUMN])
+
+
+def test_top_informative_drops_the_neutral_post_and_keeps_order():
+    df = make_posts()
+
+    kept = top_informative(df, 3, TEXT_COLUMN, LIKES_COLUMN, RETWEETS_COLUMN)
+
+    assert kept[USERNAME_COLUMN].tolist() == ["spotgamma", "zerohedge", "FedGuy12"]
+
+
+def test_low_information_post_never_reaches_the_prompt():
+    df = make_posts()
+
+    prompt = generate_gemini_prompt(df, top_k=3)
+
+    assert "sandwich" not in prompt
+    assert all(text in prompt for _, text, _, _ in POSTS if "sandwich" not in text)
+
+
+def test_triage_applies_before_the_model_call():
+    client = FakeModelClient()
+
+    analyze_posts(make_posts(), client, top_k=3)
+
+    assert client.prompts and not any("sandwich" in prompt for prompt in client.prompts)
+
+
+def test_triage_keeps_everything_at_or_below_k():
+    assert "sandwich" in generate_gemini_prompt(make_posts(), top_k=4)
@@ -0,0 +1,202 @@
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Tokens are words or cashtags ($SPY); URLs are stripped first
+URL_PATTERN = r"https?://\S+"
+TOKEN_PATTERN = r"\$?[a-z][a-z0-9\-]+"
+
+STOPWORDS = {
+    "the", "and", "for", "that", "this", "with", "you", "are", "was", "but", "not", "have",
+    "has", "had", "its", "it's", "from", "they", "their", "them", "there", "what", "when",
+    "where", "which", "who", "will", "would", "can", "could", "should", "just", "than", "then",
+    "into", "out", "over", "about", "more", "most", "some", "any", "all", "our", "your", "his",
+    "her", "she", "him", "one", "two", "been", "being", "were", "also", "very", "much", "here",
+    "how", "why", "now", "get", "got", "like", "even", "still", "only", "these", "those", "via",
+    "amp", "rt", "too", "did", "does", "doing", "because", "while", "after", "before", "today",
+    "yes", "let", "say", "says", "said", "see", "know", "think", "going", "way", "really",
+}
+
+MAX_FEATURES = 4096   # Vocabulary cap: the most frequent informative terms
+MIN_DF = 2            # A term must appear in at least this many posts
+MAX_DF = 0.5          # ...and in at most this share of them
+
+DEFAULT_TOPICS = 12
+BATCH_SIZE = 1024
+MAX_BATCHES = 100
+INIT_SAMPLE = 2000    # Posts sampled for k-means++ seeding
+
+
+class TfidfMatrix(NamedTuple):
+    """L2-normalized TF-IDF rows in CSR form (one row per post)."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    vocabulary: np.ndarray
+
+
+class TopicClusters(NamedTuple):
+    labels: np.ndarray       # Cluster per post, -1 for posts with no vocabulary terms
+    similarity: np.ndarray   # Cosine similarity of each post to its centroid
+    centroids: np.ndarray    # (n_topics, n_terms), unit length
+    vocabulary: np.ndarray
+
+
+def build_tfidf(texts: pd.Series, max_features: int = MAX_FEATURES, min_df: int = MIN_DF,
+                max_df: float = MAX_DF) -> TfidfMatrix:
+    """
+    Sparse TF-IDF matrix for the texts, built column-wise with pandas.
+
+    Sublinear term frequency (1 + log tf) keeps one repetitive post from
+    dominating its row; rows are L2-normalized so dot products are cosines.
+    """
+    texts = texts.fillna("").astype(str).reset_index(drop=True)
+    n_posts = len(texts)
+
+    tokens = (texts.str.lower().str.replace(URL_PATTERN, " ", regex=True)
+                   .str.findall(TOKEN_PATTERN).explode().dropna())
+    tokens = tokens[~tokens.isin(STOPWORDS)]
+
+    pairs = pd.DataFrame({"post": tokens.index.to_numpy(), "term": tokens.to_numpy()})
+    term_counts = pairs.value_counts()   # (post, term) -> tf
+
+    doc_freq = term_counts.index.get_level_values("term").value_counts()
+    doc_freq = doc_freq[(doc_freq >= min_df) & (doc_freq <= max(min_df, max_df * n_posts))]
+    doc_freq = doc_freq.iloc[:max_features]
+    vocabulary = doc_freq.index.to_numpy()
+
+    column = pd.Index(vocabulary).get_indexer(term_counts.index.get_level_values("term"))
+    keep = column >= 0
+    post = term_counts.index.get_level_values("post").to_numpy()[keep]
+    column = column[keep]
+    tf = term_counts.to_numpy()[keep]
+
+    order = np.lexsort((column, post))
+    post, column, tf = post[order], column[order], tf[order]
+
+    idf = np.log((1 + n_posts) / (1 + doc_freq.to_numpy())) + 1
+    data = ((1 + np.log(tf)) * idf[column]).astype(np.float32)
+    norms = np.sqrt(np.bincount(post, weights=data * data, minlength=n_posts))
+    data /= norms[post]
+
+    indptr = np.zeros(n_posts + 1, dtype=np.int64)
+    np.cumsum(np.bincount(post, minlength=n_posts), out=indptr[1:])
+    return TfidfMatrix(indptr, column.astype(np.int32), data, vocabulary)
+
+
+def _take_rows(matrix: TfidfMatrix, rows: np.ndarray):
+    """(local_row, column, value) triplets for a subset of rows, without a Python loop."""
+    starts = matrix.indptr[rows]
+    lengths = matrix.indptr[rows + 1] - starts
+    local_row = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.repeat(starts, lengths) + offsets
+    return local_row, matrix.indices[positions], matrix.data[positions]
+
+
+def _similarities(local_row, column, value, n_rows, centroids):
+    """Cosine similarity of each sparse row to each (unit) centroid."""
+    sims = np.empty((n_rows, len(centroids)), dtype=np.float32)
+    for k, centroid in enumerate(centroids):
+        sims[:, k] = np.bincount(local_row, weights=value * centroid[column], minlength=n_rows)
+    return sims
+
+
+def _normalize(centroids):
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    return centroids / np.where(norms > 0, norms, 1)
+
+
+def _seed_centroids(matrix, candidates, n_topics, rng):
+    """k-means++ seeding (cosine distance) on a dense sample of posts."""
+    sample = rng.choice(candidates, size=min(INIT_SAMPLE, len(candidates)), replace=False)
+    local_row, column, value = _take_rows(matrix, sample)
+    dense = np.zeros((len(sample), len(matrix.vocabulary)), dtype=np.float32)
+    dense[local_row, column] = value
+
+    centroids = [dense[rng.integers(len(sample))]]
+    distance = 1 - dense @ centroids[0]
+    for _ in range(1, n_topics):
+        weights = np.clip(distance, 0, None) ** 2
+        if weights.sum() <= 0:
+            break  # every remaining post duplicates a centroid
+        centroids.append(dense[rng.choice(len(sample), p=weights / weights.sum())])
+        distance = np.minimum(distance, 1 - dense @ centroids[-1])
+    return np.array(centroids)
+
+
+def cluster_posts(texts: pd.Series, n_topics: int = DEFAULT_TOPICS, batch_size: int = BATCH_SIZE,
+                  max_batches: int = MAX_BATCHES, seed: int = 0) -> TopicClusters:
+    """
+    Spherical mini-batch k-means over TF-IDF vectors of the texts.
+
+    Each step assigns one random batch of posts to its nearest centroid and
+    moves centroids toward the batch mean with a per-centroid learning rate
+    (1 / posts seen so far), so the cost per step is independent of the
+    corpus size. A final pass labels every post.
+    """
+    matrix = build_tfidf(texts)
+    n_posts = len(matrix.indptr) - 1
+    n_terms = len(matrix.vocabulary)
+    candidates = np.flatnonzero(np.diff(matrix.indptr) > 0)
+
+    if n_terms == 0 or len(candidates) == 0:
+        return TopicClusters(np.full(n_posts, -1), np.zeros(n_posts, dtype=np.float32),
+                             np.zeros((0, n_terms), dtype=np.float32), matrix.vocabulary)
+
+    rng = np.random.default_rng(seed)
+    centroids = _seed_centroids(matrix, candidates, min(n_topics, len(candidates)), rng)
+    n_topics = len(centroids)
+    seen = np.zeros(n_topics)
+    batch_size = min(batch_size, len(candidates))
+
+    for _ in range(max_batches):
+        rows = rng.choice(candidates, size=batch_size, replace=False)
+        local_row, column, value = _take_rows(matrix, rows)
+        assigned = _similarities(local_row, column, value, batch_size, centroids).argmax(axis=1)
+
+        batch_counts = np.bincount(assigned, minlength=n_topics)
+        batch_sums = np.bincount(assigned[local_row] * n_terms + column, weights=value,
+                                 minlength=n_topics * n_terms).reshape(n_topics, n_terms)
+        seen += batch_counts
+        rate = np.divide(batch_counts, seen, out=np.zeros(n_topics), where=seen > 0)[:, None]
+        means = batch_sums / np.maximum(batch_counts, 1)[:, None]
+        updated = _normalize(centroids + rate * (means - centroids))
+
+        shift = np.abs(updated - centroids).max()
+        centroids = updated
+        if shift < 1e-4:
+            break
+
+    local_row, column, value = _take_rows(matrix, np.arange(n_posts))
+    sims = _similarities(local_row, column, value, n_posts, centroids)
+    labels = sims.argmax(axis=1)
+    similarity = sims[np.arange(n_posts), labels]
+    labels[np.diff(matrix.indptr) == 0] = -1
+    return TopicClusters(labels, similarity, centroids.astype(np.float32), matrix.vocabulary)
+
+
+def describe_clusters(clusters: TopicClusters, n_terms: int = 6, n_representatives: int = 2) -> list:
+    """
+    Summaries of the non-empty clusters, largest first.
+
+    Each summary has the post count, the highest-weighted centroid terms and
+    the positions of the posts closest to the centroid.
+    """
+    summaries = []
+    counts = np.bincount(clusters.labels[clusters.labels >= 0], minlength=len(clusters.centroids))
+    for topic in np.argsort(-counts, kind="stable"):
+        if counts[topic] == 0:
+            continue
+        members = np.flatnonzero(clusters.labels == topic)
+        closest = members[np.argsort(-clusters.similarity[members], kind="stable")[:n_representatives]]
+        top_terms = np.argsort(-clusters.centroids[topic])[:n_terms]
+        summaries.append({
+            "topic": int(topic),
+            "count": int(counts[topic]),
+            "terms": clusters.vocabulary[top_terms].tolist(),
+            "members": members,
+            "representatives": closest.tolist(),
+        })
+    return summaries
@@ -0,0 +1,109 @@
+import datetime
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Archive lives next to this script so fetcher and analyzer always agree
+BASE_DIR = os.getenv("SENTIMENT_STATE_DIR") or os.path.dirname(os.path.abspath(__file__))
+ARCHIVE_DIR = os.path.join(BASE_DIR, "tweet_archive")
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+    ("handle", pa.string()),
+    ("name", pa.string()),
+    ("text", pa.string()),
+    ("likes", pa.int64()),
+    ("retweets", pa.int64()),
+    ("url", pa.string()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+
+def _utc(value):
+    """Timestamp in UTC; naive values are taken to already be UTC"""
+    ts = pd.Timestamp(value)
+    return ts.tz_convert("UTC") if ts.tzinfo else ts.tz_localize("UTC")
+
+
+def _partition_dir(day, archive_dir):
+    return os.path.join(archive_dir, f"date={day}")
+
+
+def append_tweets(tweets, archive_dir=ARCHIVE_DIR):
+    """
+    Add tweet records to the archive, one Parquet partition per UTC day.
+
+    Records are dicts with the SCHEMA fields. A tweet already in the
+    archive is replaced by the newer copy (so metrics stay current);
+    only the days touched by this batch are rewritten.
+    Returns the number of tweets that were not archived before.
+    """
+    if not tweets:
+        return 0
+
+    frame = pd.DataFrame(tweets, columns=SCHEMA.names)
+    frame["id"] = frame["id"].astype("int64")
+    frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True)
+    frame["date"] = frame["created_at"].dt.strftime("%Y-%m-%d")
+
+    new_count = 0
+    for day, day_frame in frame.groupby("date"):
+        path = _partition_dir(day, archive_dir)
+        part_file = os.path.join(path, "part-0.parquet")
+        day_frame = day_frame.drop(columns="date")
+
+        if os.path.exists(part_file):
+            existing = pq.read_table(part_file, schema=SCHEMA).to_pandas()
+            new_count += int((~day_frame["id"].isin(existing["id"])).sum())
+            day_frame = pd.concat([existing, day_frame], ignore_index=True)
+        else:
+            new_count += day_frame["id"].nunique()
+
+        day_frame = (day_frame.drop_duplicates("id", keep="last")
+                              .sort_values("created_at", ascending=False))
+
+        os.makedirs(path, exist_ok=True)
+        # Dot-prefixed so readers scanning the partition never pick it up
+        tmp_file = os.path.join(path, ".part-0.parquet.tmp")
+        table = pa.Table.from_pandas(day_frame, schema=SCHEMA, preserve_index=False)
+        pq.write_table(table, tmp_file, compression="zstd")
+        os.replace(tmp_file, part_file)
+
+    return new_count
+
+
+def read_window(since, until=None, columns=None, archive_dir=ARCHIVE_DIR):
+    """
+    Load tweets created in [since, until) as a DataFrame, newest first.
+
+    Only the day partitions overlapping the window are opened and only
+    the requested columns are read from them.
+    """
+    until = until or datetime.datetime.now(datetime.timezone.utc)
+    columns = list(columns or SCHEMA.names)
+    if not os.path.isdir(archive_dir):
+        return pd.DataFrame({name: pd.Series(dtype=SCHEMA.field(name).type.to_pandas_dtype())
+                             for name in columns})
+
+    read_columns = columns if "created_at" in columns else columns + ["created_at"]
+    dataset = ds.dataset(archive_dir, format="parquet", schema=SCHEMA.append(pa.field("date", pa.string())),
+                         partitioning=PARTITIONING)
+
+    since_ts = _utc(since)
+    until_ts = _utc(until)
+
+    # Partition filter prunes whole days; the timestamp filter trims the edges
+    day_filter = ((ds.field("date") >= since_ts.strftime("%Y-%m-%d")) &
+                  (ds.field("date") <= until_ts.strftime("%Y-%m-%d")))
+    ts_type = SCHEMA.field("created_at").type
+    time_filter = ((ds.field("created_at") >= pa.scalar(since_ts.to_pydatetime(), ts_type)) &
+                   (ds.field("created_at") < pa.scalar(until_ts.to_pydatetime(), ts_type)))
+
+    table = dataset.to_table(columns=read_columns, filter=day_filter & time_filter)
+    frame = table.to_pandas().sort_values("created_at", ascending=False, ignore_index=True)
+    return frame[columns]
@@ -2,24 +2,88 @@ const express = require('express');
 const cors = require('cors');
 const { spawn } = require('child_process');
 const path = require('path');
+const metrics = require('./metrics');
+const { ReportCache } = require('./reportCache');
 require('dotenv').config();
 
+// Marks the stderr line where tracing.py reports a script's spans
+const TRACE_MARKER = '__TRACE__ ';
+
 const app = express();
 const PORT = process.env.PORT || 3000;
 
+// Shared by every report endpoint: identical concurrent requests run one Python process,
+// and slightly stale results are served while a background refresh runs
+const reportCache = new ReportCache({
+    maxEntries: Number(process.env.REPORT_CACHE_MAX_ENTRIES || 200),
+    freshMs: Number(process.env.REPORT_CACHE_FRESH_SECONDS || 60) * 1000,
+    staleMs: Number(process.env.REPORT_CACHE_STALE_SECONDS || 600) * 1000
+});
+
+function cacheKey(...parts) {
+    return parts.map((part) => String(part || '').trim().toUpperCase()).join(':');
+}
+
 // Middleware
 app.use(cors());
 app.use(express.json());
 app.use(express.static('public'));
 
-// Helper function to run Python scripts
+// Time every API request, labelled by route and status code
+app.use('/api', (req, res, next) => {
+    const started = process.hrtime.bigint();
+    res.on('finish', () => {
+        const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+        metrics.requestDuration.observe({ route: req.path, status: res.statusCode }, seconds);
+    });
+    next();
+});
+
+// Pull trace lines out of stderr, record them, and return the remaining stderr
+function extractTraces(errorData) {
+    const remaining = [];
+    for (const line of errorData.split('\n')) {
+        if (!line.startsWith(TRACE_MARKER)) {
+            remaining.push(line);
+            continue;
+        }
+        try {
+            const trace = JSON.parse(line.slice(TRACE_MARKER.length));
+            metrics.recordTrace(trace);
+            console.log(JSON.stringify({
+                event: 'trace',
+                script: trace.script,
+                pid: trace.pid,
+                spans: trace.spans.map((span) => ({ name: span.name, ms: span.durationMs, parent: span.parent }))
+            }));
+        } catch (error) {
+            console.error('Malformed trace line:', error.message);
+        }
+    }
+    return remaining.join('\n');
+}
+
+// Scripts print compact JSON for the server (see wire.py). Clients that send this media type in
+// Accept get those bytes forwarded untouched instead of a string wrapped in { success, data }
+const REPORT_MEDIA_TYPE = 'application/vnd.rbc-report+json';
+const SCRIPT_ENV = { REPORT_WIRE_FORMAT: 'compact' };
+
+function acceptsRawReport(req) {
+    return (req.get('Accept') || '').includes(REPORT_MEDIA_TYPE);
+}
+
+// With PROVIDER_REPLAY=record|replay, scripts run under provider_replay.py (offline benchmarks)
+const REPLAY_LAUNCHER = process.env.PROVIDER_REPLAY ? ['provider_replay.py', 'run'] : [];
+
+// Helper function to run Python scripts; resolves with stdout as a Buffer
 function runPythonScript(scriptPath, args = [], input = null) {
     return new Promise((resolve, reject) => {
-        const pythonProcess = spawn('python', [scriptPath, ...args], {
-            stdio: ['pipe', 'pipe', 'pipe']
+        const pythonProcess = spawn('python', [...REPLAY_LAUNCHER, scriptPath, ...args], {
+            stdio: ['pipe', 'pipe', 'pipe'],
+            env: { ...process.env, ...SCRIPT_ENV, TRACE_SPANS: '1', TRACE_SPAWN_TS: String(Date.now()) }
         });
 
-        let outputData = '';
+        const outputChunks = [];
         let errorData = '';
 
         // Send input if provided
@@ -30,7 +94,7 @@ function runPythonScript(scriptPath, args = [], input = null) {
 
         // Collect output
         pythonProcess.stdout.on('data', (data) => {
-            outputData += data.toString();
+            outputChunks.push(data);
         });
 
         pythonProcess.stderr.on('data', (data) => {
@@ -38,10 +102,51 @@ function runPythonScript(scriptPath, args = [], input = null) {
         });
 
         pythonProcess.on('close', (code) => {
+            errorData = extractTraces(errorData);
             if (code !== 0) {
                 reject(new Error(errorData || `Process exited with code ${code}`));
             } else {
-                resolve(outputData);
+                resolve(Buffer.concat(outputChunks));
+            }
+        });
+
+        pythonProcess.on('error', (error) => {
+            reject(new Error(`Failed to start Python: ${error.message}`));
+        });
+    });
+}
+
+// Run a Python script and hand each stdout line to onLine as soon as it arrives
+function streamPythonScript(scriptPath, args, onLine) {
+    const pythonProcess = spawn('python', [...REPLAY_LAUNCHER, scriptPath, ...args], {
+        stdio: ['ignore', 'pipe', 'pipe'],
+        env: { ...process.env, ...SCRIPT_ENV, TRACE_SPANS: '1', TRACE_SPAWN_TS: String(Date.now()) }
+    });
+
+    let pending = '';
+    let errorData = '';
+
+    // Decode as a stream so multi-byte characters split across chunks stay intact
+    pythonProcess.stdout.setEncoding('utf8');
+    pythonProcess.stdout.on('data', (data) => {
+        pending += data;
+        const lines = pending.split('\n');
+        pending = lines.pop();
+        lines.filter((line) => line.trim()).forEach(onLine);
+    });
+
+    pythonProcess.stderr.on('data', (data) => {
+        errorData += data.toString();
+    });
+
+    const finished = new Promise((resolve, reject) => {
+        pythonProcess.on('close', (code) => {
+            if (pending.trim()) onLine(pending);
+            errorData = extractTraces(errorData);
+            if (code !== 0 && code !== null) {
+                reject(new Error(errorData || `Process exited with code ${code}`));
+            } else {
+                resolve();
             }
         });
 
@@ -49,8 +154,87 @@ function runPythonScript(scriptPath, args = [], input = null) {
             reject(new Error(`Failed to start Python: ${error.message}`));
         });
     });
+
+    return { process: pythonProcess, finished };
 }
 
+// Combined report: one worker fetches every section concurrently and each one is
+// streamed as soon as it is ready. NDJSON by default, Server-Sent Events when the
+// client sends Accept: text/event-stream (or ?format=sse, for EventSource)
+async function streamReport(req, res) {
+    const params = { ...req.query, ...(req.body || {}) };
+    const { ticker, companyName, period } = params;
+
+    if (!ticker) {
+        return res.status(400).json({ error: 'Ticker is required' });
+    }
+
+    const useSse = params.format === 'sse' || (req.get('Accept') || '').includes('text/event-stream');
+    const write = (event, line) => {
+        if (res.destroyed) return;
+        res.write(useSse ? `event: ${event}\ndata: ${line}\n\n` : line + '\n');
+    };
+
+    res.status(200);
+    res.set({
+        'Content-Type': useSse ? 'text/event-stream' : 'application/x-ndjson',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    const args = [String(ticker)];
+    if (params.sections) args.push('--sections', ...String(params.sections).split(','));
+    if (companyName) args.push('--company-name', String(companyName));
+    if (period) args.push('--period', String(period));
+
+    const started = Date.now();
+    const sections = [];
+    const send = (line) => {
+        const record = JSON.parse(line);
+        sections.push({ section: record.section, ok: record.ok, ms: record.ms });
+        write(record.section, line);
+    };
+
+    // The cached value is the list of section lines. Callers that start or join the
+    // worker get lines as they arrive; it keeps running for the others (and the cache)
+    // if this client disconnects.
+    const key = cacheKey('report', ticker, params.sections, companyName, period);
+    const { status, result } = reportCache.get(key, async (emit) => {
+        console.log(`Streaming report for ${ticker}...`);
+        const lines = [];
+        const worker = streamPythonScript('report_worker.py', args, (line) => {
+            try {
+                JSON.parse(line);
+                lines.push(line);
+                emit(line);
+            } catch (error) {
+                console.error('Malformed report line:', error.message);
+            }
+        });
+        await worker.finished;
+        return lines;
+    }, {
+        onPartial: send,
+        // A failed section would otherwise be served from cache until the entry expires
+        shouldCache: (lines) => lines.length > 0 && lines.every((line) => JSON.parse(line).ok)
+    });
+
+    try {
+        const lines = await result;
+        if (status === 'HIT' || status === 'STALE') lines.forEach(send);
+    } catch (error) {
+        console.error('Error streaming report:', error);
+        write('error', JSON.stringify({ section: 'error', ok: false, error: 'Error fetching report' }));
+    }
+    write('done', JSON.stringify({ section: 'done', ok: true, cache: status, ms: Date.now() - started, sections }));
+    if (!res.destroyed) res.end();
+}
+
+app.get('/api/report', streamReport);
+app.post('/api/report', streamReport);
+
 // API endpoint to get Yahoo Finance stock data
 app.post('/api/stock-data', async (req, res) => {
     const { ticker } = req.body;
@@ -60,12 +244,20 @@ app.post('/api/stock-data', async (req, res) => {
     }
 
     try {
-        console.log(`Fetching Yahoo Finance data for ${ticker}...`);
-        const output = await runPythonScript('main.py', [ticker]);
-        
+        const { status, result } = reportCache.get(cacheKey('stock', ticker), () => {
+            console.log(`Fetching Yahoo Finance data for ${ticker}...`);
+            return runPythonScript('main.py', [ticker]);
+        });
+        const output = await result;
+
+        res.set('X-Cache', status);
+        if (acceptsRawReport(req)) {
+            res.set({ 'Content-Type': REPORT_MEDIA_TYPE, 'Content-Length': output.length });
+            return res.end(output);
+        }
         res.json({
             success: true,
-            data: output
+            data: output.toString()
         });
     } catch (error) {
         console.error('Error fetching stock data:', error);
@@ -85,12 +277,16 @@ app.post('/api/sec-data', async (req, res) => {
     }
 
     try {
-        console.log(`Fetching SEC data for ${ticker}...`);
-        const output = await runPythonScript('sec_data_fetcher.py', [], ticker);
-        
+        const { status, result } = reportCache.get(cacheKey('sec', ticker), () => {
+            console.log(`Fetching SEC data for ${ticker}...`);
+            return runPythonScript('sec_data_fetcher.py', [], ticker);
+        });
+        const output = await result;
+
+        res.set('X-Cache', status);
         res.json({
             success: true,
-            data: output
+            data: output.toString()
         });
     } catch (error) {
         console.error('Error fetching SEC data:', error);
@@ -119,8 +315,6 @@ app.post('/api/news', async (req, res) => {
     }
 
     try {
-        console.log(`Fetching news for ${ticker}...`);
-        
         const pythonCode = `
 from news_fetcher import NewsFetcher
 import json
@@ -137,13 +331,20 @@ except Exception as e:
     print(json.dumps({"error": str(e)}))
 `;
 
-        const output = await runPythonScript('-c', [pythonCode]);
-        const articles = JSON.parse(output);
+        // Errors are thrown before caching, so a failed lookup is retried next time
+        const { status, result } = reportCache.get(cacheKey('news', ticker, companyName), async () => {
+            console.log(`Fetching news for ${ticker}...`);
+            const output = await runPythonScript('-c', [pythonCode]);
+            const articles = JSON.parse(output.toString());
 
-        if (articles.error) {
-            throw new Error(articles.error);
-        }
+            if (articles.error) {
+                throw new Error(articles.error);
+            }
+            return articles;
+        });
+        const articles = await result;
 
+        res.set('X-Cache', status);
         res.json({
             success: true,
             articles: articles
@@ -158,6 +359,176 @@ except Exception as e:
     }
 });
 
+// Screener: filter every cached ticker with an expression (see screener.py fields)
+// GET /api/screen?q=salesGrowth.Q1 > 20 and rsi < 30&sort=-salesGrowth&limit=50
+async function runScreen(req, res) {
+    const params = { ...req.query, ...(req.body || {}) };
+    const expression = params.q || params.expression;
+
+    if (!expression) {
+        return res.status(400).json({ error: 'Expression is required' });
+    }
+
+    // --sort=<value> and a trailing -- keep argparse from reading '-salesGrowth' or '-rsi > 0' as options
+    const args = ['screen', '--json'];
+    if (params.sort) args.push(`--sort=${params.sort}`);
+    if (params.limit) args.push('--limit', String(parseInt(params.limit, 10) || 100));
+    args.push('--', String(expression));
+
+    try {
+        const output = await runPythonScript('screener.py', args);
+        const result = JSON.parse(output.toString());
+        res.status(result.success ? 200 : 400).json(result);
+    } catch (error) {
+        console.error('Error running screen:', error);
+        res.status(500).json({
+            error: 'Error running screen',
+            details: error.message
+        });
+    }
+}
+
+app.get('/api/screen', runScreen);
+app.post('/api/screen', runScreen);
+
+// Latency histograms and report cache counters: Prometheus text by default, JSON with ?format=json
+app.get('/api/metrics', (req, res) => {
+    if (req.query.format === 'json') {
+        return res.json({ ...metrics.renderJSON(), reportCache: reportCache.stats() });
+    }
+    res.type('text/plain; version=0.0.4').send(metrics.renderPrometheus() + reportCache.renderPrometheus() + '\n');
+});
+
+// Live quotes: one long-lived quote_stream.py is shared by every subscriber. A symbol is
+// subscribed upstream while at least one client watches it, and the process exits when
+// the last client leaves. Without FINNHUB_API_KEY (or with QUOTE_STREAM_SIMULATE=1) it
+// trades against the local simulator.
+const QUOTE_INTERVALS = ['1m', '5m', '1h'];
+const quoteClientsBySymbol = new Map();
+let quoteStream = null;
+
+function quoteStreamArgs() {
+    const args = ['quote_stream.py', 'serve'];
+    if (process.env.QUOTE_STREAM_URL) {
+        args.push('--url', process.env.QUOTE_STREAM_URL);
+    } else if (process.env.QUOTE_STREAM_SIMULATE === '1' || !process.env.FINNHUB_API_KEY) {
+        args.push('--simulate');
+    }
+    return args;
+}
+
+function sendQuoteCommand(op, symbols) {
+    if (quoteStream && symbols.length) {
+        quoteStream.stdin.write(JSON.stringify({ op, symbols }) + '\n');
+    }
+}
+
+function routeQuote(line) {
+    let update;
+    try {
+        update = JSON.parse(line);
+    } catch (error) {
+        console.error('Malformed quote line:', error.message);
+        return;
+    }
+    for (const client of quoteClientsBySymbol.get(update.symbol) || []) {
+        if (client.intervals.has(update.interval) && !client.res.destroyed) {
+            client.res.write(`event: ${update.final ? 'bar' : 'quote'}\ndata: ${line}\n\n`);
+        }
+    }
+}
+
+function ensureQuoteStream() {
+    if (quoteStream) return;
+    const child = spawn('python', quoteStreamArgs(), {
+        stdio: ['pipe', 'pipe', 'pipe'],
+        env: { ...process.env, ...SCRIPT_ENV }
+    });
+    quoteStream = child;
+
+    let pending = '';
+    child.stdout.setEncoding('utf8');
+    child.stdout.on('data', (data) => {
+        pending += data;
+        const lines = pending.split('\n');
+        pending = lines.pop();
+        lines.filter((line) => line.trim()).forEach(routeQuote);
+    });
+    child.stderr.on('data', (data) => process.stderr.write(`[quotes] ${data}`));
+    child.on('close', (code) => {
+        if (quoteStream !== child) return;
+        quoteStream = null;
+        console.error(`Quote stream exited with code ${code}`);
+        // Still watched: restart and resubscribe
+        if (quoteClientsBySymbol.size) setTimeout(ensureQuoteStream, 1000);
+    });
+
+    sendQuoteCommand('subscribe', [...quoteClientsBySymbol.keys()]);
+}
+
+function stopQuoteStream() {
+    if (!quoteStream) return;
+    // Closing stdin ends the service cleanly
+    quoteStream.stdin.end();
+    quoteStream = null;
+}
+
+// Server-Sent Events: 'quote' for the open bar as it changes, 'bar' once a bar closes.
+// GET /api/quotes/stream?symbols=AAPL,MSFT&intervals=1m,5m
+app.get('/api/quotes/stream', (req, res) => {
+    const symbols = [...new Set(String(req.query.symbols || '').split(',')
+        .map((symbol) => symbol.trim().toUpperCase()).filter(Boolean))];
+    if (!symbols.length) {
+        return res.status(400).json({ error: 'At least one symbol is required' });
+    }
+    const requested = req.query.intervals ? String(req.query.intervals).split(',') : QUOTE_INTERVALS;
+    const intervals = new Set(requested.filter((interval) => QUOTE_INTERVALS.includes(interval)));
+
+    res.status(200);
+    res.set({
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    res.flushHeaders();
+
+    const client = { res, intervals };
+    const added = [];
+    for (const symbol of symbols) {
+        if (!quoteClientsBySymbol.has(symbol)) {
+            quoteClientsBySymbol.set(symbol, new Set());
+            added.push(symbol);
+        }
+        quoteClientsBySymbol.get(symbol).add(client);
+    }
+    if (quoteStream) {
+        sendQuoteCommand('subscribe', added);
+    } else {
+        ensureQuoteStream();
+    }
+
+    const heartbeat = setInterval(() => res.write(': ping\n\n'), 15000);
+    req.on('close', () => {
+        clearInterval(heartbeat);
+        const removed = [];
+        for (const symbol of symbols) {
+            const clients = quoteClientsBySymbol.get(symbol);
+            clients.delete(client);
+            if (!clients.size) {
+                quoteClientsBySymbol.delete(symbol);
+                removed.push(symbol);
+            }
+        }
+        sendQuoteCommand('unsubscribe', removed);
+        if (!quoteClientsBySymbol.size) stopQuoteStream();
+    });
+});
+
+process.on('exit', () => {
+    if (quoteStream) quoteStream.kill('SIGTERM');
+});
+
 // Health check endpoint
 app.get('/api/health', (req, res) => {
     res.json({ status: 'ok', message: 'Server is running' });
@@ -168,6 +539,22 @@ app.get('/', (req, res) => {
     res.sendFile(path.join(__dirname, 'public', 'index.html'));
 });
 
+// With WARMUP_SCHEDULE=1, keep watchlist reports warm in the background (see warmup.py)
+function startWarmupScheduler() {
+    const scheduler = spawn('python', [...REPLAY_LAUNCHER, 'warmup.py', 'schedule'], {
+        stdio: ['ignore', 'pipe', 'pipe'],
+        env: process.env
+    });
+    scheduler.stdout.on('data', (data) => process.stdout.write(`[warmup] ${data}`));
+    scheduler.stderr.on('data', (data) => process.stderr.write(`[warmup] ${data}`));
+    scheduler.on('close', (code) => console.error(`Warm-up scheduler exited with code ${code}`));
+    process.on('exit', () => scheduler.kill('SIGTERM'));
+}
+
+if (process.env.WARMUP_SCHEDULE === '1') {
+    startWarmupScheduler();
+}
+
 // Start server
 app.listen(PORT, () => {
     console.log(`
@@ -0,0 +1,47 @@
+import math
+
+from sec_point_in_time import AsOfFactIndex
+
+Q2 = {'start': '2024-04-01', 'end': '2024-06-30'}
+Q3 = {'start': '2024-07-01', 'end': '2024-09-30'}
+
+# Q3 is first filed in a 10-Q, then restated in the 10-K (fp FY) with a new value
+FACTS = {'facts': {'us-gaap': {'Revenues': {'units': {'USD': [
+    {**Q2, 'val': 90, 'fy': 2024, 'fp': 'Q2', 'form': '10-Q', 'filed': '2024-08-01'},
+    {**Q3, 'val': 100, 'fy': 2024, 'fp': 'Q3', 'form': '10-Q', 'filed': '2024-11-01'},
+    {**Q3, 'val': 110, 'fy': 2024, 'fp': 'FY', 'form': '10-K', 'filed': '2025-02-15'},
+]}}}}}
+
+DATES = ['2024-09-01', '2024-12-01', '2025-03-01']
+
+
+def joined_values(index, date):
+    row = index.asOfJoin('Revenues', [date]).iloc[0]
+    return {label.split('/')[1]: value for label, value in row.items() if not math.isnan(value)}
+
+
+def test_quarterly_filter_uses_the_as_of_version_in_every_api():
+    index = AsOfFactIndex(FACTS)
+
+    for date in DATES:
+        series = {point['date']: point['value'] for point in index.seriesAsOf('Revenues', date)}
+        assert joined_values(index, date) == series
+
+        latest = index.latestAsOfJoin('Revenues', [date]).iloc[0]
+        newest = max(series)
+        assert latest['periodEnd'].endswith(newest) and latest['value'] == series[newest]
+
+
+def test_10k_restatement_hides_the_quarter_once_it_is_current():
+    index = AsOfFactIndex(FACTS)
+
+    assert joined_values(index, '2024-12-01') == {'2024-06-30': 90, '2024-09-30': 100}
+    assert joined_values(index, '2025-03-01') == {'2024-06-30': 90}
+    assert index.latestAsOfJoin('Revenues', ['2025-03-01']).iloc[0]['value'] == 90
+
+
+def test_without_the_filter_the_restated_value_is_used():
+    index = AsOfFactIndex(FACTS)
+
+    assert index.asOfJoin('Revenues', ['2025-03-01'], quarterlyOnly=False).iloc[0]['2024-07-01/2024-09-30'] == 110
+    assert [p['value'] for p in index.seriesAsOf('Revenues', '2025-03-01', quarterlyOnly=False)] == [110, 90]
@@ -0,0 +1,117 @@
+"""
+Tracing
+Lightweight span timings for the report scripts, reported to the server
+"""
+
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# server.js sets these when it spawns a script; standalone runs stay silent
+TRACE_ENV_VAR = 'TRACE_SPANS'
+SPAWN_TS_ENV_VAR = 'TRACE_SPAWN_TS'
+
+# Prefix of the stderr line carrying the finished trace, parsed by server.js
+TRACE_MARKER = '__TRACE__ '
+
+_enabled = os.getenv(TRACE_ENV_VAR) == '1'
+_origin = time.perf_counter()
+_originWall = time.time()
+_spans: List[Dict] = []
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_current: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar('span', default=None)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Time a block as a named span, nested under the enclosing span
+
+    Args:
+        name: Span name, e.g. 'yfinance.info' or 'sec.getCompanyFacts'
+        **attrs: Extra fields recorded with the span (ticker, host, ...)
+    """
+    if not _enabled:
+        yield
+        return
+
+    spanId = next(_ids)
+    parent = _current.get()
+    token = _current.set(spanId)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        finished = time.perf_counter()
+        _current.reset(token)
+        record = {
+            'id': spanId,
+            'parent': parent,
+            'name': name,
+            'startMs': round((started - _origin) * 1000, 3),
+            'durationMs': round((finished - started) * 1000, 3),
+        }
+        if attrs:
+            record['attrs'] = attrs
+        if error:
+            record['error'] = error
+        with _lock:
+            _spans.append(record)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span(); defaults to the function's qualified name"""
+    def decorate(func):
+        spanName = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(spanName):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def spans() -> List[Dict]:
+    """Spans finished so far, plus process startup if the spawn time is known"""
+    with _lock:
+        finished = list(_spans)
+
+    spawnTs = os.getenv(SPAWN_TS_ENV_VAR)
+    if spawnTs:
+        # Interpreter start plus every import that ran before this module
+        startup = max(0.0, _originWall * 1000 - float(spawnTs))
+        finished.insert(0, {'id': 0, 'parent': None, 'name': 'process.startup',
+                            'startMs': round(-startup, 3), 'durationMs': round(startup, 3)})
+    return finished
+
+
+def _emit():
+    print(TRACE_MARKER + json.dumps({
+        'script': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else '-c',
+        'pid': os.getpid(),
+        'spans': spans(),
+    }), file=sys.stderr)
+
+
+if _enabled:
+    atexit.register(_emit)
@@ -0,0 +1,283 @@
+"""
+Report Warm-Up
+Refresh watchlist reports ahead of market open, after earnings and before they expire
+
+    python warmup.py run [--force]     # one pass now (e.g. from cron)
+    python warmup.py schedule          # pre-market pass each weekday, refresh-ahead during the session,
+                                       # then an after-close pass for that day's earnings reporters
+    python warmup.py stats [--days 7]  # warm-cache hit rates of interactive requests
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from provider_http import TokenBucket
+from report_store import SOURCE_WARMUP, ReportStore
+from report_worker import SECTIONS, loadSection, parseArgs, sectionKey
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WATCHLIST = os.path.join(BASE_DIR, 'watchlist.json')
+
+DEFAULT_CONFIG = {
+    'tickers': [],
+    'sections': SECTIONS,
+    'timezone': 'America/New_York',
+    'preMarket': '08:30',
+    'marketClose': '16:00',
+    'afterClose': '17:00',
+    'checkMinutes': 10,
+    'refreshAhead': 0.25,
+    'topRequested': 10,
+    'workers': 2,
+}
+
+# yfinance has no published limit and sits outside provider_http; keep to a polite pace
+YFINANCE_TICKERS_PER_SECOND = 0.5
+
+# NewsAPI's daily budget is shared with interactive requests; leave them at least this much
+NEWS_QUOTA_FLOOR = 50
+
+# Sections skipped entirely when their provider key is not configured
+REQUIRED_KEYS = {'news': 'NEWS_API_KEY', 'chart': 'FINNHUB_API_KEY'}
+
+# Only these are refreshed ahead of expiry during the session; the rest wait for the pre-market pass
+SESSION_SECTIONS = {'stock', 'chart'}
+
+# Sections that change when a company reports earnings
+EARNINGS_SECTIONS = ['stock', 'sec']
+
+
+def loadConfig(path: str = DEFAULT_WATCHLIST) -> Dict:
+    """Read the watchlist config, falling back to defaults for missing keys"""
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            config.update(json.load(file))
+    else:
+        print(f"Watchlist {path} not found; warming the most requested tickers only", file=sys.stderr)
+    config['tickers'] = [ticker.strip().upper() for ticker in config['tickers']]
+    config['sections'] = [section for section in config['sections']
+                          if section not in REQUIRED_KEYS or os.getenv(REQUIRED_KEYS[section])]
+    return config
+
+
+def prioritize(store: ReportStore, watchlist: List[str], topRequested: int) -> List[Tuple[str, float]]:
+    """
+    Watchlist plus the most requested tickers, most recently in demand first
+
+    Returns:
+        (ticker, weighted request count) pairs
+    """
+    frequency = store.requestFrequency()
+    tickers = set(watchlist) | set(list(frequency)[:topRequested])
+    return sorted(((ticker, frequency.get(ticker, 0.0)) for ticker in tickers),
+                  key=lambda item: (-item[1], item[0]))
+
+
+def earningsDates(store: ReportStore, ticker: str) -> List[date]:
+    """Last and next earnings dates from the stored stock section, if any"""
+    cached = store.get(sectionKey('stock', ticker, parseArgs([ticker])))
+    stored = (cached[0] or {}).get('earningsDates') if cached else None
+    dates = []
+    for value in (stored or {}).values():
+        try:
+            dates.append(datetime.strptime(value, '%Y-%m-%d').date())
+        except (TypeError, ValueError):
+            pass
+    return dates
+
+
+def isDue(store: ReportStore, section: str, ticker: str, refreshAhead: float, now: datetime,
+          afterClose: dtime, earningsOnly: bool = False) -> bool:
+    """
+    Whether a section should be refreshed now
+
+    Due when missing, within refreshAhead of its TTL (1.0 refreshes everything),
+    or fetched before earnings came out. An earnings date counts as released at
+    afterClose that day, so after-close reporters are caught the same evening.
+    With earningsOnly, only the earnings rule applies.
+    """
+    cached = store.get(sectionKey(section, ticker, parseArgs([ticker])))
+    if cached is None:
+        return not earningsOnly
+    age = cached[1]
+    if not earningsOnly and age >= store.ttlSeconds.get(section, 0) * (1 - refreshAhead):
+        return True
+    if section in EARNINGS_SECTIONS:
+        fetchedAt = datetime.fromtimestamp(time.time() - age, now.tzinfo)
+        return any(fetchedAt < datetime.combine(reported, afterClose, now.tzinfo) <= now
+                   for reported in earningsDates(store, ticker))
+    return False
+
+
+def newsBudget(config: Dict) -> int:
+    """News sections this pass may refresh without eating into interactive quota"""
+    if 'news' not in config['sections']:
+        return 0
+    from news_cache import NewsCache
+    return max(NewsCache().quotaRemaining() - NEWS_QUOTA_FLOOR, 0)
+
+
+def warmPass(store: ReportStore, config: Dict, refreshAhead: float, sections: Optional[List[str]] = None,
+             earningsOnly: bool = False) -> Dict:
+    """
+    Refresh every due section of the prioritized tickers
+
+    Args:
+        store: Report store to fill
+        config: Watchlist config
+        refreshAhead: Share of each TTL before expiry at which entries are refreshed
+        sections: Sections considered (default: the config's)
+        earningsOnly: Refresh only sections fetched before earnings came out
+
+    Returns:
+        Pass summary (tickers, refreshed, failed, skipped, seconds)
+    """
+    started = time.perf_counter()
+    sections = sections or config['sections']
+    now = datetime.now(ZoneInfo(config['timezone']))
+    afterClose = datetime.strptime(config['afterClose'], '%H:%M').time()
+    ranked = prioritize(store, config['tickers'], config['topRequested'])
+
+    jobs = [(ticker, section) for ticker, _ in ranked for section in sections
+            if isDue(store, section, ticker, refreshAhead, now, afterClose, earningsOnly)]
+    newsLeft = newsBudget(config)
+    skipped = 0
+    if newsLeft < sum(section == 'news' for _, section in jobs):
+        # Lowest priority tickers lose their news refresh first
+        kept = []
+        for ticker, section in jobs:
+            if section == 'news':
+                if newsLeft <= 0:
+                    skipped += 1
+                    continue
+                newsLeft -= 1
+            kept.append((ticker, section))
+        jobs = kept
+
+    # SEC, Finnhub and NewsAPI are paced by provider_http's per-host limits in this process
+    yfinancePace = TokenBucket(YFINANCE_TICKERS_PER_SECOND, burst=1)
+
+    def warm(job):
+        ticker, section = job
+        if section == 'stock':
+            yfinancePace.wait()
+        try:
+            loadSection(section, ticker, parseArgs([ticker]), store, SOURCE_WARMUP)
+            return True
+        except Exception as e:
+            print(f"Warm-up failed for {ticker} {section}: {e}", file=sys.stderr)
+            return False
+
+    with ThreadPoolExecutor(max_workers=max(1, config['workers'])) as executor:
+        results = list(executor.map(warm, jobs))
+
+    return {
+        'tickers': len(ranked),
+        'refreshed': sum(results),
+        'failed': len(results) - sum(results),
+        'skipped': skipped,
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+
+def printHitRates(store: ReportStore, days: int = 1):
+    """Log interactive hit rates per day and section"""
+    rows = store.hitRates(days)
+    if not rows:
+        print("No interactive report lookups recorded yet")
+        return
+    for row in rows:
+        print(f"{row['day']} {row['section']:<6} lookups={row['lookups']:<5} "
+              f"hit={row['hitRate']:.0%} warm hit={row['warmHitRate']:.0%}")
+
+
+def logPass(label: str, summary: Dict, store: ReportStore):
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] {label}: refreshed {summary['refreshed']} sections "
+          f"for {summary['tickers']} tickers in {summary['seconds']}s "
+          f"({summary['failed']} failed, {summary['skipped']} news skipped for quota)")
+    printHitRates(store)
+    sys.stdout.flush()
+
+
+def sessionBounds(config: Dict, day: date) -> Tuple[datetime, datetime, datetime]:
+    """Pre-market start, market close and after-close pass time on a given day, in the config's timezone"""
+    zone = ZoneInfo(config['timezone'])
+    return tuple(datetime.combine(day, datetime.strptime(config[name], '%H:%M').time(), zone)
+                 for name in ('preMarket', 'marketClose', 'afterClose'))
+
+
+def nextPreMarket(config: Dict, now: datetime) -> datetime:
+    """Next weekday pre-market start after now"""
+    day = now.date()
+    while True:
+        start = sessionBounds(config, day)[0]
+        if day.weekday() < 5 and start > now:
+            return start
+        day += timedelta(days=1)
+
+
+def schedule(store: ReportStore, config: Dict):
+    """
+    Run forever: a full pass at each weekday's pre-market time, refresh-ahead
+    passes every checkMinutes until the close, then one after-close pass for
+    the stock and SEC sections of tickers that reported that day
+    """
+    zone = ZoneInfo(config['timezone'])
+    lastFullPass = lastAfterClosePass = None
+    while True:
+        now = datetime.now(zone)
+        start, close, afterClose = sessionBounds(config, now.date())
+        weekday = now.weekday() < 5
+        inSession = weekday and start <= now < close
+
+        if inSession and lastFullPass != now.date():
+            logPass("Pre-market pass", warmPass(store, config, refreshAhead=1.0), store)
+            lastFullPass = now.date()
+        elif inSession:
+            sessionSections = [s for s in config['sections'] if s in SESSION_SECTIONS]
+            logPass("Refresh-ahead pass", warmPass(store, config, config['refreshAhead'], sessionSections), store)
+        elif weekday and now >= afterClose and lastAfterClosePass != now.date():
+            earningsSections = [s for s in config['sections'] if s in EARNINGS_SECTIONS]
+            logPass("After-close pass", warmPass(store, config, 0.0, earningsSections, earningsOnly=True), store)
+            lastAfterClosePass = now.date()
+
+        now = datetime.now(zone)
+        if inSession:
+            wakeAt = now + timedelta(minutes=config['checkMinutes'])
+        elif weekday and close <= now < afterClose:
+            wakeAt = afterClose
+        else:
+            wakeAt = nextPreMarket(config, now)
+        time.sleep(max(1.0, (wakeAt - now).total_seconds()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the report store for watchlist tickers")
+    parser.add_argument('command', choices=['run', 'schedule', 'stats'])
+    parser.add_argument('--watchlist', default=DEFAULT_WATCHLIST)
+    parser.add_argument('--force', action='store_true', help="refresh every section, fresh or not")
+    parser.add_argument('--days', type=int, default=7, help="days of hit rates to show (stats)")
+    args = parser.parse_args()
+
+    store = ReportStore()
+    if args.command == 'stats':
+        printHitRates(store, args.days)
+        return
+
+    config = loadConfig(args.watchlist)
+    if args.command == 'run':
+        logPass("Warm-up pass", warmPass(store, config, refreshAhead=1.0 if args.force else 0.0), store)
+    else:
+        schedule(store, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Wire Format
+Serialize script output for the server: compact when it asks, readable otherwise
+"""
+
+import json
+import os
+import sys
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# server.js sets this when it spawns a script; standalone runs keep indented output
+WIRE_FORMAT_ENV_VAR = 'REPORT_WIRE_FORMAT'
+COMPACT = 'compact'
+PRETTY = 'pretty'
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def wireFormat() -> str:
+    return COMPACT if os.getenv(WIRE_FORMAT_ENV_VAR) == COMPACT else PRETTY
+
+
+def dumps(obj, compact: Optional[bool] = None) -> bytes:
+    """
+    Encode a payload as UTF-8 JSON
+
+    Compact output has no whitespace and maps NaN/Inf to null. orjson is used
+    when installed; the standard library gives the same text, only slower.
+
+    Args:
+        obj: JSON-compatible payload (numpy scalars and arrays allowed with orjson)
+        compact: Force compact (True) or indented (False) output; default follows the environment
+
+    Returns:
+        Encoded bytes
+    """
+    if compact is None:
+        compact = wireFormat() == COMPACT
+
+    if not compact:
+        return json.dumps(obj, indent=2, default=str).encode('utf-8')
+    if orjson is not None:
+        return orjson.dumps(obj, option=ORJSON_OPTIONS, default=str)
+    try:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, allow_nan=False,
+                          default=str).encode('utf-8')
+    except ValueError:
+        return json.dumps(_finite(obj), separators=(',', ':'), ensure_ascii=False,
+                          default=str).encode('utf-8')
+
+
+def _finite(obj):
+    """Replace NaN and Inf with None, recursively"""
+    if isinstance(obj, dict):
+        return {k: _finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(v) for v in obj]
+    if isinstance(obj, float) and (obj != obj or obj in (float('inf'), float('-inf'))):
+        return None
+    return obj
+
+
+def write(obj, stream=None):
+    """Write one payload and a trailing newline to stdout's byte stream, then flush"""
+    stream = stream or sys.stdout
+    buffer = getattr(stream, 'buffer', None)
+    data = dumps(obj) + b'\n'
+    if buffer is not None:
+        stream.flush()
+        buffer.write(data)
+        buffer.flush()
+    else:
+        stream.write(data.decode('utf-8'))
+        stream.flush()
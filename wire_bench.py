@@ -0,0 +1,188 @@
+"""
+Wire Benchmark
+Payload size and serialization CPU of the Python -> Node -> browser path, per wire format
+
+    python wire_bench.py [--runs 50] [--payload path/to/report.json ...]
+
+Without --payload, synthetic Finnhub chart reports (1y daily, 5y daily, 5d at 5 minutes)
+are built with the real candle and indicator code.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import finnhub_chart_fetcher
+import wire
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, '.cache', 'bench')
+
+# How server.js handles a script's stdout before and after the compact format:
+#   envelope: chunks joined into a string, re-encoded as { success, data: "<escaped JSON>" },
+#             decoded twice by the browser
+#   raw:      chunks concatenated and sent as-is, decoded once by the browser
+NODE_CODE = r"""
+const fs = require('fs');
+const [file, runs] = [process.argv[1], Number(process.argv[2])];
+const bytes = fs.readFileSync(file);
+const chunks = [];
+for (let i = 0; i < bytes.length; i += 65536) chunks.push(bytes.subarray(i, i + 65536));
+
+function time(fn) {
+    const samples = [];
+    let result;
+    for (let i = 0; i < runs; i++) {
+        const started = process.hrtime.bigint();
+        result = fn();
+        samples.push(Number(process.hrtime.bigint() - started) / 1e6);
+    }
+    samples.sort((a, b) => a - b);
+    return { ms: samples[Math.floor(samples.length / 2)], result };
+}
+
+const envelopeServer = time(() => {
+    let output = '';
+    for (const chunk of chunks) output += chunk.toString();
+    return Buffer.from(JSON.stringify({ success: true, data: output }));
+});
+const rawServer = time(() => Buffer.concat(chunks));
+const envelopeClient = time(() => JSON.parse(JSON.parse(envelopeServer.result.toString()).data));
+const rawClient = time(() => JSON.parse(rawServer.result.toString()));
+
+console.log(JSON.stringify({
+    envelope: { wireBytes: envelopeServer.result.length, serverMs: envelopeServer.ms, clientMs: envelopeClient.ms },
+    raw: { wireBytes: rawServer.result.length, serverMs: rawServer.ms, clientMs: rawClient.ms },
+}));
+"""
+
+# (label, wire format the script prints, how the server forwards it)
+CASES = [
+    ('indented JSON, envelope (before)', 'pretty', 'envelope'),
+    ('compact JSON, envelope', 'compact', 'envelope'),
+    ('compact JSON, raw (after)', 'compact', 'raw'),
+]
+
+
+class _CandleResponse:
+    def __init__(self, payload: Dict):
+        self.payload = payload
+
+    def json(self) -> Dict:
+        return self.payload
+
+
+class _CandleSession:
+    """Answers the candle request with a seeded random walk instead of calling Finnhub"""
+
+    def __init__(self, bars: int, stepSeconds: int, seed: int):
+        rng = random.Random(seed)
+        end = int(time.time())
+        price, candles = 150.0, {'s': 'ok', 't': [], 'o': [], 'h': [], 'l': [], 'c': [], 'v': []}
+        for i in range(bars):
+            opened = price
+            price = max(1.0, price * math.exp(rng.gauss(0, 0.015)))
+            candles['t'].append(end - (bars - i) * stepSeconds)
+            candles['o'].append(opened)
+            candles['h'].append(max(opened, price) * (1 + abs(rng.gauss(0, 0.004))))
+            candles['l'].append(min(opened, price) * (1 - abs(rng.gauss(0, 0.004))))
+            candles['c'].append(price)
+            candles['v'].append(float(rng.randint(1_000_000, 90_000_000)))
+        self.response = _CandleResponse(candles)
+
+    def get(self, url, params=None, **kwargs):
+        return self.response
+
+
+def syntheticCharts(seed: int) -> Dict[str, Dict]:
+    """Chart reports as finnhub_chart_fetcher builds them, from synthetic candles"""
+    shapes = {'chart-1y-daily': (252, 86400, 'D'), 'chart-5y-daily': (1260, 86400, 'D'),
+              'chart-5d-5min': (390, 300, '5')}
+    charts = {}
+    original = finnhub_chart_fetcher.getSession
+    try:
+        for name, (bars, step, resolution) in shapes.items():
+            session = _CandleSession(bars, step, seed)
+            finnhub_chart_fetcher.getSession = lambda: session
+            charts[name] = finnhub_chart_fetcher.fetch_chart_data_finnhub('BENCH', 'bench', resolution, 0)
+    finally:
+        finnhub_chart_fetcher.getSession = original
+    return charts
+
+
+def pythonEncode(payload, compact: bool, runs: int) -> Dict:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        data = wire.dumps(payload, compact=compact) + b'\n'
+        samples.append((time.perf_counter() - started) * 1000)
+    return {'bytes': len(data), 'encodeMs': statistics.median(samples), 'data': data}
+
+
+def benchPayload(payload, runs: int) -> List[Dict]:
+    rows = []
+    for label, fmt, forwarding in CASES:
+        encoded = pythonEncode(payload, fmt == 'compact', runs)
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as file:
+            file.write(encoded['data'])
+        try:
+            node = subprocess.run(['node', '-e', NODE_CODE, file.name, str(runs)],
+                                  capture_output=True, text=True, check=True)
+        finally:
+            os.unlink(file.name)
+        measured = json.loads(node.stdout)[forwarding]
+        rows.append({
+            'case': label,
+            'stdoutBytes': encoded['bytes'],
+            'wireBytes': measured['wireBytes'],
+            'pythonEncodeMs': round(encoded['encodeMs'], 3),
+            'serverMs': round(measured['serverMs'], 3),
+            'clientDecodeMs': round(measured['clientMs'], 3),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure payload size and transport CPU per wire format")
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--payload', nargs='*', default=[], help="JSON files to use instead of synthetic charts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="results file (default: .cache/bench/wire-<timestamp>.json)")
+    args = parser.parse_args()
+
+    if args.payload:
+        payloads = {}
+        for path in args.payload:
+            with open(path, 'r', encoding='utf-8') as file:
+                payloads[os.path.basename(path)] = json.load(file)
+    else:
+        payloads = syntheticCharts(args.seed)
+
+    print(f"orjson: {'yes' if wire.orjson is not None else 'no (standard library json)'}")
+    results = {}
+    for name, payload in payloads.items():
+        results[name] = benchPayload(payload, args.runs)
+        print(f"\n{name}")
+        for row in results[name]:
+            print(f"  {row['case']:<32} stdout={row['stdoutBytes']:>9,}B wire={row['wireBytes']:>9,}B "
+                  f"python={row['pythonEncodeMs']:>7.2f}ms server={row['serverMs']:>6.2f}ms "
+                  f"client={row['clientDecodeMs']:>6.2f}ms")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"wire-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({'settings': {'runs': args.runs, 'orjson': wire.orjson is not None}, 'results': results},
+                  file, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
-import yfinance as yf
-import json
+from tracing import span, traced
+
+with span("imports"):
+    import yfinance as yf
 import math
 import sys
 
+import wire
+
 def clean_data(obj):
     if isinstance(obj, dict):
         return {k: clean_data(v) for k, v in obj.items()}
@@ -14,9 +18,11 @@ def clean_data(obj):
         return obj
     return obj
 
+@traced("build_stock_report")
 def build_stock_report(ticker):
     stock = yf.Ticker(ticker)
-    info = stock.get_info()
+    with span("yfinance.info", ticker=ticker):
+        info = stock.get_info()
 
     data = {
         "ticker": ticker,
@@ -42,7 +48,9 @@ def build_stock_report(ticker):
 
     # Revenue growth YoY (last 3 quarters)
     try:
-        rev = stock.quarterly_financials.loc["Total Revenue"]
+        with span("yfinance.quarterly_financials", ticker=ticker):
+            financials = stock.quarterly_financials
+        rev = financials.loc["Total Revenue"]
         rev = rev.sort_index(ascending=False)
 
         for i in range(3):
@@ -63,7 +71,9 @@ def build_stock_report(ticker):
 
     # Free cash flow growth YoY (last 4 quarters)
     try:
-        fcf = stock.quarterly_cashflow.loc["Free Cash Flow"]
+        with span("yfinance.quarterly_cashflow", ticker=ticker):
+            cashflow = stock.quarterly_cashflow
+        fcf = cashflow.loc["Free Cash Flow"]
         fcf = fcf.sort_index(ascending=False)
 
         for i in range(4):
@@ -100,7 +110,8 @@ def build_stock_report(ticker):
         pass
 
     # Earnings surprise history (last 4)
-    earnings = stock.earnings_dates
+    with span("yfinance.earnings_dates", ticker=ticker):
+        earnings = stock.earnings_dates
     if earnings is not None and not earnings.empty:
         earnings = earnings.sort_index(ascending=False)
         count = 0
@@ -123,7 +134,8 @@ def build_stock_report(ticker):
                 count += 1
 
     # Forward growth estimates (next 2 quarters)
-    analysis = stock.analysis
+    with span("yfinance.analysis", ticker=ticker):
+        analysis = stock.analysis
 
     if analysis is not None:
         def forward_growth(row, n=2):
@@ -170,7 +182,8 @@ def build_stock_report(ticker):
                 data["earningsDates"]["next"] = date.strftime("%Y-%m-%d")
                 break
 
-    return clean_data(data)
+    with span("clean_data"):
+        return clean_data(data)
 
 # CLI entry point
 def main():
@@ -180,7 +193,8 @@ def main():
         ticker = input("Enter ticker (e.g. AAPL): ").upper()
 
     report = build_stock_report(ticker)
-    print(json.dumps(report, indent=2))
+    with span("serialize"):
+        wire.write(report)
 
 
 if __name__ == "__main__":